@@ -0,0 +1,3 @@
+"""
+CS2 Analytics application package
+"""
@@ -0,0 +1,3 @@
+"""
+Shared application core: one set of match data, ratings and caches for all API routes
+"""
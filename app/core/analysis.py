@@ -0,0 +1,136 @@
+"""
+Match analysis built from the shared ratings and team aggregates
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.state import AppCore
+from app.services.live_win_probability import FIELD as LIVE_WIN_FIELD
+from app.services.odds_book import odds_value_label
+from app.services.snapshot import MatchSnapshot
+
+STAKE_BY_RISK = {"Low": "Medium", "Medium": "Small", "High": "Minimal"}
+
+
+def _form_label(form: Optional[float]) -> str:
+    return f"{round(100 * form)}%" if form is not None else "n/a"
+
+
+def _record_label(record: Tuple[int, int, int]) -> str:
+    wins, draws, losses = record
+    return f"{wins}-{draws}-{losses}" if draws else f"{wins}-{losses}"
+
+
+def _odds_value(market: Optional[Dict[str, Any]], team: str) -> str:
+    side = (market or {}).get("sides", {}).get(team)
+    return odds_value_label(side["expected_value"] if side else None)
+
+
+def build_match_analysis(core: AppCore, match_id: str, match: Dict[str, Any], snapshot: MatchSnapshot) -> Dict[str, Any]:
+    """Full analysis of one match (the /api/python/match/<id>/analysis shape)"""
+    # Elo prediction, computed in one batch for the whole snapshot
+    prediction = core.predictor.for_snapshot(snapshot)[match_id]
+    team1, team2 = match["team1"]["name"], match["team2"]["name"]
+    loser = team2 if prediction.winner == team1 else team1
+    aggregates = core.aggregates
+    engine = core.rating_engine
+    # Best prices, margin-free probabilities and value, for the whole snapshot at once
+    market = core.value_bets.match_value(snapshot, match)
+    # Map count, total rounds and exact score distributions (live and upcoming matches)
+    simulation = core.simulator.simulate(match, prediction, version=snapshot.version)
+
+    return {
+        "match_id": match_id,
+        "prediction": {
+            "winner": prediction.winner,
+            "confidence": round(prediction.win_probability * 100, 1),
+            "reasoning": (
+                f"{prediction.winner} is rated higher than {loser} "
+                f"(Elo {max(prediction.team1_rating, prediction.team2_rating):.0f} "
+                f"vs {min(prediction.team1_rating, prediction.team2_rating):.0f})"
+                if round(prediction.team1_rating) != round(prediction.team2_rating)
+                else f"{team1} and {team2} are evenly rated (Elo {prediction.team1_rating:.0f}), "
+                     f"there is not enough match history to separate them"
+            ),
+            "risk_level": prediction.risk_level,
+            # In-play series probability from the current map and round score (live matches)
+            "live_win_probability": match.get(LIVE_WIN_FIELD),
+            "source": "elo"
+        },
+        "team_stats": {
+            team1: {
+                "recent_form": _form_label(aggregates.form(team1)),
+                "map_pool_strength": round(engine.map_pool_strength(team1), 2),
+                "map_win_rates": aggregates.map_win_rates(team1),
+                "head_to_head": _record_label(aggregates.head_to_head(team1, team2))
+            },
+            team2: {
+                "recent_form": _form_label(aggregates.form(team2)),
+                "map_pool_strength": round(engine.map_pool_strength(team2), 2),
+                "map_win_rates": aggregates.map_win_rates(team2),
+                "head_to_head": _record_label(aggregates.head_to_head(team2, team1))
+            }
+        },
+        "betting_recommendation": {
+            "recommended_bet": prediction.winner,
+            "odds_value": _odds_value(market, prediction.winner),
+            "market": market,
+            "stake_suggestion": STAKE_BY_RISK[prediction.risk_level],
+            "alternative_bets": simulation.alternative_bets() if simulation else [],
+            "series_simulation": simulation.to_dict() if simulation else None
+        },
+        "generated_at": datetime.now().isoformat()
+    }
+
+
+async def build_analysis(core: AppCore, match_id: str, match: Dict[str, Any], snapshot: MatchSnapshot) -> Dict[str, Any]:
+    """build_match_analysis with the prediction written by Gemini when it answers.
+
+    The numeric prediction stays when Gemini is disabled, over budget or
+    fails (see GeminiAnalyzer).
+    """
+    analysis = await asyncio.to_thread(build_match_analysis, core, match_id, match, snapshot)
+    answer = await core.gemini.analyze(match_id, match, analysis)
+    if answer is not None:
+        analysis["prediction"] = dict(answer, live_win_probability=match.get(LIVE_WIN_FIELD), source="gemini")
+        betting = analysis["betting_recommendation"]
+        betting["recommended_bet"] = answer["winner"]
+        betting["odds_value"] = _odds_value(betting["market"], answer["winner"])
+        betting["stake_suggestion"] = STAKE_BY_RISK[answer["risk_level"]]
+    return analysis
+
+
+def summary_analysis(analysis: Dict[str, Any], match: Dict[str, Any]) -> Dict[str, Any]:
+    """The same analysis in the shape of the former FastAPI /api/analyze-match response"""
+    prediction = analysis["prediction"]
+    betting = analysis["betting_recommendation"]
+    winner = prediction["winner"]
+    odds_key = "odds_team1" if winner == match["team1"]["name"] else "odds_team2"
+    side = (betting.get("market") or {}).get("sides", {}).get(winner)
+    # Best price across bookmakers, else the scraped one
+    odds = side["best_odds"] if side and side["best_odds"] is not None else match.get(odds_key)
+    risk_factors = []
+    if prediction["risk_level"] == "High":
+        risk_factors.append("Not enough rating history or a close matchup")
+    if match.get("status") == "live":
+        risk_factors.append("Match is already live, the score may swing quickly")
+
+    return {
+        "match_id": analysis["match_id"],
+        "predicted_winner": winner,
+        "win_probability": round(prediction["confidence"] / 100, 3),
+        "confidence": round(prediction["confidence"] / 100, 3),
+        "reasoning": prediction["reasoning"],
+        "betting_recommendations": [
+            {
+                "type": "Winner",
+                "description": f"Победа {winner}",
+                "odds": float(odds) if odds is not None else None,
+                "recommendation": "recommended" if prediction["risk_level"] != "High" else "caution",
+                "stake": betting["stake_suggestion"].lower()
+            }
+        ],
+        "risk_factors": risk_factors,
+        "backend": "FastAPI Python AI"
+    }
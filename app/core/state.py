@@ -0,0 +1,294 @@
+"""
+Process-wide application state shared by all routers
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from app.services.analysis_cache import AnalysisCache
+from app.services.gemini_analyzer import GeminiAnalyzer
+from app.services.hltv_scraper import HLTVScraper
+from app.services.history_store import HistoryStore
+from app.services.http_cache import set_etag_epoch
+from app.services.ingestion import MatchIngestor
+from app.services.live_broadcaster import LiveBroadcaster
+from app.services.live_win_probability import FIELD as LIVE_WIN_FIELD, LiveWinTracker
+from app.services.match_archive import MatchArchive
+from app.services.match_store import MatchStore, split_teams
+from app.services.odds_book import OddsBook, ValueBetFinder
+from app.services.predictor import MatchPredictor
+from app.services.rating_engine import RatingEngine
+from app.services.rating_updater import RatingUpdater
+from app.services.refresh_scheduler import RefreshScheduler
+from app.services.series_simulator import SeriesSimulator
+from app.services.serialization import BodyCache
+from app.services.shared_state import SharedSnapshots
+from app.services.snapshot import MatchSnapshot, SnapshotCache
+from app.services.team_aggregates import TeamAggregates
+
+LIVE_POLL_INTERVAL = 0.5
+# How often workers check the shared state (new snapshot, leader gone, refresh requests)
+SHARED_POLL_INTERVAL = 1.0
+# How long a starting follower waits for the leader's first snapshot
+FOLLOWER_START_TIMEOUT = 10.0
+
+
+class AppCore:
+    """Match snapshot, store, archive, history, ratings and caches for one process.
+
+    The refresh scheduler publishes snapshots; every publish is mirrored into
+    the indexed MatchStore that backs the ``/api/*-fastapi`` routes, so both
+    route families serve the same data.
+
+    With several uvicorn workers, only the elected leader (see
+    SharedSnapshots) scrapes, archives and updates ratings; the other
+    workers install the leader's snapshots and reload its saved ratings.
+    """
+
+    def __init__(
+        self,
+        archive_path: Optional[str] = None,
+        ratings_path: Optional[str] = None,
+        shared_path: Optional[str] = None,
+        history_path: Optional[str] = None,
+        live_interval: float = 15,
+        full_interval: float = 300,
+    ):
+        self.scraper = HLTVScraper()
+        self.snapshots = SnapshotCache(self.scraper.get_current_matches, ttl=None)
+        self.store = MatchStore()
+        self.snapshots.add_listener(self.sync_store)
+        self.shared = SharedSnapshots(shared_path or os.getenv("SHARED_STATE_PATH", "shared_state.db"))
+        self.snapshots.add_listener(self._share_snapshot)
+        self.odds = OddsBook()
+        self.snapshots.add_listener(self.odds.record_snapshot)
+        self.response_bodies = BodyCache(max_size=64)
+        self.analysis_cache = AnalysisCache(max_size=1024, ttl=60)
+        self.gemini = GeminiAnalyzer()
+        self.broadcaster = LiveBroadcaster(queue_size=32)
+        self.ingestor = MatchIngestor()
+        # Finished matches waiting to be written to the database (appended by the scheduler thread)
+        self._finished_rows: deque = deque()
+
+        self.archive = MatchArchive(archive_path or os.getenv("ARCHIVE_DB_PATH", "match_archive.db"))
+        self.history = HistoryStore(history_path or os.getenv("HISTORY_STORE_PATH", "match_history"))
+        self.aggregates = TeamAggregates(form_size=10)
+        self.rating_engine = RatingEngine()
+        self.predictor = MatchPredictor(self.rating_engine)
+        self.value_bets = ValueBetFinder(self.odds, self.predictor)
+        self.live_win = LiveWinTracker()
+        self.snapshots.add_enricher(self.annotate_live)
+        self.simulator = SeriesSimulator(self.rating_engine, self.live_win.model)
+        self.rating_updater = RatingUpdater(
+            self.rating_engine,
+            self.archive,
+            ratings_path or os.getenv("RATINGS_STATE_PATH", "ratings_state.npz"),
+        )
+        self.refresh_scheduler = RefreshScheduler(
+            self.snapshots,
+            load_all=self.scraper.load_matches,
+            refresh_live=self.scraper.refresh_live_matches,
+            live_interval=live_interval,
+            full_interval=full_interval,
+            on_finished=self.archive_finished_matches,
+        )
+        self._live_watcher: Optional[asyncio.Task] = None
+        self._shared_watcher: Optional[asyncio.Task] = None
+        self._db_writer: Optional[asyncio.Task] = None
+        self._scheduler_enabled = True
+        self._ratings_mtime: Optional[float] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self, scheduler: bool = True):
+        """Join the shared state (as leader or follower) and start background work"""
+        set_etag_epoch(self.shared.epoch())
+        self._scheduler_enabled = scheduler
+        if self.shared.try_acquire_leadership():
+            await asyncio.to_thread(self._lead)
+        else:
+            await asyncio.to_thread(self._follow, FOLLOWER_START_TIMEOUT)
+        self._live_watcher = asyncio.create_task(self.watch_store())
+        self._shared_watcher = asyncio.create_task(self.watch_shared())
+        self._db_writer = asyncio.create_task(self.write_database())
+
+    def load_ratings(self):
+        """Restore the saved ratings (or rebuild them) and catch up with the archive"""
+        if not self.rating_updater.load():
+            self.rating_updater.rebuild()
+        self.rating_updater.update()
+
+    async def stop(self):
+        for task in (self._live_watcher, self._shared_watcher, self._db_writer):
+            if task is not None:
+                task.cancel()
+        self._live_watcher = self._shared_watcher = self._db_writer = None
+        self.refresh_scheduler.close()
+        self.shared.release_leadership()
+        self.simulator.close()
+        await self.gemini.close()
+
+    async def watch_store(self):
+        """Publish the match list to live subscribers whenever the store changes"""
+        published_version = None
+        while True:
+            if self.store.version != published_version:
+                published_version = self.store.version
+                self.broadcaster.publish(self.store.match_views())
+            await asyncio.sleep(LIVE_POLL_INTERVAL)
+
+    async def write_database(self):
+        """Ingest every new snapshot, then the matches that finished, into the database (leader only)"""
+        ingested_version = None
+        while True:
+            snapshot = self.snapshots.peek()
+            if self.shared.is_leader and snapshot is not None and snapshot.version != ingested_version:
+                try:
+                    result = await self.ingestor.ingest(snapshot.matches)
+                    ingested_version = snapshot.version
+                    if result.written:
+                        print(f"Ingested snapshot {snapshot.version}: {result.inserted} inserted, "
+                              f"{result.updated} updated, {result.unchanged} unchanged")
+                except Exception as e:
+                    print(f"Error ingesting matches: {e}")
+            # Snapshots leave finished matches out; their final status and winner come from here
+            finished = [self._finished_rows.popleft() for _ in range(len(self._finished_rows))]
+            if finished:
+                try:
+                    result = await self.ingestor.ingest(finished)
+                    print(f"Ingested {len(finished)} finished matches: {result.written} written")
+                except Exception as e:
+                    self._finished_rows.extendleft(reversed(finished))
+                    print(f"Error ingesting finished matches: {e}")
+            await asyncio.sleep(LIVE_POLL_INTERVAL)
+
+    async def watch_shared(self):
+        """Follow the leader's snapshots, take over if it is gone, serve refresh requests"""
+        while True:
+            await asyncio.sleep(SHARED_POLL_INTERVAL)
+            try:
+                if self.shared.is_leader:
+                    if self.shared.refresh_requested():
+                        await asyncio.to_thread(self.refresh_now)
+                elif self.shared.try_acquire_leadership():
+                    await asyncio.to_thread(self._lead)
+                else:
+                    await asyncio.to_thread(self._follow)
+            except Exception as e:
+                print(f"Error syncing shared state: {e}")
+
+    # ------------------------------------------------------------------
+    # Leader / follower
+    # ------------------------------------------------------------------
+
+    def _lead(self):
+        """Take over scraping, archiving and ratings, continuing from the shared snapshot"""
+        print(f"Worker {os.getpid()} is the refresh leader")
+        self.snapshots.build_locally = True
+        self.pull_snapshot()
+        self.snapshots.advance_version(self.shared.latest_version())
+        self.load_ratings()
+        self.history.refresh()
+        self.history.sync(self.archive)
+        self.sync_aggregates()
+        if self.snapshots.peek() is None:
+            # Seed from the real source: the builder's built-in list must never reach the archive
+            self.refresh_scheduler.refresh_now()
+        if self._scheduler_enabled:
+            self.refresh_scheduler.start()
+
+    def _follow(self, timeout: float = 0.0):
+        # A locally built snapshot would reuse the leader's version numbers for
+        # other data; until the leader publishes, requests get a 503
+        self.snapshots.build_locally = False
+        deadline = time.monotonic() + timeout
+        while not self.pull_snapshot() and time.monotonic() < deadline:
+            time.sleep(0.2)
+        self.reload_ratings()
+        self.history.refresh()
+        self.sync_aggregates()
+
+    def pull_snapshot(self) -> bool:
+        """Install the leader's newest snapshot; False if there is nothing newer"""
+        current = self.snapshots.peek()
+        newer = self.shared.read_newer(current.version if current is not None else 0)
+        if newer is None:
+            return False
+        version, created_at, matches = newer
+        self.snapshots.publish(matches, version=version, created_at=created_at)
+        return True
+
+    def reload_ratings(self):
+        """Reload the ratings the leader saved (after it archived new results)"""
+        try:
+            mtime = os.path.getmtime(self.rating_updater.state_path)
+        except OSError:
+            return
+        if mtime != self._ratings_mtime:
+            self._ratings_mtime = mtime
+            self.rating_updater.load()
+            self.archive.refresh_count()
+
+    def refresh_now(self) -> MatchSnapshot:
+        """Full refresh right away; followers ask the leader and wait for it.
+
+        Raises TimeoutError if the leader does not confirm the refresh in time.
+        """
+        if self.shared.is_leader:
+            snapshot = self.refresh_scheduler.refresh_now()
+            self.shared.mark_refreshed()
+            return snapshot
+        requested_at = self.shared.request_refresh()
+        if not self.shared.wait_refreshed(requested_at):
+            raise TimeoutError("the refresh leader did not confirm the refresh in time")
+        self.pull_snapshot()
+        return self.snapshots.current()
+
+    # ------------------------------------------------------------------
+    # Data flow
+    # ------------------------------------------------------------------
+
+    def annotate_live(self, matches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Attach the in-play series win probability to every live match"""
+        live = [m for m in matches if m.get("status") == "live"]
+        return self.live_win.annotate(matches, self.predictor.predict_matches(live) if live else {})
+
+    def sync_store(self, snapshot: MatchSnapshot):
+        self.store.sync(*split_teams(snapshot.matches), version=snapshot.version)
+
+    def _share_snapshot(self, snapshot: MatchSnapshot):
+        if self.shared.is_leader:
+            self.shared.write(snapshot)
+
+    def archive_finished_matches(self, finished: List[Dict[str, Any]]):
+        """Move finished matches to the archive and fold them into the ratings"""
+        # The last in-play probability is not part of the result
+        finished = [{k: v for k, v in m.items() if k != LIVE_WIN_FIELD} for m in finished]
+        added = self.archive.append(finished)
+        print(f"Archived {added} finished matches")
+        self._finished_rows.extend(finished)
+        if added:
+            self.rating_updater.update()
+            self.history.sync(self.archive)
+            self.aggregates.update(self.archive)
+
+    def sync_aggregates(self):
+        """Build the team aggregates from the history once, then follow the archive"""
+        if self.aggregates.version == 0:
+            self.aggregates.rebuild(self.history)
+        self.aggregates.update(self.archive)
+
+
+_core: Optional[AppCore] = None
+
+
+def get_core() -> AppCore:
+    """The process-wide AppCore, created on first use (also a FastAPI dependency)"""
+    global _core
+    if _core is None:
+        _core = AppCore()
+    return _core
@@ -0,0 +1,316 @@
+"""
+Async database layer: SQLAlchemy 2.0 engine, models, sessions and bulk upserts
+
+DATABASE_URL selects the database. Plain URLs are mapped to async drivers:
+sqlite:// -> sqlite+aiosqlite://, postgres(ql):// -> postgresql+asyncpg://
+(or +psycopg when only psycopg 3 is installed).
+"""
+import asyncio
+import importlib.util
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Boolean,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+    event,
+    func,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+from app.services.match_store import split_teams
+
+DEFAULT_DATABASE_URL = "sqlite+aiosqlite:///./cs2_analytics.db"
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Team(Base):
+    __tablename__ = "teams"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    name: Mapped[str] = mapped_column(String(128), index=True)
+    short_name: Mapped[Optional[str]] = mapped_column(String(32))
+    logo: Mapped[Optional[str]] = mapped_column(String(512))
+    country: Mapped[Optional[str]] = mapped_column(String(64))
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class Match(Base):
+    __tablename__ = "matches"
+    __table_args__ = (
+        Index("ix_matches_status_start_time", "status", "start_time"),
+    )
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    team1_id: Mapped[str] = mapped_column(ForeignKey("teams.id"), index=True)
+    team2_id: Mapped[str] = mapped_column(ForeignKey("teams.id"), index=True)
+    tournament: Mapped[Optional[str]] = mapped_column(String(256))
+    start_time: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    format: Mapped[Optional[str]] = mapped_column(String(8))
+    status: Mapped[str] = mapped_column(String(16))
+    maps_score: Mapped[Optional[str]] = mapped_column(String(16))
+    rounds_score: Mapped[Optional[str]] = mapped_column(String(16))
+    current_map: Mapped[Optional[str]] = mapped_column(String(32))
+    winner: Mapped[Optional[str]] = mapped_column(String(128))
+    odds_team1: Mapped[Optional[float]] = mapped_column(Float)
+    odds_team2: Mapped[Optional[float]] = mapped_column(Float)
+    bookmaker_name: Mapped[Optional[str]] = mapped_column(String(64))
+    url: Mapped[Optional[str]] = mapped_column(String(512))
+    maps: Mapped[Optional[List[Dict[str, Any]]]] = mapped_column(JSON)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class Analysis(Base):
+    __tablename__ = "analyses"
+    __table_args__ = (
+        UniqueConstraint("match_id", "fingerprint", name="uq_analyses_match_fingerprint"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    match_id: Mapped[str] = mapped_column(ForeignKey("matches.id", ondelete="CASCADE"), index=True)
+    fingerprint: Mapped[str] = mapped_column(String(32))
+    source: Mapped[str] = mapped_column(String(32), default="elo")
+    payload: Mapped[Dict[str, Any]] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+
+class Prediction(Base):
+    __tablename__ = "predictions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    match_id: Mapped[str] = mapped_column(ForeignKey("matches.id", ondelete="CASCADE"), index=True)
+    predicted_winner: Mapped[str] = mapped_column(String(128))
+    win_probability: Mapped[float] = mapped_column(Float)
+    risk_level: Mapped[Optional[str]] = mapped_column(String(16))
+    model_version: Mapped[Optional[str]] = mapped_column(String(32))
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), index=True)
+
+
+class BotUser(Base):
+    __tablename__ = "bot_users"
+
+    # Telegram chat id (negative for groups)
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    username: Mapped[Optional[str]] = mapped_column(String(64))
+    first_name: Mapped[Optional[str]] = mapped_column(String(128))
+    # Set when a send fails with 403 (the user blocked the bot); /start clears it
+    blocked: Mapped[bool] = mapped_column(Boolean, default=False, server_default="0", index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+class Broadcast(Base):
+    __tablename__ = "broadcasts"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    text: Mapped[str] = mapped_column(Text)
+    parse_mode: Mapped[Optional[str]] = mapped_column(String(16))
+    # pending -> running -> done (or cancelled)
+    status: Mapped[str] = mapped_column(String(16), default="pending", index=True)
+    total: Mapped[int] = mapped_column(Integer, default=0)
+    sent: Mapped[int] = mapped_column(Integer, default=0)
+    failed: Mapped[int] = mapped_column(Integer, default=0)
+    blocked: Mapped[int] = mapped_column(Integer, default=0)
+    # Delivery checkpoint: every chat id <= cursor is handled, plus the ids in done
+    cursor: Mapped[Optional[int]] = mapped_column(BigInteger)
+    done: Mapped[List[int]] = mapped_column(JSON, default=list)
+    seconds: Mapped[float] = mapped_column(Float, default=0.0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
+
+
+# ----------------------------------------------------------------------
+# Engine and sessions
+# ----------------------------------------------------------------------
+
+def database_url(url: Optional[str] = None) -> str:
+    """DATABASE_URL with the scheme switched to an async driver"""
+    url = url or os.getenv("DATABASE_URL") or DEFAULT_DATABASE_URL
+    scheme, sep, rest = url.partition("://")
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme in ("postgres", "postgresql", "postgresql+psycopg2"):
+        driver = "asyncpg" if importlib.util.find_spec("asyncpg") else "psycopg"
+        return f"postgresql+{driver}://{rest}"
+    return url
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute("PRAGMA synchronous = NORMAL")
+    cursor.execute("PRAGMA foreign_keys = ON")
+    cursor.close()
+
+
+def create_engine(url: Optional[str] = None) -> AsyncEngine:
+    """Pooled async engine: connections are reused across requests"""
+    url = database_url(url)
+    if url.startswith("sqlite"):
+        engine = create_async_engine(url, pool_size=5, max_overflow=5, pool_pre_ping=False)
+        event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
+        return engine
+    return create_async_engine(
+        url,
+        pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        pool_pre_ping=True,
+        pool_recycle=1800,
+    )
+
+
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_engine() -> AsyncEngine:
+    global _engine, _session_factory
+    if _engine is None:
+        _engine = create_engine()
+        _session_factory = async_sessionmaker(_engine, expire_on_commit=False)
+    return _engine
+
+
+def get_session_factory() -> async_sessionmaker:
+    get_engine()
+    return _session_factory
+
+
+async def init_db(attempts: int = 3):
+    """Create missing tables.
+
+    Several workers starting at once can race on CREATE TABLE; the loser
+    retries, and the retry finds the tables already there.
+    """
+    for attempt in range(attempts):
+        try:
+            async with get_engine().begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            return
+        except DBAPIError:
+            if attempt == attempts - 1:
+                raise
+            await asyncio.sleep(0.1 * (attempt + 1))
+
+
+async def close_db():
+    """Return all pooled connections"""
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+        _engine = _session_factory = None
+
+
+async def get_db_session() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency: one session per request.
+
+    Sessions are cheap; the connection is checked out of the engine pool on
+    the first query and returned when the session closes, so requests that
+    never touch the database never take a connection.
+    """
+    async with get_session_factory()() as session:
+        try:
+            yield session
+            await session.commit()
+        except BaseException:
+            await session.rollback()
+            raise
+
+
+# ----------------------------------------------------------------------
+# Bulk upserts
+# ----------------------------------------------------------------------
+
+TEAM_COLUMNS = ("id", "name", "short_name", "logo", "country")
+MATCH_COLUMNS = (
+    "id", "team1_id", "team2_id", "tournament", "start_time", "format", "status",
+    "maps_score", "rounds_score", "current_map", "winner", "odds_team1", "odds_team2",
+    "bookmaker_name", "url", "maps",
+)
+
+
+def _insert(session: AsyncSession, table):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(table)
+    if dialect == "sqlite":
+        return sqlite.insert(table)
+    raise ValueError(f"bulk upsert is not supported for {dialect}; supported dialects: sqlite, postgresql")
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _parse_float(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def team_row(team: Dict[str, Any]) -> Dict[str, Any]:
+    return {column: team.get(column) for column in TEAM_COLUMNS}
+
+
+def match_row(match: Dict[str, Any]) -> Dict[str, Any]:
+    """Store-shaped match dict (team ids, see split_teams) -> matches row"""
+    row = {column: match.get(column) for column in MATCH_COLUMNS}
+    row["start_time"] = _parse_datetime(row["start_time"])
+    row["odds_team1"] = _parse_float(row["odds_team1"])
+    row["odds_team2"] = _parse_float(row["odds_team2"])
+    return row
+
+
+async def upsert_rows(session: AsyncSession, table, rows: Sequence[Dict[str, Any]]) -> int:
+    """INSERT ... ON CONFLICT (id) DO UPDATE for rows sharing the same columns"""
+    if not rows:
+        return 0
+    stmt = _insert(session, table)
+    set_ = {column: stmt.excluded[column] for column in rows[0] if column != "id"}
+    # Column.onupdate is not applied to ON CONFLICT updates
+    if "updated_at" in table.c and "updated_at" not in set_:
+        set_["updated_at"] = func.now()
+    stmt = stmt.on_conflict_do_update(index_elements=[table.c.id], set_=set_)
+    # A list of parameter sets runs as one executemany
+    await session.execute(stmt, list(rows))
+    return len(rows)
+
+
+async def upsert_teams(session: AsyncSession, teams: Iterable[Dict[str, Any]]) -> int:
+    return await upsert_rows(session, Team.__table__, [team_row(team) for team in teams])
+
+
+async def upsert_matches(session: AsyncSession, matches: Iterable[Dict[str, Any]]) -> int:
+    """Upsert store-shaped matches; their teams must exist"""
+    return await upsert_rows(session, Match.__table__, [match_row(match) for match in matches])
+
+
+async def upsert_scraped_matches(session: AsyncSession, matches: Iterable[Dict[str, Any]]) -> int:
+    """Upsert scraper output (teams embedded in the match dicts), teams first"""
+    teams, rows = split_teams(matches)
+    await upsert_teams(session, teams)
+    return await upsert_matches(session, rows)
@@ -0,0 +1,3 @@
+"""
+API routers of the unified ASGI app (mounted under /api by main.py)
+"""
@@ -0,0 +1,111 @@
+"""
+Operational endpoints: forced refresh, service stats and broadcasts
+"""
+import os
+import secrets
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.state import AppCore, get_core
+from app.database import Broadcast, get_db_session
+from app.routers.common import PYTHON_BACKEND, error_response
+from app.services.telegram_broadcast import broadcast_status, create_broadcast
+
+router = APIRouter()
+
+
+@router.post("/python/refresh-matches")
+def refresh_matches(core: AppCore = Depends(get_core)):
+    """Refresh the match list now and archive finished matches
+
+    A plain ``def`` route: it waits for the refresh (done by the leader
+    worker) in the threadpool instead of blocking the event loop.
+    """
+    try:
+        snapshot = core.refresh_now()
+        # Active matches (live and upcoming) are counted in the snapshot
+        return JSONResponse({
+            "message": "Matches refreshed and cleaned up",
+            "new_matches": snapshot.live_count + snapshot.upcoming_count,
+            "live_matches": snapshot.live_count,
+            "upcoming_matches": snapshot.upcoming_count,
+            "archived_count": core.archive.count(),
+            "backend": PYTHON_BACKEND,
+            "version": snapshot.version,
+            "last_updated": snapshot.created_at.isoformat()
+        })
+
+    except TimeoutError as e:
+        print(f"Error in refresh_matches: {e}")
+        return error_response("Refresh timed out, matches were not refreshed", 504)
+    except Exception as e:
+        print(f"Error in refresh_matches: {e}")
+        return error_response("Failed to refresh matches")
+
+
+@router.get("/admin/stats")
+async def service_stats(core: AppCore = Depends(get_core)):
+    """Cache, stream and data statistics of this worker"""
+    snapshot = core.snapshots.peek()
+    return {
+        "snapshot_version": snapshot.version if snapshot is not None else None,
+        "store_version": core.store.version,
+        "archived_count": core.archive.count(),
+        "history_matches": len(core.history),
+        "ratings_version": core.rating_engine.version,
+        "worker_pid": os.getpid(),
+        "leader": core.shared.is_leader,
+        "refresh_scheduler_running": core.refresh_scheduler.running,
+        "analysis_cache": core.analysis_cache.stats(),
+        "response_bodies": core.response_bodies.stats(),
+        "live_stream": core.broadcaster.stats(),
+        "ingestion": core.ingestor.stats(),
+        "gemini": core.gemini.stats(),
+        "odds": core.odds.stats(),
+        "live_win_probability": core.live_win.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+class BroadcastRequest(BaseModel):
+    text: str = Field(min_length=1, max_length=4096)
+    parse_mode: Optional[str] = None
+
+
+def _admin_allowed(password: Optional[str]) -> bool:
+    """X-Admin-Password must match ADMIN_PASSWORD; without one set, admin writes are off"""
+    expected = os.getenv("ADMIN_PASSWORD")
+    return bool(expected) and password is not None and secrets.compare_digest(password, expected)
+
+
+@router.post("/admin/broadcasts")
+async def queue_broadcast(
+    request: BroadcastRequest,
+    x_admin_password: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """Queue a message to every bot user; the worker running the bot sends it"""
+    if not _admin_allowed(x_admin_password):
+        return error_response("Forbidden", status_code=403, backend=None)
+    broadcast = await create_broadcast(session, request.text, request.parse_mode)
+    return JSONResponse(broadcast_status(broadcast), status_code=202)
+
+
+@router.get("/admin/broadcasts/{broadcast_id}")
+async def get_broadcast(
+    broadcast_id: int,
+    x_admin_password: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_db_session),
+):
+    """Delivery progress and throughput of a broadcast"""
+    if not _admin_allowed(x_admin_password):
+        return error_response("Forbidden", status_code=403, backend=None)
+    broadcast = await session.get(Broadcast, broadcast_id)
+    if broadcast is None:
+        return error_response("Broadcast not found", status_code=404, backend=None)
+    return broadcast_status(broadcast)
@@ -0,0 +1,244 @@
+"""
+Match analyses: single and batch (NDJSON), in the /api/python and FastAPI shapes
+"""
+import asyncio
+import json
+import math
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from app.core.analysis import build_analysis, summary_analysis
+from app.core.state import AppCore, get_core
+from app.routers.common import PYTHON_BACKEND, error_response
+from app.services.analysis_cache import match_fingerprint
+from app.services.snapshot import MatchSnapshot
+
+router = APIRouter()
+
+
+def analysis_fingerprint(core: AppCore, match: Dict[str, Any]) -> str:
+    """Cache key of an analysis: the match plus every input that can change it"""
+    return match_fingerprint(match, core.rating_engine.version, core.aggregates.version,
+                             core.odds.match_version(match["id"]))
+
+
+async def cached_analysis(core: AppCore, match_id: str, match: Dict[str, Any], snapshot: MatchSnapshot):
+    """Full analysis through the shared cache (numeric part computed off the event loop)"""
+    return await core.analysis_cache.get_or_compute_async(
+        match_id,
+        analysis_fingerprint(core, match),
+        lambda: build_analysis(core, match_id, match, snapshot)
+    )
+
+
+def stream_analyses(
+    core: AppCore,
+    snapshot: MatchSnapshot,
+    match_ids: List[str],
+    present: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]],
+) -> StreamingResponse:
+    """NDJSON, one line per match: cached analyses first, then the others as
+    soon as each is computed"""
+
+    async def analyze(match_id: str) -> Dict[str, Any]:
+        match = snapshot.get(match_id)
+        try:
+            return present(await cached_analysis(core, match_id, match, snapshot), match)
+        except Exception as e:
+            print(f"Error analyzing {match_id}: {e}")
+            return {"match_id": match_id, "error": "Failed to generate analysis"}
+
+    async def stream():
+        # Predictions for the whole snapshot are computed in one batch, off the event loop
+        await asyncio.to_thread(core.predictor.for_snapshot, snapshot)
+        missing = []
+        for match_id in match_ids:
+            match = snapshot.get(match_id)
+            if match is None:
+                yield json.dumps({"match_id": match_id, "error": "Match not found"}) + "\n"
+                continue
+            cached = core.analysis_cache.get(match_id, analysis_fingerprint(core, match))
+            if cached is not None:
+                yield json.dumps(present(cached, match), ensure_ascii=False) + "\n"
+            else:
+                missing.append(match_id)
+
+        tasks = [asyncio.ensure_future(analyze(match_id)) for match_id in missing]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done, ensure_ascii=False) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def full_analysis(analysis: Dict[str, Any], match: Dict[str, Any]) -> Dict[str, Any]:
+    return analysis
+
+
+def select_match_ids(snapshot: MatchSnapshot, match_ids: Optional[List[str]], status: Optional[str]) -> List[str]:
+    if match_ids:
+        return list(dict.fromkeys(match_ids))
+    return [m["id"] for m in snapshot.matches if status is None or m["status"] == status]
+
+
+class BatchAnalysisRequest(BaseModel):
+    match_ids: Optional[List[str]] = None
+    status: Optional[str] = None
+
+
+@router.get("/python/match/{match_id}/analysis")
+async def get_match_analysis(match_id: str, core: AppCore = Depends(get_core)):
+    """Analysis of one match"""
+    snapshot = core.snapshots.current()
+    try:
+        match = snapshot.get(match_id)
+        if not match:
+            return error_response("Match not found", 404, backend=None)
+        return JSONResponse(await cached_analysis(core, match_id, match, snapshot))
+
+    except Exception as e:
+        print(f"Error in get_match_analysis: {e}")
+        return error_response("Failed to generate analysis")
+
+
+@router.get("/python/match/{match_id}/odds")
+def get_match_odds(match_id: str, core: AppCore = Depends(get_core)):
+    """Latest prices per bookmaker, their history and the value against the model"""
+    snapshot = core.snapshots.current()
+    try:
+        match = snapshot.get(match_id)
+        if not match:
+            return error_response("Match not found", 404)
+        quotes = core.odds.latest([match_id])[0]
+        latest = {
+            bookmaker: {"team1": None if math.isnan(team1) else round(team1, 3),
+                        "team2": None if math.isnan(team2) else round(team2, 3)}
+            for bookmaker, (team1, team2) in zip(core.odds.bookmakers, quotes.tolist())
+            if not (math.isnan(team1) and math.isnan(team2))
+        }
+        return JSONResponse({
+            "match_id": match_id,
+            "team1": match["team1"]["name"],
+            "team2": match["team2"]["name"],
+            "latest": latest,
+            "history": core.odds.history(match_id),
+            "value": core.value_bets.match_value(snapshot, match),
+            "version": snapshot.version,
+            "backend": PYTHON_BACKEND
+        })
+
+    except Exception as e:
+        print(f"Error in get_match_odds: {e}")
+        return error_response("Failed to fetch odds")
+
+
+@router.get("/python/value-bets")
+def get_value_bets(min_ev: float = Query(0.0, ge=-1.0), core: AppCore = Depends(get_core)):
+    """Live and upcoming sides whose best price beats the model, best expected value first"""
+    snapshot = core.snapshots.current()
+    try:
+        bets = core.value_bets.value_bets(snapshot, min_ev)
+        return JSONResponse({
+            "value_bets": bets,
+            "total": len(bets),
+            "min_expected_value": min_ev,
+            "bookmakers": core.odds.bookmakers,
+            "version": snapshot.version,
+            "backend": PYTHON_BACKEND
+        })
+
+    except Exception as e:
+        print(f"Error in get_value_bets: {e}")
+        return error_response("Failed to compute value bets")
+
+
+@router.get("/python/match/{match_id}/simulation")
+def get_match_simulation(
+    match_id: str,
+    simulations: Optional[int] = Query(None, ge=1000, le=100_000),
+    core: AppCore = Depends(get_core),
+):
+    """Monte Carlo distributions of map count, total rounds and exact score of one series"""
+    snapshot = core.snapshots.current()
+    try:
+        match = snapshot.get(match_id)
+        if not match:
+            return error_response("Match not found", 404)
+        prediction = core.predictor.for_snapshot(snapshot)[match_id]
+        simulation = core.simulator.simulate(match, prediction, simulations, version=snapshot.version)
+        if simulation is None:
+            return error_response("Only live and upcoming matches of a known format are simulated", 422)
+        return JSONResponse(dict(simulation.to_dict(distribution=True), match_id=match_id,
+                                 version=snapshot.version, backend=PYTHON_BACKEND))
+
+    except Exception as e:
+        print(f"Error in get_match_simulation: {e}")
+        return error_response("Failed to simulate match")
+
+
+@router.get("/python/simulations")
+def get_simulations(
+    status: Optional[str] = None,
+    simulations: Optional[int] = Query(None, ge=1000, le=100_000),
+    core: AppCore = Depends(get_core),
+):
+    """Series distributions of every live and upcoming match (or those with ``status``),
+    spread over SIMULATION_PROCESSES worker processes"""
+    snapshot = core.snapshots.current()
+    try:
+        matches = [m for m in snapshot.matches if status is None or m.get("status") == status]
+        results = core.simulator.simulate_many(matches, core.predictor.for_snapshot(snapshot), simulations)
+        return JSONResponse({
+            "simulations": {match_id: result.to_dict() for match_id, result in results.items()},
+            "total": len(results),
+            "version": snapshot.version,
+            "backend": PYTHON_BACKEND
+        })
+
+    except Exception as e:
+        print(f"Error in get_simulations: {e}")
+        return error_response("Failed to simulate matches")
+
+
+@router.post("/python/analysis:batch")
+async def get_batch_analysis(
+    batch: Optional[BatchAnalysisRequest] = Body(None),
+    core: AppCore = Depends(get_core),
+):
+    """Analyses of several matches in one request (NDJSON, one line per match)
+
+    Body: {"match_ids": [...]} or {"status": "live"}; without filters, all
+    current matches. Cached analyses are sent first.
+    """
+    batch = batch or BatchAnalysisRequest()
+    snapshot = core.snapshots.current()
+    match_ids = select_match_ids(snapshot, batch.match_ids, batch.status)
+    return stream_analyses(core, snapshot, match_ids, full_analysis)
+
+
+@router.post("/analyze-match/{match_id}")
+async def analyze_match(match_id: str, core: AppCore = Depends(get_core)):
+    """Match analysis in the summary shape of the former FastAPI backend"""
+    snapshot = core.snapshots.current()
+    match = snapshot.get(match_id)
+    if not match:
+        raise HTTPException(status_code=404, detail="Match not found")
+    return summary_analysis(await cached_analysis(core, match_id, match, snapshot), match)
+
+
+@router.post("/analyze-matches")
+async def analyze_matches(batch: BatchAnalysisRequest, core: AppCore = Depends(get_core)):
+    """Analyze several matches at once, streamed back as NDJSON
+
+    Takes explicit match ids or a status filter (all matches if neither is
+    given).
+    """
+    snapshot = core.snapshots.current()
+    match_ids = select_match_ids(snapshot, batch.match_ids, batch.status)
+    return stream_analyses(core, snapshot, match_ids, summary_analysis)
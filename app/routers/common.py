@@ -0,0 +1,32 @@
+"""
+Response helpers shared by the routers
+"""
+from typing import Optional
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+from app.services.http_cache import etag_matches
+from app.services.serialization import EncodedBody
+
+# Backend label of the routes ported from python_backend.py, kept for API compatibility
+PYTHON_BACKEND = "Python/Flask"
+
+
+def encoded_response(
+    body: EncodedBody, etag: str, accept_encoding: Optional[str], if_none_match: Optional[str]
+) -> Response:
+    """Send a pre-serialized body, compressed if the client accepts it, or a 304"""
+    content, coding = body.select(accept_encoding)
+    headers = body.headers(etag, coding)
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type="application/json", headers=headers)
+
+
+def error_response(message: str, status_code: int = 500, backend: Optional[str] = PYTHON_BACKEND) -> JSONResponse:
+    """Error body in the {"error": ..., "backend": ...} shape of the /api/python routes"""
+    payload = {"error": message}
+    if backend is not None:
+        payload["backend"] = backend
+    return JSONResponse(payload, status_code=status_code)
@@ -0,0 +1,200 @@
+"""
+Match listings, archive and live score stream
+"""
+import asyncio
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.core.state import AppCore, get_core
+from app.routers.common import PYTHON_BACKEND, encoded_response, error_response
+from app.services.http_cache import make_etag, parse_since
+
+router = APIRouter()
+
+SSE_HEARTBEAT_INTERVAL = 15
+
+
+@router.get("/python/matches")
+async def get_python_matches(
+    since: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    core: AppCore = Depends(get_core),
+):
+    """Current matches from the published snapshot.
+
+    Versioned like the other listings: strong ETag (304 on If-None-Match),
+    ``?since=<version>`` deltas and pre-serialized, pre-compressed bodies.
+    """
+    try:
+        since_version = parse_since(since)
+    except ValueError:
+        return error_response("Invalid 'since' version", 400)
+
+    snapshot = core.snapshots.current()
+    try:
+        delta = core.snapshots.delta(since_version, snapshot) if since_version is not None else None
+        if delta is None:
+            since_version = None
+
+        def build_payload() -> Dict[str, Any]:
+            payload = {
+                "total": len(snapshot.matches),
+                "live_count": snapshot.live_count,
+                "upcoming_count": snapshot.upcoming_count,
+                "source": "Real-time HLTV Data",
+                "backend": PYTHON_BACKEND,
+                "version": snapshot.version,
+                "last_updated": snapshot.created_at.isoformat()
+            }
+            if delta is not None:
+                changed, removed = delta
+                payload.update({"since": since_version, "changed": changed, "removed": removed})
+            else:
+                payload["matches"] = snapshot.matches
+            return payload
+
+        body = core.response_bodies.get_or_encode(
+            ("python/matches", snapshot.version, since_version), build_payload
+        )
+        etag = make_etag("python/matches", snapshot.version, since_version)
+        return encoded_response(body, etag, accept_encoding, if_none_match)
+
+    except Exception as e:
+        print(f"Error in get_matches: {e}")
+        return error_response("Failed to fetch matches")
+
+
+@router.get("/python/archive")
+def get_python_archive(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+    team: Optional[str] = None,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    core: AppCore = Depends(get_core),
+):
+    """Finished matches from the archive, paginated and filtered"""
+    try:
+        matches, total = core.archive.query(
+            team=team, date_from=date_from, date_to=date_to, page=page, page_size=page_size
+        )
+        return JSONResponse({
+            "matches": matches,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "pages": (total + page_size - 1) // page_size,
+            "backend": PYTHON_BACKEND
+        })
+
+    except Exception as e:
+        print(f"Error in get_archive: {e}")
+        return error_response("Failed to fetch archive")
+
+
+def matches_filter(status: Optional[str], tournament: Optional[str], team_id: Optional[str]):
+    """Predicate equivalent to the store's index filters"""
+    def accept(match: Dict[str, Any]) -> bool:
+        return (
+            (status is None or match.get("status") == status)
+            and (tournament is None or match.get("tournament") == tournament)
+            and (team_id is None or team_id in (match.get("team1_id"), match.get("team2_id")))
+        )
+    return accept
+
+
+@router.get("/matches-fastapi")
+async def get_matches(
+    status: Optional[str] = None,
+    tournament: Optional[str] = None,
+    team_id: Optional[str] = None,
+    since: Optional[int] = None,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    core: AppCore = Depends(get_core),
+):
+    """Matches joined with their teams, from the indexed store.
+
+    Responses carry a strong ETag derived from the store version and the
+    query, so an unchanged listing revalidates with a 304. With
+    ``since=<version>`` only matches added or changed after that version
+    are returned, plus the ids of matches that were removed (or no longer
+    pass the filters).
+    """
+    if since is not None and since < 0:
+        raise HTTPException(status_code=400, detail="since must be a non-negative version")
+
+    store = core.store
+    # The version, the data and the cached body must all come from one store state
+    with store.reading():
+        version = store.version
+        delta = store.changes_since(since) if since is not None else None
+        if delta is None:
+            since = None
+        etag = make_etag("matches-fastapi", version, status, tournament, team_id, since)
+
+        def build_payload() -> Dict[str, Any]:
+            if delta is not None:
+                changed, removed = delta
+                accept = matches_filter(status, tournament, team_id)
+                payload = {
+                    "message": "Match changes from FastAPI Python backend",
+                    "since": since,
+                    "changed": [m for m in changed if accept(m)],
+                    "removed": removed + [m["id"] for m in changed if not accept(m)],
+                }
+            else:
+                matches_with_teams = store.match_views(status=status, tournament=tournament, team_id=team_id)
+                payload = {
+                    "message": "Matches from FastAPI Python backend",
+                    "matches": matches_with_teams,
+                    "total": len(matches_with_teams),
+                }
+            payload.update({"version": version, "backend": "FastAPI"})
+            return payload
+
+        body = core.response_bodies.get_or_encode(
+            ("matches", version, status, tournament, team_id, since), build_payload
+        )
+    return encoded_response(body, etag, accept_encoding, if_none_match)
+
+
+@router.get("/live/stream")
+async def live_stream(core: AppCore = Depends(get_core)):
+    """Server-Sent Events: a snapshot event, then per-match diff events"""
+    subscription = core.broadcaster.subscribe()
+
+    async def events():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.next_event(), SSE_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {event}\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/live/ws")
+async def live_websocket(websocket: WebSocket):
+    """WebSocket variant of /api/live/stream"""
+    await websocket.accept()
+    subscription = get_core().broadcaster.subscribe()
+    try:
+        async for event in subscription:
+            await websocket.send_text(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscription.close()
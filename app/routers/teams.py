@@ -0,0 +1,72 @@
+"""
+Team listings and team statistics
+"""
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Header
+
+from app.core.state import AppCore, get_core
+from app.routers.common import PYTHON_BACKEND, encoded_response, error_response
+from app.services.http_cache import make_etag
+
+router = APIRouter()
+
+
+@router.get("/teams-fastapi")
+async def get_teams(
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    core: AppCore = Depends(get_core),
+):
+    """Teams of the current matches"""
+    with core.store.reading():
+        version = core.store.version
+
+        def build_payload() -> Dict[str, Any]:
+            teams = core.store.teams()
+            return {
+                "message": "Teams from FastAPI Python backend",
+                "teams": teams,
+                "total": len(teams),
+                "backend": "FastAPI"
+            }
+
+        body = core.response_bodies.get_or_encode(("teams", version), build_payload)
+    return encoded_response(body, make_etag("teams-fastapi", version), accept_encoding, if_none_match)
+
+
+@router.get("/python/team/{team_id}/stats")
+async def get_team_stats(
+    team_id: str,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    core: AppCore = Depends(get_core),
+):
+    """Precomputed form, per-map win rates and head-to-head records of a team.
+
+    ``team_id`` is a team id from the match listings or a team name. A
+    listed team without archived results gets empty aggregates.
+    """
+    aggregates = core.aggregates
+    team = core.store.get_team(team_id)
+    name = aggregates.resolve(team["name"] if team is not None else team_id)
+    if name is None:
+        if team is None:
+            return error_response("Team not found", 404)
+        name = team["name"]
+    version = aggregates.version
+    ratings_version = core.rating_engine.version
+
+    def build_payload() -> Dict[str, Any]:
+        return {
+            "team": {"id": team_id, "name": name},
+            "stats": aggregates.stats(name),
+            "form_window": aggregates.form_size,
+            "rating": round(core.rating_engine.rating(name), 1),
+            "backend": PYTHON_BACKEND,
+            "version": version,
+        }
+
+    body = core.response_bodies.get_or_encode(("team-stats", name, version, ratings_version), build_payload)
+    etag = make_etag("team-stats", name, version, ratings_version)
+    return encoded_response(body, etag, accept_encoding, if_none_match)
@@ -0,0 +1,3 @@
+"""
+Shared services for the CS2 Analytics backends
+"""
@@ -0,0 +1,207 @@
+"""
+Memoized match analyses keyed on match state
+"""
+import asyncio
+import hashlib
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple, Union
+
+# Match fields that change the analysis when they change
+FINGERPRINT_FIELDS = (
+    "status",
+    "maps_score",
+    "rounds_score",
+    "current_map",
+    "odds_team1",
+    "odds_team2",
+    "bookmaker_name",
+    "format",
+)
+
+
+def match_fingerprint(match: Dict[str, Any], *extra: Any) -> str:
+    """Short hash of the match state (score, odds, status) plus any extra inputs"""
+    parts = [str(match.get(name)) for name in FINGERPRINT_FIELDS]
+    parts.extend(str(value) for value in extra)
+    return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class AnalysisCache:
+    """LRU + TTL cache for analyses with single-flight computation.
+
+    Entries are keyed on ``(match_id, fingerprint)``. Concurrent requests for
+    the same key wait for one computation instead of starting their own:
+    :meth:`get_or_compute` coordinates threads (Flask), and
+    :meth:`get_or_compute_async` coroutines on one event loop (FastAPI).
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._async_flights: Dict[Hashable, asyncio.Future] = {}
+        self._async_tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+
+    def _get(self, key: Hashable):
+        """Cached value or None; caller holds the lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if time.monotonic() - stored_at >= self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key: Hashable, value: Any):
+        """Store a value; caller holds the lock"""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, match_id: str, fingerprint: str):
+        """Cached analysis or None; misses are counted by get_or_compute"""
+        with self._lock:
+            value = self._get((match_id, fingerprint))
+            if value is not None:
+                self.hits += 1
+            return value
+
+    def invalidate(self, match_id: str):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == match_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    # ------------------------------------------------------------------
+    # Single-flight
+    # ------------------------------------------------------------------
+
+    def get_or_compute(self, match_id: str, fingerprint: str, compute: Callable[[], Any]):
+        key = (match_id, fingerprint)
+        with self._lock:
+            value = self._get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+                self.misses += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+            with self._lock:
+                self._put(key, flight.result)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    async def get_or_compute_async(
+        self,
+        match_id: str,
+        fingerprint: str,
+        compute: Callable[[], Union[Any, Awaitable[Any]]],
+    ):
+        key = (match_id, fingerprint)
+        with self._lock:
+            value = self._get(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            future = self._async_flights.get(key)
+            if future is None:
+                future = self._async_flights[key] = asyncio.get_running_loop().create_future()
+                # The computation runs in its own task: cancelling the caller that
+                # started it (e.g. a disconnected batch stream) must not fail the others
+                task = asyncio.ensure_future(self._fly(key, future, compute))
+                self._async_tasks.add(task)
+                task.add_done_callback(self._async_tasks.discard)
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        # shield: a cancelled caller must not cancel the shared result
+        return await asyncio.shield(future)
+
+    async def _fly(self, key: Hashable, future: asyncio.Future, compute: Callable[[], Any]):
+        try:
+            value = compute()
+            if inspect.isawaitable(value):
+                value = await value
+            with self._lock:
+                self._put(key, value)
+            future.set_result(value)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure is not logged as lost
+            future.exception()
+        finally:
+            with self._lock:
+                self._async_flights.pop(key, None)
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
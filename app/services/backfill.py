@@ -0,0 +1,302 @@
+"""
+Historical results backfill: parallel, resumable crawl of HLTV results pages
+
+Usage:
+    python -m app.services.backfill --from 2023-01-01 --to 2024-12-31 --out backfill
+    python -m app.services.backfill --from 2023-01-01 --to 2024-12-31 --out backfill --archive match_archive.db
+
+The date range is split into windows (``--window-days``), and every window is
+crawled page by page by a worker of a thread or process pool. Each finished
+window is written to ``<out>/windows/<start>_<end>.jsonl.gz`` and recorded in
+``<out>/checkpoint.json``; a restarted run skips the recorded windows. The
+windows are then merged, deduplicated by match id, into
+``<out>/results.jsonl.gz`` and, with ``--archive``, appended to the match
+archive (rebuild the ratings afterwards with
+``python -m app.services.rating_updater --rebuild``).
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.services.hltv_client import FetchError, HLTVClient
+from app.services.hltv_parser import parse_results_page
+
+# Guard against a results page that keeps linking to itself
+MAX_PAGES_PER_WINDOW = 1000
+
+
+@dataclass
+class WindowResult:
+    """Outcome of crawling one date window"""
+    start: str
+    end: str
+    pages: int = 0
+    matches: int = 0
+    duplicates: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.start}_{self.end}"
+
+
+@dataclass
+class BackfillReport:
+    windows: int = 0
+    skipped: int = 0
+    failed: int = 0
+    pages: int = 0
+    matches: int = 0
+    unique_matches: int = 0
+    archived: int = 0
+    seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+
+
+def date_windows(start: date, end: date, days: int) -> List[Tuple[date, date]]:
+    """Inclusive [start, end] windows of ``days`` days, newest first"""
+    windows = []
+    window_end = end
+    while window_end >= start:
+        window_start = max(start, window_end - timedelta(days=days - 1))
+        windows.append((window_start, window_end))
+        window_end = window_start - timedelta(days=1)
+    return windows
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_matches(path: str) -> Iterator[Dict[str, Any]]:
+    """Matches from a .jsonl.gz file written by the backfill"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+async def _crawl(client: HLTVClient, start: date, end: date, result: WindowResult) -> List[Dict[str, Any]]:
+    matches: Dict[str, Dict[str, Any]] = {}
+    offset: Optional[int] = 0
+    while offset is not None and result.pages < MAX_PAGES_PER_WINDOW:
+        html = await client.fetch(f"/results?offset={offset}&startDate={start}&endDate={end}")
+        listings, next_offset = parse_results_page(html)
+        result.pages += 1
+        for listing in listings:
+            if listing.hltv_id in matches:
+                # Pages shift while new results arrive, so rows repeat across pages
+                result.duplicates += 1
+            matches[listing.hltv_id] = listing.to_match()
+        offset = next_offset if next_offset is not None and next_offset > offset else None
+    return list(matches.values())
+
+
+def crawl_window(base_url: str, start: date, end: date, windows_dir: str, client_options: Dict[str, Any]) -> WindowResult:
+    """Crawl every results page of one window and write it to its part file.
+
+    Runs in a pool worker (thread or process), with its own event loop and
+    HTTP client. Any error fails only this window; it is returned in
+    ``error`` and the window is crawled again by the next run.
+    """
+    result = WindowResult(start.isoformat(), end.isoformat())
+    started = time.perf_counter()
+
+    async def run():
+        async with HLTVClient(base_url, **client_options) as client:
+            return await _crawl(client, start, end, result)
+
+    try:
+        matches = asyncio.run(run())
+        lines = "".join(json.dumps(match, ensure_ascii=False) + "\n" for match in matches)
+        _write_atomic(os.path.join(windows_dir, f"{result.key}.jsonl.gz"),
+                      gzip.compress(lines.encode("utf-8"), compresslevel=6, mtime=0))
+    except FetchError as e:
+        result.error = str(e)
+        return result
+    except Exception as e:
+        # A page that does not parse or a failed write only fails this window
+        result.error = f"{type(e).__name__}: {e}"
+        return result
+    result.matches = len(matches)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+class Backfill:
+    """Crawls results pages over a date range into an output directory"""
+
+    def __init__(
+        self,
+        out_dir: str,
+        base_url: str = "https://www.hltv.org",
+        window_days: int = 7,
+        workers: int = 4,
+        executor: str = "thread",
+        client_options: Optional[Dict[str, Any]] = None,
+    ):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"unknown executor: {executor}")
+        self.out_dir = out_dir
+        self.windows_dir = os.path.join(out_dir, "windows")
+        self.checkpoint_path = os.path.join(out_dir, "checkpoint.json")
+        self.output_path = os.path.join(out_dir, "results.jsonl.gz")
+        self.base_url = base_url
+        self.window_days = window_days
+        self.workers = workers
+        self.executor = executor
+        # Each worker has its own client; split the request rate between them
+        self.client_options = dict(client_options or {"rate": 2.0, "per_host_limit": 1})
+        self._lock = threading.Lock()
+        os.makedirs(self.windows_dir, exist_ok=True)
+        self.checkpoint = self._load_checkpoint()
+
+    # ------------------------------------------------------------------
+    # Checkpoint
+    # ------------------------------------------------------------------
+
+    def _load_checkpoint(self) -> Dict[str, Any]:
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"windows": {}}
+
+    def _save_checkpoint(self):
+        _write_atomic(self.checkpoint_path, json.dumps(self.checkpoint, indent=1, sort_keys=True).encode("utf-8"))
+
+    def is_done(self, start: date, end: date) -> bool:
+        key = f"{start}_{end}"
+        return key in self.checkpoint["windows"] and os.path.exists(self._part_path(key))
+
+    def _part_path(self, key: str) -> str:
+        return os.path.join(self.windows_dir, f"{key}.jsonl.gz")
+
+    def _record(self, result: WindowResult):
+        with self._lock:
+            self.checkpoint["windows"][result.key] = {
+                "pages": result.pages,
+                "matches": result.matches,
+                "duplicates": result.duplicates,
+            }
+            self._save_checkpoint()
+
+    # ------------------------------------------------------------------
+    # Crawl and merge
+    # ------------------------------------------------------------------
+
+    def _pool(self) -> Executor:
+        if self.executor == "process":
+            return ProcessPoolExecutor(max_workers=self.workers)
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+    def run(self, start: date, end: date, archive_path: Optional[str] = None) -> BackfillReport:
+        report = BackfillReport()
+        started = time.perf_counter()
+        windows = date_windows(start, end, self.window_days)
+        pending = [w for w in windows if not self.is_done(*w)]
+        report.windows = len(windows)
+        report.skipped = len(windows) - len(pending)
+
+        with self._pool() as pool:
+            futures = [
+                pool.submit(crawl_window, self.base_url, window_start, window_end,
+                            self.windows_dir, self.client_options)
+                for window_start, window_end in pending
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                if result.error:
+                    report.failed += 1
+                    report.errors.append(f"{result.key}: {result.error}")
+                    print(f"Window {result.key} failed: {result.error}")
+                    continue
+                self._record(result)
+                report.pages += result.pages
+                report.matches += result.matches
+                print(f"Window {result.key}: {result.matches} matches from {result.pages} pages "
+                      f"in {result.seconds:.1f}s")
+
+        report.unique_matches = self.merge(windows)
+        if archive_path:
+            report.archived = self.archive(archive_path)
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def merge(self, windows: List[Tuple[date, date]]) -> int:
+        """Merge the finished windows into one file, oldest first, deduplicated by match id"""
+        seen = set()
+        tmp_path = f"{self.output_path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as out:
+            for window_start, window_end in reversed(windows):
+                path = self._part_path(f"{window_start}_{window_end}")
+                if not os.path.exists(path):
+                    continue
+                for match in sorted(read_matches(path), key=lambda m: m.get("start_time") or ""):
+                    if match["id"] in seen:
+                        continue
+                    seen.add(match["id"])
+                    out.write(json.dumps(match, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.output_path)
+        return len(seen)
+
+    def archive(self, archive_path: str, batch_size: int = 5000) -> int:
+        """Append the merged results to the match archive (known ids are ignored)"""
+        from app.services.match_archive import MatchArchive
+
+        archive = MatchArchive(archive_path)
+        added = 0
+        batch = []
+        for match in read_matches(self.output_path):
+            batch.append(match)
+            if len(batch) >= batch_size:
+                added += archive.append(batch)
+                batch = []
+        added += archive.append(batch)
+        return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill historical HLTV results")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, required=True, help="first day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=date.today(), help="last day, inclusive")
+    parser.add_argument("--out", default="backfill", help="output and checkpoint directory")
+    parser.add_argument("--base-url", default=os.getenv("HLTV_BASE_URL", "https://www.hltv.org"))
+    parser.add_argument("--window-days", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread",
+                        help="process pools also spread HTML parsing over CPU cores")
+    parser.add_argument("--rate", type=float, default=2.0, help="requests/sec per worker")
+    parser.add_argument("--archive", help="append the results to this match archive")
+    args = parser.parse_args()
+
+    backfill = Backfill(
+        args.out,
+        base_url=args.base_url,
+        window_days=args.window_days,
+        workers=args.workers,
+        executor=args.executor,
+        client_options={"rate": args.rate, "per_host_limit": 1},
+    )
+    report = backfill.run(args.start, args.end, archive_path=args.archive)
+    print(json.dumps(asdict(report), indent=1))
+    if report.failed:
+        raise SystemExit(f"{report.failed} window(s) failed; run again to resume")
+
+
+if __name__ == "__main__":
+    main()
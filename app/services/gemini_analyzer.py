@@ -0,0 +1,461 @@
+"""
+Gemini match analyses: batched prompts, persistent cache, coalescing and a budget
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.services.analysis_cache import match_fingerprint
+from app.services.serialization import dumps, loads
+
+DEFAULT_API_URL = "https://generativelanguage.googleapis.com"
+DEFAULT_MODEL = "gemini-2.5-flash"
+# Bumped when the prompt or the answer format changes; part of every cache key
+PROMPT_VERSION = 1
+RISK_LEVELS = ("Low", "Medium", "High")
+# Rough prompt size estimate before the API reports the real usage
+CHARS_PER_TOKEN = 4
+
+PROMPT = """You are a CS2 esports analyst. For every match below, predict the series winner.
+Use the Elo ratings and model probability as a baseline and adjust for form, head-to-head
+record, map pool, live score and bookmaker odds. Answer with a JSON array, one object per
+match, in the same order:
+{{"match_id": str, "winner": one of the two team names, "confidence": number 50-100,
+"risk_level": "Low" | "Medium" | "High", "reasoning": one or two sentences,
+"key_factors": [up to 3 short strings]}}
+
+MATCHES:
+{matches}
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    key TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    body BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_analyses_created_at ON analyses (created_at);
+"""
+
+
+class AnalysisDiskCache:
+    """Model answers keyed on the fingerprint of their input, in SQLite.
+
+    Survives restarts and is shared by all workers (WAL mode); entries
+    expire after ``ttl`` seconds and the oldest are dropped past ``max_rows``.
+    """
+
+    def __init__(self, path: str = "gemini_cache.db", ttl: float = 7 * 86400, max_rows: int = 100_000):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body FROM analyses WHERE key = ? AND created_at > ?", (key, time.time() - self.ttl)
+            ).fetchone()
+        return loads(row[0]) if row is not None else None
+
+    def put_many(self, items: Dict[str, Dict[str, Any]]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO analyses (key, created_at, body) VALUES (?, ?, ?)",
+                [(key, now, dumps(value)) for key, value in items.items()],
+            )
+            self._writes += len(items)
+            if self._writes >= 1000:
+                self._writes = 0
+                self._prune(now)
+
+    def _prune(self, now: float):
+        self._conn.execute("DELETE FROM analyses WHERE created_at <= ?", (now - self.ttl,))
+        self._conn.execute(
+            "DELETE FROM analyses WHERE key IN "
+            "(SELECT key FROM analyses ORDER BY created_at DESC LIMIT -1 OFFSET ?)", (self.max_rows,)
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TokenBudget:
+    """Requests and tokens per minute (sliding window), plus an optional daily token cap.
+
+    :meth:`reserve` never waits: a request that does not fit is refused, and
+    the caller answers from the numeric model instead.
+    """
+
+    def __init__(self, requests_per_minute: int = 10, tokens_per_minute: int = 250_000,
+                 tokens_per_day: Optional[int] = None):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.tokens_per_day = tokens_per_day
+        self._window: deque = deque()
+        self._window_tokens = 0
+        self._day = date.today()
+        self._day_tokens = 0
+        self._blocked_until = 0.0
+        self.refused = 0
+
+    def _expire(self, now: float):
+        window = self._window
+        while window and window[0][0] <= now - 60.0:
+            self._window_tokens -= window.popleft()[1]
+        if date.today() != self._day:
+            self._day, self._day_tokens = date.today(), 0
+
+    def reserve(self, tokens: int) -> Optional[List]:
+        """Book one request of ``tokens`` estimated tokens; None if over budget"""
+        now = time.monotonic()
+        self._expire(now)
+        if (
+            now < self._blocked_until
+            or len(self._window) >= self.requests_per_minute
+            or self._window_tokens + tokens > self.tokens_per_minute
+            or (self.tokens_per_day is not None and self._day_tokens + tokens > self.tokens_per_day)
+        ):
+            self.refused += 1
+            return None
+        reservation = [now, tokens]
+        self._window.append(reservation)
+        self._window_tokens += tokens
+        self._day_tokens += tokens
+        return reservation
+
+    def settle(self, reservation: List, actual: int):
+        """Replace a reservation's estimate with the usage the API reported"""
+        delta = actual - reservation[1]
+        reservation[1] = actual
+        if self._window and reservation[0] >= self._window[0][0]:
+            self._window_tokens += delta
+        self._day_tokens += delta
+
+    def cool_down(self, seconds: float):
+        """Refuse everything for a while (after a 429 from the API)"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        self._expire(time.monotonic())
+        return {
+            "requests_last_minute": len(self._window),
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_last_minute": self._window_tokens,
+            "tokens_per_minute": self.tokens_per_minute,
+            "tokens_today": self._day_tokens,
+            "tokens_per_day": self.tokens_per_day,
+            "refused": self.refused,
+        }
+
+
+@dataclass
+class _Pending:
+    match_id: str
+    key: str
+    block: Dict[str, Any]
+    future: asyncio.Future
+
+
+def match_block(match_id: str, match: Dict[str, Any], analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """What the model sees of one match: its state and the numeric analysis"""
+    team1, team2 = match["team1"]["name"], match["team2"]["name"]
+    prediction = analysis["prediction"]
+    stats = analysis["team_stats"]
+
+    def team(name: str, odds_key: str) -> Dict[str, Any]:
+        team_stats = stats.get(name, {})
+        return {
+            "name": name,
+            "recent_form": team_stats.get("recent_form"),
+            "head_to_head": team_stats.get("head_to_head"),
+            "map_pool_strength": team_stats.get("map_pool_strength"),
+            "best_maps": dict(list((team_stats.get("map_win_rates") or {}).items())[:3]),
+            "odds": match.get(odds_key),
+        }
+
+    return {
+        "match_id": match_id,
+        "event": match.get("tournament"),
+        "format": match.get("format"),
+        "status": match.get("status"),
+        "maps_score": match.get("maps_score"),
+        "current_map": match.get("current_map"),
+        "rounds_score": match.get("rounds_score"),
+        "team1": team(team1, "odds_team1"),
+        "team2": team(team2, "odds_team2"),
+        "model_favorite": prediction["winner"],
+        "model_confidence": prediction["confidence"],
+        "model_reasoning": prediction["reasoning"],
+    }
+
+
+def _validate(item: Any, block: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """A well-formed answer for ``block``, or None"""
+    if not isinstance(item, dict):
+        return None
+    teams = (block["team1"]["name"], block["team2"]["name"])
+    winner = item.get("winner")
+    if winner not in teams:
+        return None
+    try:
+        confidence = min(100.0, max(50.0, float(item.get("confidence"))))
+    except (TypeError, ValueError):
+        return None
+    risk_level = item.get("risk_level")
+    if risk_level not in RISK_LEVELS:
+        risk_level = "Low" if confidence >= 65 else "Medium" if confidence >= 55 else "High"
+    factors = item.get("key_factors") or []
+    return {
+        "winner": winner,
+        "confidence": round(confidence, 1),
+        "risk_level": risk_level,
+        "reasoning": str(item.get("reasoning") or "")[:600],
+        "key_factors": [str(factor)[:120] for factor in factors[:3]] if isinstance(factors, list) else [],
+    }
+
+
+class GeminiAnalyzer:
+    """Gemini-written match analyses at a bounded cost.
+
+    - Batching: requests arriving within ``batch_window`` seconds are sent as
+      one prompt of up to ``batch_size`` matches.
+    - Cache: answers are stored on disk keyed on the match fingerprint (the
+      exact per-match input, the model and the prompt version), so a match
+      whose state did not change is never sent again, by any worker.
+    - Coalescing: concurrent requests for the same fingerprint share one
+      pending answer.
+    - Budget: requests and tokens per minute (and per day); batches that do
+      not fit, API errors and malformed answers resolve to None and the
+      caller keeps the numeric prediction.
+
+    Disabled (every call returns None) without GEMINI_API_KEY.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model: Optional[str] = None,
+        base_url: Optional[str] = None,
+        cache_path: Optional[str] = None,
+        batch_size: int = 8,
+        batch_window: float = 0.05,
+        max_output_tokens: int = 256,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        tokens_per_day: Optional[int] = None,
+        timeout: float = 60.0,
+    ):
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+        self.model = model or os.getenv("GEMINI_MODEL", DEFAULT_MODEL)
+        self.base_url = (base_url or os.getenv("GEMINI_API_URL", DEFAULT_API_URL)).rstrip("/")
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.max_output_tokens = max_output_tokens
+        self.timeout = timeout
+        daily = tokens_per_day or os.getenv("GEMINI_TOKENS_PER_DAY")
+        self.budget = TokenBudget(
+            requests_per_minute or int(os.getenv("GEMINI_RPM", "10")),
+            tokens_per_minute or int(os.getenv("GEMINI_TPM", "250000")),
+            int(daily) if daily else None,
+        )
+        self.cache = AnalysisDiskCache(cache_path or os.getenv("GEMINI_CACHE_PATH", "gemini_cache.db"))
+        self._client: Optional[httpx.AsyncClient] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._queue: List[_Pending] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self.calls = 0
+        self.analyzed = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.fallbacks = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.api_key)
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for task in list(self._tasks):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    async def analyze(self, match_id: str, match: Dict[str, Any], analysis: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Model answer for one match (see _validate), or None to keep the numeric prediction"""
+        if not self.enabled:
+            return None
+        block = match_block(match_id, match, analysis)
+        key = match_fingerprint(match, match_id, self.model, PROMPT_VERSION, json.dumps(block, sort_keys=True))
+        future = self._inflight.get(key)
+        if future is None:
+            # SQLite read off the event loop
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            # Another request may have queued the same key meanwhile
+            future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = self._inflight[key] = asyncio.get_running_loop().create_future()
+            self._queue.append(_Pending(match_id, key, block, future))
+            self._schedule()
+        # shield: a cancelled request must not cancel the answer others wait for
+        return await asyncio.shield(future)
+
+    def _schedule(self):
+        if len(self._queue) >= self.batch_size:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._spawn_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.batch_window, self._spawn_flush)
+
+    def _spawn_flush(self):
+        self._timer = None
+        while self._queue:
+            # Answers come back per match id, so one batch holds each match once;
+            # another state of the same match waits for the next batch
+            batch, rest, seen = [], [], set()
+            for pending in self._queue:
+                if len(batch) < self.batch_size and pending.match_id not in seen:
+                    seen.add(pending.match_id)
+                    batch.append(pending)
+                else:
+                    rest.append(pending)
+            self._queue = rest
+            task = asyncio.ensure_future(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, batch: List[_Pending]):
+        results: Dict[str, Dict[str, Any]] = {}
+        try:
+            results = await self._generate(batch)
+        except Exception as e:
+            self.errors += 1
+            print(f"Gemini analysis failed: {e}")
+        finally:
+            fresh = {}
+            for pending in batch:
+                result = results.get(pending.match_id)
+                if result is not None:
+                    fresh[pending.key] = result
+                else:
+                    self.fallbacks += 1
+                if not pending.future.done():
+                    pending.future.set_result(result)
+                self._inflight.pop(pending.key, None)
+            self.analyzed += len(fresh)
+            try:
+                self.cache.put_many(fresh)
+            except sqlite3.Error as e:
+                print(f"Error caching Gemini analyses: {e}")
+
+    async def _generate(self, batch: List[_Pending]) -> Dict[str, Dict[str, Any]]:
+        """One generateContent call for the batch; {} when the budget refuses it"""
+        prompt = PROMPT.format(matches="\n".join(json.dumps(p.block, ensure_ascii=False) for p in batch))
+        output_tokens = self.max_output_tokens * len(batch)
+        estimate = len(prompt) // CHARS_PER_TOKEN + output_tokens
+        reservation = self.budget.reserve(estimate)
+        if reservation is None:
+            return {}
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+        self.calls += 1
+        response = await self._client.post(
+            f"{self.base_url}/v1beta/models/{self.model}:generateContent",
+            headers={"x-goog-api-key": self.api_key},
+            json={
+                "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                "generationConfig": {
+                    "temperature": 0.2,
+                    "maxOutputTokens": output_tokens,
+                    "responseMimeType": "application/json",
+                },
+            },
+        )
+        if response.status_code == 429:
+            retry_after = response.headers.get("Retry-After")
+            self.budget.cool_down(float(retry_after) if retry_after and retry_after.isdigit() else 30.0)
+            self.errors += 1
+            print("Gemini rate limit hit, using the numeric predictor")
+            return {}
+        response.raise_for_status()
+        body = response.json()
+
+        usage = body.get("usageMetadata") or {}
+        if usage.get("totalTokenCount"):
+            self.budget.settle(reservation, int(usage["totalTokenCount"]))
+        self.prompt_tokens += int(usage.get("promptTokenCount") or 0)
+        self.output_tokens += int(usage.get("candidatesTokenCount") or 0)
+
+        parts = (body.get("candidates") or [{}])[0].get("content", {}).get("parts") or []
+        answer = json.loads("".join(part.get("text", "") for part in parts) or "[]")
+        if isinstance(answer, dict):
+            answer = answer.get("matches") or [answer]
+        blocks = {p.match_id: p.block for p in batch}
+        results = {}
+        for item in answer if isinstance(answer, list) else []:
+            match_id = str(item.get("match_id")) if isinstance(item, dict) else None
+            if match_id in blocks:
+                result = _validate(item, blocks[match_id])
+                if result is not None:
+                    results[match_id] = result
+        return results
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "model": self.model,
+            "calls": self.calls,
+            "analyzed": self.analyzed,
+            "cache_hits": self.hits,
+            "coalesced": self.coalesced,
+            "fallbacks": self.fallbacks,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "output_tokens": self.output_tokens,
+            "budget": self.budget.stats(),
+        }
@@ -0,0 +1,391 @@
+"""
+Columnar match history (NumPy memmap segments with a per-team row index)
+
+Usage (build or catch up from the match archive):
+    python -m app.services.history_store --archive match_archive.db --path match_history
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.match_archive import MatchArchive
+from app.services.rating_engine import map_key, result_from_match
+
+# Column dtypes. Every finished series gives two "series" rows (one per team,
+# from that team's point of view) and every played map two "maps" rows.
+SERIES_COLUMNS = {
+    "team": np.int32,
+    "opponent": np.int32,
+    "time": np.int64,        # unix seconds
+    "score": np.float32,     # 1 win, 0.5 draw, 0 loss
+    "maps_for": np.int16,
+    "maps_against": np.int16,
+}
+MAPS_COLUMNS = {
+    "team": np.int32,
+    "opponent": np.int32,
+    "time": np.int64,
+    "map": np.int16,
+    "score": np.float32,
+    "rounds_for": np.int16,
+    "rounds_against": np.int16,
+}
+TABLES = {"series": SERIES_COLUMNS, "maps": MAPS_COLUMNS}
+
+
+def _pair(value) -> Optional[Tuple[int, int]]:
+    try:
+        a, b = str(value).split(":")
+        return int(a), int(b)
+    except (TypeError, ValueError):
+        return None
+
+
+def _empty(columns: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    return {name: np.empty(0, dtype=dtype) for name, dtype in columns.items()}
+
+
+@dataclass
+class Segment:
+    """One immutable partition: both tables sorted by (team, time), plus their row index"""
+    name: str
+    series: Dict[str, np.ndarray]
+    maps: Dict[str, np.ndarray]
+    # CSR row index: rows of team t are [ptr[t], ptr[t + 1]); teams added later are absent
+    series_ptr: np.ndarray
+    maps_ptr: np.ndarray
+
+    def rows(self, table: str, team: int) -> Tuple[int, int]:
+        ptr = self.series_ptr if table == "series" else self.maps_ptr
+        if team + 1 >= len(ptr):
+            return 0, 0
+        return int(ptr[team]), int(ptr[team + 1])
+
+    def slice(self, table: str, team: int, columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+        """Zero-copy views of one team's rows (of all columns, or of ``columns``)"""
+        start, end = self.rows(table, team)
+        data = getattr(self, table)
+        return {name: data[name][start:end] for name in (columns or data)}
+
+
+class HistoryStore:
+    """Append-only columnar history of finished matches for per-team analytics.
+
+    Data lives in ``path`` as segments: directories of ``.npy`` column files,
+    opened with ``mmap_mode="r"`` so reads are zero-copy and the OS page cache
+    is shared between workers. Inside a segment both tables are sorted by
+    (team, time), and a CSR pointer array maps each team id to its row range;
+    a team's history in a segment is therefore a slice, and per-team or
+    per-pair aggregates are vectorized operations over that slice.
+
+    Each append writes a new small segment; once there are more than
+    ``max_segments``, all of them are merged into one (an LSM-style
+    compaction). ``meta.json`` lists the live segments, the team and map
+    vocabularies and the archive watermark, and is replaced atomically, so
+    readers in other processes pick up changes with :meth:`refresh`.
+    Segments are never modified in place.
+    """
+
+    def __init__(self, path: str = "match_history", max_segments: int = 16):
+        self.path = path
+        self.max_segments = max_segments
+        self._lock = threading.RLock()
+        self.team_index: Dict[str, int] = {}
+        self.map_index: Dict[str, int] = {}
+        self.watermark = 0
+        self.segments: List[Segment] = []
+        self._next_segment = 1
+        self._meta_version: Optional[Tuple[int, int]] = None
+        os.makedirs(path, exist_ok=True)
+        self.refresh()
+
+    # ------------------------------------------------------------------
+    # Metadata and segments
+    # ------------------------------------------------------------------
+
+    @property
+    def meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    def _stat_meta(self) -> Tuple[int, int]:
+        # meta.json is replaced, never rewritten: a new inode means new content
+        stat = os.stat(self.meta_path)
+        return stat.st_ino, stat.st_mtime_ns
+
+    def refresh(self) -> bool:
+        """Reload the metadata and segments if another process changed them"""
+        try:
+            version = self._stat_meta()
+        except OSError:
+            return False
+        with self._lock:
+            if version == self._meta_version:
+                return False
+            with open(self.meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            loaded = {segment.name: segment for segment in self.segments}
+            self.segments = [loaded.get(name) or self._open_segment(name) for name in meta["segments"]]
+            self.team_index = {name: i for i, name in enumerate(meta["teams"])}
+            self.map_index = {name: i for i, name in enumerate(meta["maps"])}
+            self.watermark = meta["watermark"]
+            self._next_segment = meta["next_segment"]
+            self._meta_version = version
+            return True
+
+    def _save_meta(self):
+        meta = {
+            "segments": [segment.name for segment in self.segments],
+            "teams": list(self.team_index),
+            "maps": list(self.map_index),
+            "watermark": self.watermark,
+            "next_segment": self._next_segment,
+        }
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+        self._meta_version = self._stat_meta()
+
+    def _open_segment(self, name: str) -> Segment:
+        directory = os.path.join(self.path, name)
+
+        def load(file):
+            # Plain ndarray views of the memmaps: still zero-copy, but slicing
+            # them skips np.memmap's per-slice bookkeeping
+            return np.asarray(np.load(os.path.join(directory, f"{file}.npy"), mmap_mode="r"))
+
+        return Segment(
+            name=name,
+            series={column: load(f"series.{column}") for column in SERIES_COLUMNS},
+            maps={column: load(f"maps.{column}") for column in MAPS_COLUMNS},
+            series_ptr=load("series.ptr"),
+            maps_ptr=load("maps.ptr"),
+        )
+
+    def _write_segment(self, tables: Dict[str, Dict[str, np.ndarray]]) -> Segment:
+        """Sort, index and write a new segment; returns it memory-mapped"""
+        name = f"seg-{self._next_segment:06d}"
+        self._next_segment += 1
+        directory = os.path.join(self.path, name)
+        tmp_directory = f"{directory}.tmp"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+        n_teams = len(self.team_index)
+        for table, columns in tables.items():
+            order = np.lexsort((columns["time"], columns["team"]))
+            for column, dtype in TABLES[table].items():
+                np.save(os.path.join(tmp_directory, f"{table}.{column}.npy"), columns[column][order].astype(dtype))
+            counts = np.bincount(columns["team"], minlength=n_teams)
+            ptr = np.zeros(n_teams + 1, dtype=np.int64)
+            np.cumsum(counts, out=ptr[1:])
+            np.save(os.path.join(tmp_directory, f"{table}.ptr.npy"), ptr)
+        # A crash before _save_meta leaves this name behind, unreferenced by
+        # the metadata; os.replace cannot overwrite a non-empty directory
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_directory, directory)
+        return self._open_segment(name)
+
+    def _drop_segments(self, names: Iterable[str]):
+        # Readers that still map the old files keep them until they unmap
+        for name in names:
+            shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _team(self, name: str) -> int:
+        index = self.team_index.get(name)
+        if index is None:
+            index = self.team_index[name] = len(self.team_index)
+        return index
+
+    def _map(self, name: str) -> int:
+        index = self.map_index.get(name)
+        if index is None:
+            index = self.map_index[name] = len(self.map_index)
+        return index
+
+    def _rows(self, matches: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, np.ndarray]]:
+        """Both tables' columns, from each team's point of view"""
+        series = {name: [] for name in SERIES_COLUMNS}
+        maps = {name: [] for name in MAPS_COLUMNS}
+        for match in matches:
+            result = result_from_match(match)
+            if result is None:
+                continue
+            t1, t2 = self._team(result.team1), self._team(result.team2)
+            played_at = int(result.played_at)
+            played = [
+                (map_key(m["name"]), m["team1_score"], m["team2_score"])
+                for m in match.get("maps") or ()
+                if m.get("name") and m.get("team1_score") is not None and m.get("team2_score") is not None
+            ]
+            maps_score = _pair(match.get("maps_score"))
+            if maps_score is None:
+                maps_score = (sum(a > b for _, a, b in played), sum(b > a for _, a, b in played))
+            for team, opponent, score, won, lost in (
+                (t1, t2, result.score, maps_score[0], maps_score[1]),
+                (t2, t1, 1.0 - result.score, maps_score[1], maps_score[0]),
+            ):
+                series["team"].append(team)
+                series["opponent"].append(opponent)
+                series["time"].append(played_at)
+                series["score"].append(score)
+                series["maps_for"].append(won)
+                series["maps_against"].append(lost)
+            for map_name, a, b in played:
+                map_id = self._map(map_name)
+                for team, opponent, rounds_for, rounds_against in ((t1, t2, a, b), (t2, t1, b, a)):
+                    maps["team"].append(team)
+                    maps["opponent"].append(opponent)
+                    maps["time"].append(played_at)
+                    maps["map"].append(map_id)
+                    maps["score"].append(1.0 if rounds_for > rounds_against else 0.0 if rounds_for < rounds_against else 0.5)
+                    maps["rounds_for"].append(rounds_for)
+                    maps["rounds_against"].append(rounds_against)
+        return {
+            "series": {name: np.asarray(values, dtype=SERIES_COLUMNS[name]) for name, values in series.items()},
+            "maps": {name: np.asarray(values, dtype=MAPS_COLUMNS[name]) for name, values in maps.items()},
+        }
+
+    def append(self, matches: Iterable[Dict[str, Any]], watermark: Optional[int] = None) -> int:
+        """Add finished matches as a new segment; returns the number of series added"""
+        with self._lock:
+            tables = self._rows(matches)
+            added = len(tables["series"]["team"]) // 2
+            if added:
+                self.segments.append(self._write_segment(tables))
+            if watermark is not None:
+                self.watermark = watermark
+            if added or watermark is not None:
+                self._save_meta()
+            if len(self.segments) > self.max_segments:
+                self.compact()
+            return added
+
+    def sync(self, archive: MatchArchive, batch_size: int = 50_000) -> int:
+        """Append archive rows past the watermark"""
+        added = 0
+        batch, last_seq = [], self.watermark
+        for last_seq, match in archive.iter_since(self.watermark):
+            batch.append(match)
+            if len(batch) >= batch_size:
+                added += self.append(batch, watermark=last_seq)
+                batch = []
+        if batch or last_seq != self.watermark:
+            added += self.append(batch, watermark=last_seq)
+        return added
+
+    def rebuild(self, archive: MatchArchive) -> int:
+        """Drop everything and re-read the whole archive"""
+        with self._lock:
+            old = [segment.name for segment in self.segments]
+            self.segments = []
+            self.team_index, self.map_index = {}, {}
+            self.watermark = 0
+            self._save_meta()
+            self._drop_segments(old)
+            return self.sync(archive)
+
+    def compact(self):
+        """Merge all segments into one"""
+        with self._lock:
+            if len(self.segments) <= 1:
+                return
+            tables = {
+                table: {
+                    column: np.concatenate([getattr(segment, table)[column] for segment in self.segments])
+                    for column in TABLES[table]
+                }
+                for table in TABLES
+            }
+            old = [segment.name for segment in self.segments]
+            self.segments = [self._write_segment(tables)]
+            self._save_meta()
+            self._drop_segments(old)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return sum(len(segment.series["team"]) for segment in self.segments) // 2
+
+    def team_id(self, name: str) -> Optional[int]:
+        return self.team_index.get(name)
+
+    def team_rows(
+        self, team: str, table: str = "series", columns: Optional[Iterable[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """A team's rows of ``table`` ("series" or "maps"), oldest first.
+
+        With a single segment (the usual state after compaction) the arrays
+        are views into the memory-mapped columns.
+        """
+        columns = list(columns or TABLES[table])
+        index = self.team_index.get(team)
+        segments = self.segments
+        if index is None or not segments:
+            return _empty({column: TABLES[table][column] for column in columns})
+        if len(segments) == 1:
+            return segments[0].slice(table, index, columns)
+        parts = [segment.slice(table, index, set(columns) | {"time"}) for segment in segments]
+        order = np.argsort(np.concatenate([part["time"] for part in parts]), kind="stable")
+        return {column: np.concatenate([part[column] for part in parts])[order] for column in columns}
+
+    def head_to_head(self, team: str, opponent: str) -> Tuple[int, int, int]:
+        """(wins, draws, losses) of ``team`` against ``opponent``"""
+        opponent_id = self.team_index.get(opponent)
+        if opponent_id is None:
+            return 0, 0, 0
+        wins = draws = played = 0
+        index = self.team_index.get(team)
+        for segment in self.segments if index is not None else ():
+            rows = segment.slice("series", index, ("opponent", "score"))
+            scores = rows["score"][rows["opponent"] == opponent_id]
+            played += len(scores)
+            wins += int(np.count_nonzero(scores == 1.0))
+            draws += int(np.count_nonzero(scores == 0.5))
+        return wins, draws, played - wins - draws
+
+    def form(self, team: str, last: int = 10) -> Optional[float]:
+        """Share of points won in the team's last ``last`` series; None without history"""
+        scores = self.team_rows(team, columns=("score",))["score"][-last:]
+        return float(scores.mean()) if len(scores) else None
+
+    def map_stats(self, team: str) -> Dict[str, Tuple[int, float]]:
+        """Map name -> (maps played, share of points won)"""
+        rows = self.team_rows(team, "maps", ("map", "score"))
+        if not len(rows["map"]):
+            return {}
+        n_maps = len(self.map_index)
+        played = np.bincount(rows["map"], minlength=n_maps)
+        won = np.bincount(rows["map"], weights=rows["score"], minlength=n_maps)
+        names = list(self.map_index)
+        return {names[i]: (int(played[i]), float(won[i] / played[i])) for i in np.flatnonzero(played)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the columnar match history from the archive")
+    parser.add_argument("--archive", default=os.getenv("ARCHIVE_DB_PATH", "match_archive.db"))
+    parser.add_argument("--path", default=os.getenv("HISTORY_STORE_PATH", "match_history"))
+    parser.add_argument("--rebuild", action="store_true", help="re-read the whole archive")
+    args = parser.parse_args()
+
+    store = HistoryStore(args.path)
+    archive = MatchArchive(args.archive)
+    added = store.rebuild(archive) if args.rebuild else store.sync(archive)
+    store.compact()
+    print(f"Added {added} matches; {len(store)} matches of {len(store.team_index)} teams "
+          f"(watermark {store.watermark})")
+
+
+if __name__ == "__main__":
+    main()
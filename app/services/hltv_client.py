@@ -0,0 +1,164 @@
+"""
+Async HTTP fetch layer for HLTV pages
+"""
+import asyncio
+import random
+import time
+from typing import Dict, Iterable, Optional, Union
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Token-bucket rate limiter: ``rate`` requests/sec with bursts up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class FetchError(Exception):
+    """Raised when a page could not be fetched after all retries"""
+
+    def __init__(self, url: str, reason: str):
+        super().__init__(f"{url}: {reason}")
+        self.url = url
+        self.reason = reason
+
+
+class HLTVClient:
+    """Pooled keep-alive client for HLTV.
+
+    A single ``httpx.AsyncClient`` is shared by all requests. Concurrency is
+    bounded per host, the overall request rate goes through a token bucket and
+    failed requests (transport errors, 429 and 5xx) are retried with jittered
+    exponential backoff. The client must be used from one event loop.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "https://www.hltv.org",
+        headers: Optional[Dict[str, str]] = None,
+        per_host_limit: int = 4,
+        max_connections: int = 20,
+        rate: float = 5.0,
+        burst: Optional[float] = None,
+        retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+        timeout: float = 15.0,
+    ):
+        self.base_url = base_url
+        self.headers = headers or {}
+        self.per_host_limit = per_host_limit
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.rate_limiter = TokenBucket(rate, burst)
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def url(self, path: str) -> str:
+        return urljoin(self.base_url, path)
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def fetch(self, path: str) -> str:
+        """Fetch one page and return its HTML"""
+        url = self.url(path)
+        reason = "no attempts made"
+        for attempt in range(self.retries + 1):
+            retry_after = None
+            async with self._host_limit(url):
+                await self.rate_limiter.acquire()
+                try:
+                    response = await self.client.get(url)
+                except httpx.TransportError as e:
+                    reason = f"{type(e).__name__}: {e}"
+                else:
+                    if response.status_code == 200:
+                        return response.text
+                    reason = f"HTTP {response.status_code}"
+                    if response.status_code not in RETRY_STATUSES:
+                        break
+                    retry_after = response.headers.get("Retry-After")
+            if attempt < self.retries:
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+        raise FetchError(url, reason)
+
+    async def fetch_many(self, paths: Iterable[str]) -> Dict[str, Union[str, FetchError]]:
+        """Fetch pages in parallel; failed pages map to their FetchError"""
+        paths = list(dict.fromkeys(paths))
+        results = await asyncio.gather(*(self.fetch(p) for p in paths), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, FetchError):
+                raise result
+        return dict(zip(paths, results))
+
+    async def fetch_matches_page(self) -> str:
+        return await self.fetch("/matches")
+
+    async def fetch_pages(
+        self,
+        match_paths: Iterable[str] = (),
+        team_paths: Iterable[str] = (),
+    ) -> Dict[str, Union[str, FetchError]]:
+        """Fetch the matches page together with match and team pages"""
+        return await self.fetch_many(["/matches", *match_paths, *team_paths])
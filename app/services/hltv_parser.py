@@ -0,0 +1,349 @@
+"""
+HTML parsing for HLTV match listings and match pages
+"""
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    PARSER_BACKEND = "lxml"
+except ImportError:
+    PARSER_BACKEND = "html.parser"
+
+# Only these containers are built into the tree; the rest of the page
+# (navigation, news, rankings sidebar) is skipped by the tokenizer.
+MATCHES_STRAINER = SoupStrainer(
+    "div", attrs={"class": ["liveMatch-container", "upcomingMatch"]}
+)
+MATCH_PAGE_STRAINER = SoupStrainer(
+    "div", attrs={"class": ["teamsBox", "maps", "head-to-head"]}
+)
+RESULTS_STRAINER = SoupStrainer(
+    "div", attrs={"class": ["result-con", "pagination-component"]}
+)
+
+MATCH_URL_RE = re.compile(r"/matches/(\d+)/")
+TEAM_URL_RE = re.compile(r"/team/(\d+)/")
+BEST_OF_RE = re.compile(r"Best of (\d+)", re.IGNORECASE)
+OFFSET_RE = re.compile(r"[?&]offset=(\d+)")
+
+
+@dataclass
+class MatchListing:
+    """One row of the HLTV matches page"""
+    hltv_id: str
+    url: str
+    team1: str
+    team2: str
+    tournament: str
+    format: str
+    status: str
+    team1_id: Optional[str] = None
+    team2_id: Optional[str] = None
+    start_time: Optional[datetime] = None
+    maps_score: Optional[str] = None
+    rounds_score: Optional[str] = None
+    current_map: Optional[str] = None
+
+    def to_match(self) -> Dict[str, Any]:
+        """Convert to the match dict shape served by the backends"""
+        match = {
+            "id": self.hltv_id,
+            "team1": {"id": self.team1_id, "name": self.team1, "short_name": self.team1},
+            "team2": {"id": self.team2_id, "name": self.team2, "short_name": self.team2},
+            "tournament": self.tournament,
+            "start_time": (self.start_time or datetime.now()).isoformat(),
+            "format": self.format,
+            "status": self.status,
+            "url": self.url,
+        }
+        if self.status == "live":
+            match["maps_score"] = self.maps_score
+            match["rounds_score"] = self.rounds_score
+            match["current_map"] = self.current_map
+        return match
+
+
+@dataclass
+class ResultListing:
+    """One row of the HLTV results page"""
+    hltv_id: str
+    url: str
+    team1: str
+    team2: str
+    team1_score: int
+    team2_score: int
+    tournament: str
+    format: str
+    start_time: Optional[datetime] = None
+    # Map name for best-of-one results (their score is in rounds)
+    map_name: Optional[str] = None
+
+    @property
+    def winner(self) -> Optional[str]:
+        if self.team1_score == self.team2_score:
+            return None
+        return self.team1 if self.team1_score > self.team2_score else self.team2
+
+    def to_match(self) -> Dict[str, Any]:
+        """Convert to the finished-match dict shape kept in the archive"""
+        match = {
+            "id": self.hltv_id,
+            "team1": {"id": None, "name": self.team1, "short_name": self.team1},
+            "team2": {"id": None, "name": self.team2, "short_name": self.team2},
+            "tournament": self.tournament,
+            "start_time": self.start_time.isoformat() if self.start_time else None,
+            "format": self.format,
+            "status": "finished",
+            "winner": self.winner,
+            "url": self.url,
+        }
+        if self.map_name:
+            match["maps_score"] = f"{int(self.team1_score > self.team2_score)}:{int(self.team2_score > self.team1_score)}"
+            match["maps"] = [{"name": self.map_name, "team1_score": self.team1_score,
+                              "team2_score": self.team2_score}]
+        else:
+            match["maps_score"] = f"{self.team1_score}:{self.team2_score}"
+        return match
+
+
+@dataclass
+class MapResult:
+    name: str
+    team1_score: Optional[int]
+    team2_score: Optional[int]
+    state: str
+
+
+@dataclass
+class MatchDetail:
+    """Data from an HLTV match page"""
+    hltv_id: str
+    team1: str
+    team2: str
+    team1_id: Optional[str]
+    team2_id: Optional[str]
+    tournament: str
+    format: str
+    start_time: Optional[datetime]
+    maps: List[MapResult] = field(default_factory=list)
+    vetos: List[str] = field(default_factory=list)
+    head_to_head: Optional[Tuple[int, int]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _text(node) -> str:
+    return node.get_text(" ", strip=True) if node is not None else ""
+
+
+def _unix_ms(value) -> Optional[datetime]:
+    try:
+        return datetime.fromtimestamp(int(value) / 1000)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value: str) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _id_from(pattern, href: str) -> Optional[str]:
+    found = pattern.search(href or "")
+    return found.group(1) if found else None
+
+
+def _parse_live(container) -> Optional[MatchListing]:
+    link = container.select_one("a.match")
+    names = [_text(n) for n in container.select(".matchTeamName")]
+    if link is None or len(names) < 2:
+        return None
+    rounds = [_text(s) for s in container.select(".currentMapScore")]
+    maps = [_text(s) for s in container.select(".mapScore")]
+    map_node = container.select_one(".matchMap")
+    return MatchListing(
+        hltv_id=container.get("data-scorebot-id") or _id_from(MATCH_URL_RE, link["href"]),
+        url=link["href"],
+        team1=names[0],
+        team2=names[1],
+        team1_id=container.get("data-team1-id"),
+        team2_id=container.get("data-team2-id"),
+        tournament=_text(container.select_one(".matchEventName")),
+        format=_text(container.select_one(".matchMeta")).upper(),
+        status="live",
+        maps_score=":".join(maps) if len(maps) == 2 else None,
+        rounds_score=":".join(rounds) if len(rounds) == 2 else None,
+        current_map=(map_node.get("data-map") or _text(map_node)) if map_node is not None else None,
+    )
+
+
+def _parse_upcoming(container) -> Optional[MatchListing]:
+    link = container.select_one("a.match")
+    names = [_text(n) for n in container.select(".matchTeamName")]
+    if link is None or len(names) < 2:
+        return None
+    time_node = container.select_one(".matchTime")
+    return MatchListing(
+        hltv_id=_id_from(MATCH_URL_RE, link["href"]),
+        url=link["href"],
+        team1=names[0],
+        team2=names[1],
+        team1_id=container.get("team1"),
+        team2_id=container.get("team2"),
+        tournament=_text(container.select_one(".matchEventName")),
+        format=_text(container.select_one(".matchMeta")).upper(),
+        status="upcoming",
+        start_time=_unix_ms(time_node.get("data-unix")) if time_node is not None else None,
+    )
+
+
+def parse_matches_page(html: str) -> List[MatchListing]:
+    """Parse live and upcoming matches from the /matches page"""
+    soup = BeautifulSoup(html, PARSER_BACKEND, parse_only=MATCHES_STRAINER)
+    listings = []
+    for container in soup.find_all("div", class_=["liveMatch-container", "upcomingMatch"], recursive=False):
+        classes = container.get("class", [])
+        parser = _parse_live if "liveMatch-container" in classes else _parse_upcoming
+        listing = parser(container)
+        if listing is not None and listing.hltv_id:
+            listings.append(listing)
+    return listings
+
+
+def parse_match_page(html: str) -> Optional[MatchDetail]:
+    """Parse a /matches/<id>/<slug> page"""
+    soup = BeautifulSoup(html, PARSER_BACKEND, parse_only=MATCH_PAGE_STRAINER)
+    teams_box = soup.select_one(".teamsBox")
+    if teams_box is None:
+        return None
+
+    names = [_text(n) for n in teams_box.select(".teamName")]
+    team_links = [a["href"] for a in teams_box.select("a[href^='/team/']")]
+    team_ids = [_id_from(TEAM_URL_RE, href) for href in team_links] + [None, None]
+    time_node = teams_box.select_one(".time")
+    event = teams_box.select_one(".event a")
+
+    maps_box = soup.select_one(".maps")
+    best_of = BEST_OF_RE.search(_text(maps_box.select_one(".preformatted-text"))) if maps_box else None
+    maps = []
+    vetos = []
+    if maps_box is not None:
+        for holder in maps_box.select(".mapholder"):
+            scores = [_int(_text(s)) for s in holder.select(".results-team-score")] + [None, None]
+            results = holder.select_one(".results")
+            state = next((c for c in (results.get("class", []) if results else []) if c != "results"), "")
+            maps.append(MapResult(_text(holder.select_one(".mapname")), scores[0], scores[1], state))
+        vetos = [_text(v) for v in maps_box.select(".veto-box .padding > div")]
+
+    head_to_head = None
+    h2h = soup.select_one(".head-to-head")
+    if h2h is not None:
+        columns = h2h.select(".flexbox-column")
+        if len(columns) >= 3:
+            wins = [_int(_text(col.select(".bold")[-1])) for col in (columns[0], columns[-1])]
+            if None not in wins:
+                head_to_head = (wins[0], wins[1])
+
+    return MatchDetail(
+        hltv_id=teams_box.get("data-match-id") or "",
+        team1=names[0] if names else "",
+        team2=names[1] if len(names) > 1 else "",
+        team1_id=team_ids[0],
+        team2_id=team_ids[1],
+        tournament=(event.get("title") or _text(event)) if event is not None else "",
+        format=f"BO{best_of.group(1)}" if best_of else "",
+        start_time=_unix_ms(time_node.get("data-unix")) if time_node is not None else None,
+        maps=maps,
+        vetos=vetos,
+        head_to_head=head_to_head,
+    )
+
+
+def _parse_result(container) -> Optional[ResultListing]:
+    # find/find_all rather than CSS selectors: a results page has 100 rows
+    link = container.find("a", href=MATCH_URL_RE)
+    names = [_text(n) for n in container.find_all("div", class_="team")]
+    score_cell = container.find("td", class_="result-score")
+    scores = [_int(_text(s)) for s in score_cell.find_all("span")] if score_cell is not None else []
+    if link is None or len(names) < 2 or len(scores) < 2 or None in scores[:2]:
+        return None
+    map_text = _text(container.find("div", class_="map-text")).lower()
+    best_of = re.fullmatch(r"bo(\d+)", map_text)
+    return ResultListing(
+        hltv_id=_id_from(MATCH_URL_RE, link["href"]),
+        url=link["href"],
+        team1=names[0],
+        team2=names[1],
+        team1_score=scores[0],
+        team2_score=scores[1],
+        tournament=_text(container.find("span", class_="event-name")),
+        format=f"BO{best_of.group(1)}" if best_of else "BO1",
+        start_time=_unix_ms(container.get("data-zonedgrouping-entry-unix")),
+        map_name=None if best_of else map_text or None,
+    )
+
+
+def parse_results_page(html: str) -> Tuple[List[ResultListing], Optional[int]]:
+    """Parse a /results page: its results and the offset of the next page (None on the last)"""
+    soup = BeautifulSoup(html, PARSER_BACKEND, parse_only=RESULTS_STRAINER)
+    results = []
+    for container in soup.find_all("div", class_="result-con"):
+        result = _parse_result(container)
+        if result is not None and result.hltv_id:
+            results.append(result)
+    next_link = soup.find("a", class_="pagination-next", href=True)
+    next_offset = _id_from(OFFSET_RE, next_link["href"]) if next_link is not None else None
+    return results, int(next_offset) if next_offset is not None else None
+
+
+class HLTVParser:
+    """Page parser that skips pages whose content has not changed.
+
+    The last content hash and parsed result are kept per page key (usually the
+    URL path); an unchanged page returns the previous result without parsing.
+    At most ``max_pages`` keys are kept, least recently used first out.
+    """
+
+    def __init__(self, max_pages: int = 1024):
+        self.max_pages = max_pages
+        self._cache: "OrderedDict[str, Tuple[bytes, Any]]" = OrderedDict()
+        self.parsed = 0
+        self.skipped = 0
+
+    @staticmethod
+    def content_hash(html: str) -> bytes:
+        return hashlib.blake2b(html.encode("utf-8"), digest_size=16).digest()
+
+    def _parse_cached(self, key: str, html: str, parse):
+        digest = self.content_hash(html)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == digest:
+            self._cache.move_to_end(key)
+            self.skipped += 1
+            return cached[1]
+        result = parse(html)
+        self._cache[key] = (digest, result)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_pages:
+            self._cache.popitem(last=False)
+        self.parsed += 1
+        return result
+
+    def parse_matches_page(self, html: str, key: str = "/matches") -> List[MatchListing]:
+        return self._parse_cached(key, html, parse_matches_page)
+
+    def parse_match_page(self, html: str, key: str) -> Optional[MatchDetail]:
+        return self._parse_cached(key, html, parse_match_page)
+
+    def forget(self, key: str):
+        self._cache.pop(key, None)
@@ -0,0 +1,223 @@
+"""
+HLTV match source: scraping with a built-in fallback match list
+"""
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+from app.services.hltv_client import FetchError, HLTVClient
+from app.services.hltv_parser import HLTVParser
+
+
+class HLTVScraper:
+    def __init__(self):
+        self.base_url = "https://www.hltv.org"
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+        # Один пул keep-alive соединений на весь процесс (живёт в одном event loop)
+        self.client = HLTVClient(self.base_url, self.headers)
+        # Парсер пропускает страницы, содержимое которых не изменилось
+        self.parser = HLTVParser()
+        # Реальный скрапинг HLTV включается переменной окружения HLTV_SCRAPING=1
+        self.scraping_enabled = os.getenv("HLTV_SCRAPING") == "1"
+        # Время начала не должно меняться между обновлениями (иначе каждый матч "изменился"):
+        # встроенные данные отсчитываются от часа запуска, а матчам HLTV без времени
+        # достается время, когда их увидели впервые
+        self.schedule_base = datetime.now().replace(minute=0, second=0, microsecond=0)
+        self.first_seen = {}
+        
+    async def fetch_pages(self, match_paths=(), team_paths=()):
+        """Параллельно скачать страницу матчей и страницы матчей/команд"""
+        return await self.client.fetch_pages(match_paths, team_paths)
+        
+    async def fetch_current_matches(self):
+        """Скачать и разобрать страницу /matches с HLTV"""
+        html = await self.client.fetch_matches_page()
+        listings = self.parser.parse_matches_page(html)
+        now = datetime.now()
+        self.first_seen = {listing.hltv_id: self.first_seen.get(listing.hltv_id, now) for listing in listings}
+        for listing in listings:
+            if listing.start_time is None:
+                listing.start_time = self.first_seen[listing.hltv_id]
+        return [listing.to_match() for listing in listings]
+        
+    async def load_matches(self):
+        """Полный список матчей: с HLTV, если скрапинг включен, иначе встроенные данные"""
+        if self.scraping_enabled:
+            try:
+                matches = await self.fetch_current_matches()
+                if matches:
+                    return matches
+            except FetchError as e:
+                print(f"HLTV fetch failed, using fallback data: {e}")
+        return self.get_current_matches()
+        
+    async def refresh_live_matches(self, live_matches):
+        """Обновить счет live матчей по их страницам на HLTV"""
+        if not self.scraping_enabled:
+            return live_matches
+        
+        pages = await self.client.fetch_many(m["url"] for m in live_matches if m.get("url"))
+        updated = []
+        for match in live_matches:
+            html = pages.get(match.get("url"))
+            detail = self.parser.parse_match_page(html, key=match["url"]) if isinstance(html, str) else None
+            match = self.apply_match_detail(match, detail) if detail else match
+            if match["status"] == "finished":
+                # Страница завершенного матча больше не понадобится
+                self.parser.forget(match["url"])
+            updated.append(match)
+        return updated
+        
+    @staticmethod
+    def apply_match_detail(match, detail):
+        """Перенести счет по картам/раундам со страницы матча; определить завершение"""
+        maps_won = [0, 0]
+        live_map = None
+        for played in detail.maps:
+            if played.team1_score is None or played.team2_score is None:
+                continue
+            if played.state == "live":
+                live_map = played
+            elif played.team1_score > played.team2_score:
+                maps_won[0] += 1
+            elif played.team2_score > played.team1_score:
+                maps_won[1] += 1
+        
+        updated = dict(match, maps_score=f"{maps_won[0]}:{maps_won[1]}")
+        updated["maps"] = [
+            {"name": played.name, "team1_score": played.team1_score, "team2_score": played.team2_score}
+            for played in detail.maps
+            if played.state != "live" and played.team1_score is not None and played.team2_score is not None
+        ]
+        if live_map is not None:
+            updated["rounds_score"] = f"{live_map.team1_score}:{live_map.team2_score}"
+            name = live_map.name.lower()
+            updated["current_map"] = name if name.startswith("de_") else f"de_{name}"
+        
+        best_of = int(match.get("format", "BO1")[2:] or 1)
+        if max(maps_won) > best_of // 2:
+            updated["status"] = "finished"
+            updated["winner"] = match["team1" if maps_won[0] > maps_won[1] else "team2"]["name"]
+        return updated
+        
+    @staticmethod
+    def match_id(match):
+        """Стабильный ID матча: не зависит от времени запроса и статуса.
+
+        Время начала входит в ключ, чтобы повторная встреча тех же команд
+        на том же турнире получила свой ID.
+        """
+        key = "|".join([match["tournament"], match["team1"]["name"], match["team2"]["name"], match["start_time"]])
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+        
+    def get_current_matches(self):
+        """Получить актуальные матчи с HLTV"""
+        try:
+            base = self.schedule_base
+            # Реальные актуальные команды на основе скриншота
+            current_live = [
+                {
+                    "team1": {"name": "Natus Vincere", "short_name": "NAVI"},
+                    "team2": {"name": "3DMAX", "short_name": "3DMAX"},
+                    "tournament": "Live Counter-Strike matches",
+                    "start_time": base.isoformat(),
+                    "format": "BO3",
+                    "status": "live",
+                    "maps_score": "9:8",
+                    "rounds_score": "8:6",
+                    "current_map": "de_mirage"
+                },
+                {
+                    "team1": {"name": "GamerLegion", "short_name": "GL"},
+                    "team2": {"name": "The MongolZ", "short_name": "TMZ"},
+                    "tournament": "Live Counter-Strike matches",
+                    "start_time": base.isoformat(),
+                    "format": "BO3",
+                    "status": "live",
+                    "maps_score": "2:10",
+                    "rounds_score": "2:10",
+                    "current_map": "de_dust2"
+                },
+                {
+                    "team1": {"name": "GenOne", "short_name": "G1"},
+                    "team2": {"name": "K27", "short_name": "K27"},
+                    "tournament": "Live Counter-Strike matches",
+                    "start_time": base.isoformat(),
+                    "format": "BO3",
+                    "status": "live",
+                    "maps_score": "13:11",
+                    "rounds_score": "11:13",
+                    "current_map": "de_inferno"
+                }
+            ]
+            
+            current_upcoming = [
+                {
+                    "team1": {"name": "Vitality", "short_name": "VIT"},
+                    "team2": {"name": "Liquid", "short_name": "LIQ"},
+                    "tournament": "Esports World Cup 2025",
+                    "start_time": (base + timedelta(hours=1)).isoformat(),
+                    "format": "BO3",
+                    "status": "upcoming"
+                },
+                {
+                    "team1": {"name": "BetBoom", "short_name": "BB"},
+                    "team2": {"name": "BetClic", "short_name": "BC"},
+                    "tournament": "Exort The Proving Grounds Season 3",
+                    "start_time": (base + timedelta(hours=2)).isoformat(),
+                    "format": "BO3",
+                    "status": "upcoming"
+                },
+                {
+                    "team1": {"name": "FaZe", "short_name": "FAZE"},
+                    "team2": {"name": "Aurora", "short_name": "AUR"},
+                    "tournament": "Esports World Cup 2025",
+                    "start_time": (base + timedelta(hours=3)).isoformat(),
+                    "format": "BO3",
+                    "status": "upcoming"
+                },
+                {
+                    "team1": {"name": "Spirit", "short_name": "SPR"},
+                    "team2": {"name": "HEROIC", "short_name": "HER"},
+                    "tournament": "Esports World Cup 2025",
+                    "start_time": (base + timedelta(hours=4)).isoformat(),
+                    "format": "BO3",
+                    "status": "upcoming"
+                },
+                {
+                    "team1": {"name": "BIG", "short_name": "BIG"},
+                    "team2": {"name": "Spirit Academy", "short_name": "SPA"},
+                    "tournament": "Exort The Proving Grounds Season 3",
+                    "start_time": (base + timedelta(hours=5)).isoformat(),
+                    "format": "BO3",
+                    "status": "upcoming"
+                },
+                {
+                    "team1": {"name": "CYBERSHOKE", "short_name": "CYBER"},
+                    "team2": {"name": "FORZE Reload", "short_name": "FORZE"},
+                    "tournament": "Majestic LanData 3 Closed Qualifier",
+                    "start_time": (base + timedelta(hours=6)).isoformat(),
+                    "format": "BO3",
+                    "status": "upcoming"
+                },
+                {
+                    "team1": {"name": "Partizan", "short_name": "PTZ"},
+                    "team2": {"name": "Monte", "short_name": "MNT"},
+                    "tournament": "CCT Season 3 Europe Series 5",
+                    "start_time": (base + timedelta(hours=7)).isoformat(),
+                    "format": "BO3",
+                    "status": "upcoming"
+                }
+            ]
+            
+            matches = current_live + current_upcoming
+            for match in matches:
+                match["id"] = self.match_id(match)
+            
+            return matches
+            
+        except Exception as e:
+            print(f"Error getting current matches: {e}")
+            return []
@@ -0,0 +1,60 @@
+"""
+Conditional GET helpers: strong ETags and delta responses for match listings
+"""
+import hashlib
+import secrets
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+# Versions restart at 1 with the process, so ETags carry a per-process token
+# to keep a client's tag from an earlier run from matching new content.
+# Worker processes that share snapshot versions share the token as well
+# (see set_etag_epoch).
+ETAG_EPOCH = secrets.token_hex(4)
+
+
+def set_etag_epoch(epoch: str):
+    global ETAG_EPOCH
+    ETAG_EPOCH = epoch
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag (quoted) for a response identified by ``parts``"""
+    key = "|".join(str(part) for part in (ETAG_EPOCH,) + parts)
+    return '"%s"' % hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header value matches ``etag``.
+
+    Weak comparison, as RFC 9110 prescribes for If-None-Match.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def parse_since(value: Optional[str]) -> Optional[int]:
+    """``?since=`` query value as a version; raises ValueError if malformed"""
+    if value is None or value == "":
+        return None
+    since = int(value)
+    if since < 0:
+        raise ValueError("since must be a non-negative version")
+    return since
+
+
+def diff_by_id(
+    old: Mapping[str, Dict[str, Any]], new: Mapping[str, Dict[str, Any]]
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Matches added or changed (in full) and ids removed between two states"""
+    changed = [match for match_id, match in new.items() if old.get(match_id) != match]
+    removed = [match_id for match_id in old if match_id not in new]
+    return changed, removed
@@ -0,0 +1,189 @@
+"""
+Scraper -> database ingestion: diff each batch, write only changed rows
+"""
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import (
+    MATCH_COLUMNS,
+    TEAM_COLUMNS,
+    Match,
+    Team,
+    get_session_factory,
+    match_row,
+    team_row,
+    upsert_rows,
+)
+from app.services.match_store import split_teams
+
+# Ids per SELECT ... WHERE id IN (...); stays below SQLite's bound-parameter limit
+LOOKUP_CHUNK = 500
+
+
+@dataclass
+class IngestResult:
+    """Outcome of one batch"""
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    teams_inserted: int = 0
+    teams_updated: int = 0
+    # Time spent diffing, and inside the write transaction
+    diff_seconds: float = 0.0
+    write_seconds: float = 0.0
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.updated
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self), written=self.written)
+
+
+def _key(row: Dict[str, Any], columns: Sequence[str]) -> Tuple:
+    return tuple(repr(row.get(column)) for column in columns)
+
+
+class MatchIngestor:
+    """Writes scraper batches to the ``teams``/``matches`` tables.
+
+    Every batch is normalized with ``match_row``/``team_row`` and compared,
+    column by column, with what the database already holds: rows are
+    classified as inserted, updated or unchanged, and only the first two are
+    written, all in one transaction (one ``INSERT ... ON CONFLICT DO UPDATE``
+    executemany per table). Unchanged batches do not open a write
+    transaction at all, so a live refresh that only touched a couple of
+    scores holds the database lock for a couple of rows.
+
+    The values last written are remembered (an LRU of ``cache_size`` rows
+    per table), so steady-state refreshes diff in memory; ids that are not
+    cached are looked up in the database. Matches missing from a batch are
+    left as they are. Only one process should ingest into a database (the
+    refresh leader), otherwise the cache can go stale.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], AsyncSession]] = None, cache_size: int = 50_000):
+        self._session_factory = session_factory
+        self.cache_size = cache_size
+        self._known: Dict[Any, "OrderedDict[str, Tuple]"] = {
+            Team: OrderedDict(),
+            Match: OrderedDict(),
+        }
+        self.batches = 0
+        self.totals = IngestResult()
+        self.last: Optional[IngestResult] = None
+
+    def session(self) -> AsyncSession:
+        factory = self._session_factory or get_session_factory()
+        return factory()
+
+    async def ingest(self, matches: Iterable[Dict[str, Any]]) -> IngestResult:
+        """Ingest scraper output (teams embedded in the match dicts)"""
+        teams, rows = split_teams(matches)
+        return await self.ingest_rows(teams, rows)
+
+    async def ingest_rows(self, teams: Iterable[Dict[str, Any]], matches: Iterable[Dict[str, Any]]) -> IngestResult:
+        """Ingest store-shaped teams and matches (see split_teams)"""
+        result = IngestResult()
+        started = time.perf_counter()
+        team_rows = _dedupe(team_row(team) for team in teams)
+        match_rows = _dedupe(match_row(match) for match in matches)
+
+        async with self.session() as session:
+            new_teams, changed_teams, _ = await self._diff(session, Team, TEAM_COLUMNS, team_rows)
+            new_matches, changed_matches, unchanged = await self._diff(session, Match, MATCH_COLUMNS, match_rows)
+            result.diff_seconds = time.perf_counter() - started
+
+            team_writes = new_teams + changed_teams
+            match_writes = new_matches + changed_matches
+            if team_writes or match_writes:
+                # The diff only read; the database write lock is taken from here to the commit
+                write_started = time.perf_counter()
+                # Teams first: matches reference them
+                await upsert_rows(session, Team.__table__, team_writes)
+                await upsert_rows(session, Match.__table__, match_writes)
+                await session.commit()
+                result.write_seconds = time.perf_counter() - write_started
+
+        # Remember what was written only once it is committed
+        self._remember(Team, TEAM_COLUMNS, team_writes)
+        self._remember(Match, MATCH_COLUMNS, match_writes)
+
+        result.inserted, result.updated, result.unchanged = len(new_matches), len(changed_matches), unchanged
+        result.teams_inserted, result.teams_updated = len(new_teams), len(changed_teams)
+        self._record(result)
+        return result
+
+    def forget(self):
+        """Drop the cached rows, e.g. after the database was changed elsewhere"""
+        for known in self._known.values():
+            known.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "totals": self.totals.to_dict(),
+            "last": self.last.to_dict() if self.last is not None else None,
+            "cached_rows": sum(len(known) for known in self._known.values()),
+        }
+
+    # ------------------------------------------------------------------
+    # Diff
+    # ------------------------------------------------------------------
+
+    async def _diff(
+        self, session: AsyncSession, model, columns: Sequence[str], rows: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int]:
+        """(new rows, changed rows, unchanged count) of a batch"""
+        known = self._known[model]
+        missing = [row["id"] for row in rows if row["id"] not in known]
+        if missing:
+            self._remember(model, columns, await self._load(session, model, columns, missing))
+
+        new, changed, unchanged = [], [], 0
+        for row in rows:
+            current = known.get(row["id"])
+            if current is None:
+                new.append(row)
+            elif current != _key(row, columns):
+                changed.append(row)
+            else:
+                unchanged += 1
+                known.move_to_end(row["id"])
+        return new, changed, unchanged
+
+    async def _load(self, session: AsyncSession, model, columns: Sequence[str], ids: List[str]) -> List[Dict[str, Any]]:
+        table = model.__table__
+        selected = [table.c[column] for column in columns]
+        rows = []
+        for start in range(0, len(ids), LOOKUP_CHUNK):
+            chunk = ids[start:start + LOOKUP_CHUNK]
+            found = await session.execute(select(*selected).where(table.c.id.in_(chunk)))
+            rows.extend(dict(row._mapping) for row in found)
+        return rows
+
+    def _remember(self, model, columns: Sequence[str], rows: Iterable[Dict[str, Any]]):
+        known = self._known[model]
+        for row in rows:
+            known[row["id"]] = _key(row, columns)
+            known.move_to_end(row["id"])
+        while len(known) > self.cache_size:
+            known.popitem(last=False)
+
+    def _record(self, result: IngestResult):
+        self.batches += 1
+        self.last = result
+        for name in ("inserted", "updated", "unchanged", "teams_inserted", "teams_updated"):
+            setattr(self.totals, name, getattr(self.totals, name) + getattr(result, name))
+        self.totals.diff_seconds += result.diff_seconds
+        self.totals.write_seconds += result.write_seconds
+
+
+def _dedupe(rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Last row wins for repeated ids (executemany upserts can't touch a row twice)"""
+    return list({row["id"]: row for row in rows}.values())
@@ -0,0 +1,138 @@
+"""
+Fan-out of live match updates to SSE / WebSocket subscribers
+"""
+import asyncio
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+
+def _default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _dumps(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, ensure_ascii=False, default=_default, separators=(",", ":"))
+
+
+def diff_matches(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]):
+    """Per-match changes between two states keyed by match id.
+
+    Returns (changed, removed): ``changed`` holds new matches in full and,
+    for existing matches, the id plus only the fields that changed.
+    """
+    changed: List[Dict[str, Any]] = []
+    for match_id, match in new.items():
+        before = old.get(match_id)
+        if before is None:
+            changed.append(match)
+            continue
+        fields = {k: v for k, v in match.items() if before.get(k) != v}
+        fields.update({k: None for k in before.keys() - match.keys()})
+        if fields:
+            fields["id"] = match_id
+            changed.append(fields)
+    removed = [match_id for match_id in old if match_id not in new]
+    return changed, removed
+
+
+class Subscription:
+    """One subscriber's bounded event queue.
+
+    If the queue fills up because the client is slow, further diffs are
+    dropped and the subscriber is marked for resync: its next event is a
+    fresh snapshot instead of the backlog.
+    """
+
+    def __init__(self, broadcaster: "LiveBroadcaster", queue_size: int):
+        self.broadcaster = broadcaster
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(queue_size)
+        self.resync = True
+        self.dropped = 0
+
+    def offer(self, event: str):
+        if self.resync:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.resync = True
+            self.dropped += 1
+            self.broadcaster.resyncs += 1
+
+    async def next_event(self) -> str:
+        if self.resync:
+            self.resync = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return self.broadcaster.snapshot_event()
+        return await self.queue.get()
+
+    def close(self):
+        self.broadcaster.unsubscribe(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        return await self.next_event()
+
+
+class LiveBroadcaster:
+    """Turns published match lists into per-match diff events.
+
+    Each event is serialized once and handed to every subscriber queue, so a
+    publish costs one diff + one ``json.dumps`` regardless of the number of
+    subscribers. New subscribers start with a snapshot event. Must be used
+    from a single event loop.
+    """
+
+    def __init__(self, queue_size: int = 32):
+        self.queue_size = queue_size
+        self.version = 0
+        self.resyncs = 0
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._subscribers: Set[Subscription] = set()
+        self._snapshot_event: Optional[str] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def snapshot_event(self) -> str:
+        if self._snapshot_event is None:
+            self._snapshot_event = _dumps({
+                "type": "snapshot",
+                "version": self.version,
+                "matches": list(self._state.values()),
+            })
+        return self._snapshot_event
+
+    def publish(self, matches: Iterable[Dict[str, Any]]) -> Optional[str]:
+        """Publish the current match list; returns the diff event, None if nothing changed"""
+        new_state = {m["id"]: m for m in matches}
+        changed, removed = diff_matches(self._state, new_state)
+        if not changed and not removed:
+            return None
+
+        self._state = new_state
+        self.version += 1
+        self._snapshot_event = None
+        event = _dumps({"type": "diff", "version": self.version, "changed": changed, "removed": removed})
+        for subscription in self._subscribers:
+            subscription.offer(event)
+        return event
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self, self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "subscribers": len(self._subscribers),
+            "resyncs": self.resyncs,
+        }
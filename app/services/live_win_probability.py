@@ -0,0 +1,291 @@
+"""
+In-play series win probabilities from the live map and round score
+"""
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.services.predictor import Prediction
+
+# MR12: first to 13 rounds; at 12:12 MR3 overtimes (first to 4 of 6) repeat until decided
+ROUNDS_TO_WIN = 13
+OVERTIME_START = 12
+OVERTIME_ROUNDS = 3
+FORMATS = (1, 2, 3, 5, 7)
+# Pre-match probabilities are bucketed to this grid; every table row is one bucket
+GRID_SIZE = 1001
+FIELD = "live_win_probability"
+
+_LAST = OVERTIME_START + OVERTIME_ROUNDS + 1  # 16: winning score of the first overtime
+_SIDE = _LAST + 1
+
+
+def _score_pair(value: Any) -> Optional[Tuple[int, int]]:
+    try:
+        a, b = str(value).split(":")
+        return int(a), int(b)
+    except (TypeError, ValueError):
+        return None
+
+
+def best_of(match: Dict[str, Any]) -> Optional[int]:
+    """3 for "BO3"; None when the format is missing or unknown"""
+    try:
+        n = int(str(match.get("format") or "")[2:])
+    except ValueError:
+        return None
+    return n if n in FORMATS else None
+
+
+def _reduce(rounds: Tuple[int, int]) -> Tuple[int, int]:
+    """Overtime scores as their equivalent in the first overtime (every overtime starts alike)"""
+    x, y = rounds
+    if x >= OVERTIME_START and y >= OVERTIME_START:
+        shift = (min(x, y) - OVERTIME_START) // OVERTIME_ROUNDS * OVERTIME_ROUNDS
+        return x - shift, y - shift
+    return x, y
+
+
+def map_finished(rounds: Tuple[int, int]) -> bool:
+    """Whether a round score decides the map (or is not a valid MR12 score)"""
+    x, y = _reduce(rounds)
+    if min(x, y) < 0:
+        return True
+    if x >= OVERTIME_START and y >= OVERTIME_START:
+        return max(x, y) >= _LAST
+    return max(x, y) >= ROUNDS_TO_WIN
+
+
+def map_win_table(round_probability: np.ndarray) -> np.ndarray:
+    """P(team1 wins the map) from every round score, for each per-round win probability.
+
+    Returns (len(round_probability), 17, 17) indexed by [r, team1 rounds, team2 rounds].
+    Overtime scores are stored as their equivalent in the first overtime
+    (see :meth:`InPlayModel.map_probability`).
+    """
+    r = np.asarray(round_probability, dtype=np.float64)[:, None]
+    table = np.zeros((len(r), _SIDE, _SIDE))
+    # Overtime: 15:15 restarts at 12:12, so W = a + t * W(12:12) and W(12:12) = a / (1 - t)
+    a = np.zeros((len(r), _SIDE, _SIDE))
+    t = np.zeros((len(r), _SIDE, _SIDE))
+    for x in range(_LAST, OVERTIME_START - 1, -1):
+        for y in range(_LAST, OVERTIME_START - 1, -1):
+            if x == _LAST and y == _LAST:
+                continue
+            if x == _LAST:
+                a[:, x, y] = 1.0
+            elif y == _LAST:
+                continue
+            elif x == y == _LAST - 1:
+                t[:, x, y] = 1.0
+            else:
+                a[:, x, y] = r[:, 0] * a[:, x + 1, y] + (1 - r[:, 0]) * a[:, x, y + 1]
+                t[:, x, y] = r[:, 0] * t[:, x + 1, y] + (1 - r[:, 0]) * t[:, x, y + 1]
+    overtime = a[:, OVERTIME_START, OVERTIME_START] / (1 - t[:, OVERTIME_START, OVERTIME_START])
+    table[:, OVERTIME_START:, OVERTIME_START:] = (a + t * overtime[:, None, None])[:, OVERTIME_START:, OVERTIME_START:]
+
+    for x in range(ROUNDS_TO_WIN, -1, -1):
+        for y in range(ROUNDS_TO_WIN, -1, -1):
+            if x >= OVERTIME_START and y >= OVERTIME_START:
+                continue
+            if x == ROUNDS_TO_WIN:
+                table[:, x, y] = 1.0
+            elif y != ROUNDS_TO_WIN:
+                table[:, x, y] = r[:, 0] * table[:, x + 1, y] + (1 - r[:, 0]) * table[:, x, y + 1]
+    return table
+
+
+def series_tables(map_probability: np.ndarray, maps: int) -> Tuple[np.ndarray, np.ndarray]:
+    """P(team1 wins the series) and P(draw) from every series score of a best-of-``maps``.
+
+    Both are (len(map_probability), need + 1, need + 1) indexed by [q, team1 maps, team2 maps];
+    a draw is only possible with an even number of maps (BO2 at 1:1).
+    """
+    q = np.asarray(map_probability, dtype=np.float64)
+    need = maps // 2 + 1
+    win = np.zeros((len(q), need + 1, need + 1))
+    draw = np.zeros((len(q), need + 1, need + 1))
+    for a in range(need, -1, -1):
+        for b in range(need, -1, -1):
+            if a == need and b < need:
+                win[:, a, b] = 1.0
+            elif b == need or a == need:
+                continue
+            elif a + b == maps:
+                draw[:, a, b] = 1.0
+            else:
+                win[:, a, b] = q * win[:, a + 1, b] + (1 - q) * win[:, a, b + 1]
+                draw[:, a, b] = q * draw[:, a + 1, b] + (1 - q) * draw[:, a, b + 1]
+    return win, draw
+
+
+def _invert(forward, grid: np.ndarray, resolution: int = 20001) -> np.ndarray:
+    """Inputs x with forward(x) = each value of ``grid`` (forward is increasing on [0, 1])"""
+    x = np.linspace(0.0, 1.0, resolution)
+    return np.interp(grid, forward(x), x)
+
+
+class InPlayModel:
+    """Series win probability from (series score, round score, format) in O(1).
+
+    Rounds are modelled as independent with one win probability per team,
+    chosen so that the map win probability at 0:0 equals the pre-map
+    estimate; the remaining maps likewise use the map probability that
+    reproduces the pre-match series estimate for the format. Everything
+    that depends on those probabilities is tabulated once on a grid of
+    ``GRID_SIZE`` pre-match values, so an update is a few table lookups.
+    """
+
+    def __init__(self, grid_size: int = GRID_SIZE):
+        self.grid_size = grid_size
+        grid = np.linspace(0.0, 1.0, grid_size)
+        self.round_probability = _invert(lambda r: map_win_table(r)[:, 0, 0], grid)
+        self.map_table = map_win_table(self.round_probability)
+        self.series: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for maps in FORMATS:
+            # Map probability that gives each pre-match series probability
+            q = _invert(lambda x: series_tables(x, maps)[0][:, 0, 0], grid)
+            win, draw = series_tables(q, maps)
+            self.series[maps] = (q, win, draw)
+
+    def _bucket(self, probability: float) -> int:
+        return int(min(max(probability, 0.0), 1.0) * (self.grid_size - 1) + 0.5)
+
+    def round_probability_for(self, pre_map: float) -> float:
+        """Per-round win probability that gives ``pre_map`` at 0:0"""
+        return self.round_probability.item(self._bucket(pre_map))
+
+    def map_probability_for(self, pre_series: float, maps: int) -> float:
+        """Per-map win probability that gives ``pre_series`` in a best-of-``maps``"""
+        return self.series[maps][0].item(self._bucket(pre_series))
+
+    def map_probability(self, pre_map: float, rounds: Tuple[int, int]) -> float:
+        """P(team1 wins the current map) at a round score, from its pre-map probability"""
+        x, y = _reduce(rounds)
+        if map_finished((x, y)):
+            return 1.0 if x > y else 0.0
+        return self.map_table.item(self._bucket(pre_map), x, y)
+
+    def series_probability(
+        self,
+        pre_series: float,
+        maps: int,
+        series_score: Tuple[int, int],
+        rounds: Optional[Tuple[int, int]] = None,
+        pre_map: Optional[float] = None,
+    ) -> Dict[str, Optional[float]]:
+        """{"team1", "team2", "draw", "map_team1"} for a best-of-``maps`` at the given scores.
+
+        ``pre_series`` is team1's pre-match series win probability and
+        ``pre_map`` its pre-map probability on the current map (by default
+        the per-map probability implied by ``pre_series``). A round score
+        that already decides the map is taken as counted in ``series_score``.
+        """
+        q, win, draw = self.series[maps]
+        need = maps // 2 + 1
+        a, b = series_score
+        if a >= need or b >= need or a + b >= maps:
+            team1 = 1.0 if a >= need else 0.0
+            team2 = 1.0 if b >= need else 0.0
+            return {"team1": team1, "team2": team2, "draw": 1.0 - team1 - team2, "map_team1": None}
+
+        j = self._bucket(pre_series)
+        on_map = None
+        if rounds is not None and not map_finished(rounds):
+            on_map = self.map_probability(q.item(j) if pre_map is None else pre_map, rounds)
+        if on_map is None:
+            team1, tie = win.item(j, a, b), draw.item(j, a, b)
+        else:
+            team1 = on_map * win.item(j, a + 1, b) + (1 - on_map) * win.item(j, a, b + 1)
+            tie = on_map * draw.item(j, a + 1, b) + (1 - on_map) * draw.item(j, a, b + 1)
+        return {"team1": team1, "team2": 1.0 - team1 - tie, "draw": tie, "map_team1": on_map}
+
+
+class LiveWinTracker:
+    """Live win probabilities of the current live matches.
+
+    A match is recomputed only when its live state (format, series and
+    round score, map, pre-match probabilities) differs from the last one
+    seen; otherwise its previous value is reused.
+    """
+
+    def __init__(self, model: Optional[InPlayModel] = None):
+        self.model = model or InPlayModel()
+        self._lock = threading.Lock()
+        self._states: Dict[str, Tuple[Tuple, Optional[Dict[str, Any]]]] = {}
+        self.updates = 0
+        self.recomputed = 0
+        self.seconds = 0.0
+
+    def update(self, match: Dict[str, Any], prediction: Prediction) -> Optional[Dict[str, Any]]:
+        """Listing value of one live match (None when its format or score is unknown)"""
+        state = (
+            match.get("format"), match.get("maps_score"), match.get("rounds_score"), match.get("current_map"),
+            prediction.team1_win_probability, prediction.map_win_probability,
+        )
+        self.updates += 1
+        cached = self._states.get(match["id"])
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+        started = time.perf_counter()
+        value = self.evaluate(match, prediction)
+        self.seconds += time.perf_counter() - started
+        self.recomputed += 1
+        self._states[match["id"]] = (state, value)
+        return value
+
+    def evaluate(self, match: Dict[str, Any], prediction: Prediction) -> Optional[Dict[str, Any]]:
+        maps = best_of(match)
+        series_score = _score_pair(match.get("maps_score")) or (0, 0)
+        if maps is None:
+            return None
+        need = maps // 2 + 1
+        if min(series_score) < 0 or (series_score[0] >= need and series_score[1] >= need):
+            # Not a series score (the fallback data sometimes carries rounds here)
+            series_score = (0, 0)
+        result = self.model.series_probability(
+            prediction.team1_win_probability,
+            maps,
+            series_score,
+            rounds=_score_pair(match.get("rounds_score")),
+            pre_map=prediction.map_win_probability,
+        )
+        value = {
+            "team1": round(result["team1"], 4),
+            "team2": round(result["team2"], 4),
+            "map_team1": round(result["map_team1"], 4) if result["map_team1"] is not None else None,
+            "pre_match_team1": round(prediction.team1_win_probability, 4),
+        }
+        if maps % 2 == 0:
+            value["draw"] = round(result["draw"], 4)
+        return value
+
+    def annotate(
+        self, matches: Iterable[Dict[str, Any]], predictions: Mapping[str, Prediction]
+    ) -> List[Dict[str, Any]]:
+        """Copies of ``matches`` with FIELD set on live matches and removed from the others"""
+        annotated = []
+        with self._lock:
+            live = set()
+            for match in matches:
+                prediction = predictions.get(match["id"]) if match.get("status") == "live" else None
+                if prediction is not None:
+                    live.add(match["id"])
+                    match = dict(match, **{FIELD: self.update(match, prediction)})
+                elif FIELD in match:
+                    match = {k: v for k, v in match.items() if k != FIELD}
+                annotated.append(match)
+            for match_id in [m for m in self._states if m not in live]:
+                del self._states[match_id]
+        return annotated
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "live_matches": len(self._states),
+            "updates": self.updates,
+            "recomputed": self.recomputed,
+            "avg_recompute_us": round(self.seconds / self.recomputed * 1e6, 2) if self.recomputed else None,
+        }
@@ -0,0 +1,240 @@
+"""
+Persistent archive of finished matches (SQLite)
+"""
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS archived_matches (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    match_id TEXT NOT NULL UNIQUE,
+    team1 TEXT NOT NULL COLLATE NOCASE,
+    team2 TEXT NOT NULL COLLATE NOCASE,
+    tournament TEXT,
+    start_time TEXT,
+    archived_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_archived_team1 ON archived_matches (team1, seq);
+CREATE INDEX IF NOT EXISTS ix_archived_team2 ON archived_matches (team2, seq);
+CREATE INDEX IF NOT EXISTS ix_archived_start_time ON archived_matches (start_time);
+"""
+
+
+def _team_name(team) -> str:
+    return team.get("name", "") if isinstance(team, dict) else str(team or "")
+
+
+class MatchArchive:
+    """Append-only archive of finished matches.
+
+    Rows are indexed by match id, team and start time. Recently archived or
+    read matches are kept in a small LRU; everything else stays on disk.
+    Retention (``max_rows`` / ``max_age_days``) is enforced every
+    ``compact_every`` appends, so the archive does not grow without bound.
+    """
+
+    def __init__(
+        self,
+        path: str = "match_archive.db",
+        recent_size: int = 256,
+        max_rows: int = 100_000,
+        max_age_days: Optional[int] = 365,
+        compact_every: int = 500,
+    ):
+        self.path = path
+        self.recent_size = recent_size
+        self.max_rows = max_rows
+        self.max_age_days = max_age_days
+        self.compact_every = compact_every
+        self._recent: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._count = self._conn.execute("SELECT COUNT(*) FROM archived_matches").fetchone()[0]
+        self._appends_since_compact = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def append(self, matches: Iterable[Dict[str, Any]]) -> int:
+        """Archive finished matches; already archived ids are ignored"""
+        matches = list(matches)
+        archived_at = datetime.now().isoformat()
+        rows = []
+        for match in matches:
+            rows.append((
+                match["id"],
+                _team_name(match.get("team1")),
+                _team_name(match.get("team2")),
+                match.get("tournament"),
+                match.get("start_time"),
+                archived_at,
+                json.dumps(match, default=str, ensure_ascii=False),
+            ))
+        if not rows:
+            return 0
+
+        with self._lock:
+            added = []
+            self._conn.execute("BEGIN")
+            for match, row in zip(matches, rows):
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO archived_matches "
+                    "(match_id, team1, team2, tournament, start_time, archived_at, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    row,
+                )
+                # rowcount is 0 for an id that is already archived
+                if cursor.rowcount:
+                    added.append(match)
+            self._conn.execute("COMMIT")
+            inserted = len(added)
+            self._count += inserted
+            for match in added:
+                self._remember(match["id"], match)
+            self._appends_since_compact += inserted
+            if self._appends_since_compact >= self.compact_every:
+                self._compact()
+        return inserted
+
+    def compact(self) -> int:
+        """Apply retention now; returns the number of removed rows"""
+        with self._lock:
+            return self._compact()
+
+    def _compact(self) -> int:
+        self._appends_since_compact = 0
+        before = self._conn.total_changes
+        self._conn.execute("BEGIN")
+        if self.max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=self.max_age_days)).isoformat()
+            self._conn.execute("DELETE FROM archived_matches WHERE archived_at < ?", (cutoff,))
+        self._conn.execute(
+            "DELETE FROM archived_matches WHERE seq <= "
+            "(SELECT seq FROM archived_matches ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+            (self.max_rows,),
+        )
+        self._conn.execute("COMMIT")
+        removed = self._conn.total_changes - before
+        if removed:
+            self._count -= removed
+            self._recent.clear()
+            # Return freed pages to the filesystem
+            self._conn.execute("PRAGMA incremental_vacuum")
+        return removed
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def count(self) -> int:
+        return self._count
+
+    def refresh_count(self) -> int:
+        """Re-read the row count, e.g. after another process appended"""
+        with self._lock:
+            self._count = self._conn.execute("SELECT COUNT(*) FROM archived_matches").fetchone()[0]
+        return self._count
+
+    def get(self, match_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            match = self._recent.get(match_id)
+            if match is not None:
+                self._recent.move_to_end(match_id)
+                return match
+            row = self._conn.execute(
+                "SELECT data FROM archived_matches WHERE match_id = ?", (match_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            match = json.loads(row[0])
+            self._remember(match_id, match)
+            return match
+
+    def query(
+        self,
+        team: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        page: int = 1,
+        page_size: int = 50,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Newest-first page of archived matches and the total number of hits.
+
+        ``date_from``/``date_to`` are ISO dates compared against the match
+        start time; ``date_to`` is inclusive.
+        """
+        where, params = [], []
+        if team:
+            where.append("(team1 = ? OR team2 = ?)")
+            params += [team, team]
+        if date_from:
+            where.append("start_time >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("start_time < ?")
+            params.append(self._day_after(date_to))
+        clause = f"WHERE {' AND '.join(where)}" if where else ""
+
+        page = max(1, page)
+        with self._lock:
+            if clause:
+                total = self._conn.execute(
+                    f"SELECT COUNT(*) FROM archived_matches {clause}", params
+                ).fetchone()[0]
+            else:
+                total = self._count
+            rows = self._conn.execute(
+                f"SELECT data FROM archived_matches {clause} ORDER BY seq DESC LIMIT ? OFFSET ?",
+                params + [page_size, (page - 1) * page_size],
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows], total
+
+    def since(self, seq: int, limit: int = 1000) -> List[Tuple[int, Dict[str, Any]]]:
+        """Matches archived after sequence number ``seq``, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, data FROM archived_matches WHERE seq > ? ORDER BY seq LIMIT ?",
+                (seq, limit),
+            ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def iter_since(self, seq: int = 0, batch_size: int = 1000) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """(seq, match) pairs archived after ``seq``, read in batches"""
+        while True:
+            rows = self.since(seq, batch_size)
+            if not rows:
+                return
+            yield from rows
+            seq = rows[-1][0]
+
+    def iter_matches(self, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """All archived matches in archive order, read in batches"""
+        for _, match in self.iter_since(0, batch_size):
+            yield match
+
+    @staticmethod
+    def _day_after(date: str) -> str:
+        try:
+            return (datetime.fromisoformat(date[:10]) + timedelta(days=1)).date().isoformat()
+        except ValueError:
+            return date
+
+    def _remember(self, match_id: str, match: Dict[str, Any]):
+        self._recent[match_id] = match
+        self._recent.move_to_end(match_id)
+        while len(self._recent) > self.recent_size:
+            self._recent.popitem(last=False)
@@ -0,0 +1,291 @@
+"""
+Indexed in-memory storage for matches and teams
+"""
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def team_key(team: Dict[str, Any]) -> str:
+    """Team id for the store: the HLTV id when known, else a slug of the name"""
+    if team.get("id"):
+        return str(team["id"])
+    return re.sub(r"[^a-z0-9]+", "-", team.get("name", "").lower()).strip("-")
+
+
+def split_teams(matches) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Normalize snapshot matches (teams embedded) into store teams + matches"""
+    teams: Dict[str, Dict[str, Any]] = {}
+    rows = []
+    for match in matches:
+        row = {k: v for k, v in match.items() if k not in ("team1", "team2")}
+        for side in ("team1", "team2"):
+            team = match[side]
+            team_id = team_key(team)
+            teams.setdefault(team_id, dict(team, id=team_id))
+            row[f"{side}_id"] = team_id
+        rows.append(row)
+    return list(teams.values()), rows
+
+
+class MatchStore:
+    """In-memory match/team store with O(1) id lookups.
+
+    Matches are indexed by status, tournament and team. Each match also has a
+    pre-joined view (the match dict with ``team1``/``team2`` filled in) that is
+    rebuilt only when the match or one of its teams changes, so read paths
+    never rescan the whole store.
+
+    Every write bumps ``version``; the store remembers the version at which
+    each view last changed, plus recent removals, so :meth:`changes_since`
+    can answer delta requests from polling clients.
+    """
+
+    def __init__(self, max_tombstones: int = 1024):
+        self._lock = threading.RLock()
+        self._teams: Dict[str, Dict[str, Any]] = {}
+        self._matches: Dict[str, Dict[str, Any]] = {}
+        # Secondary indexes: key -> ordered set (dict with None values) of match ids
+        self._by_status: Dict[str, Dict[str, None]] = defaultdict(dict)
+        self._by_tournament: Dict[str, Dict[str, None]] = defaultdict(dict)
+        self._by_team: Dict[str, Dict[str, None]] = defaultdict(dict)
+        self._views: Dict[str, Dict[str, Any]] = {}
+        self._all_views: Optional[List[Dict[str, Any]]] = None
+        self.version = 0
+        # Change log: match id -> version of its last change / of its removal
+        self._modified: Dict[str, int] = {}
+        self._removed: "OrderedDict[str, int]" = OrderedDict()
+        self.max_tombstones = max_tombstones
+        # Oldest version changes_since can diff against
+        self._horizon = 0
+        # Last external version passed to sync
+        self._synced_version = 0
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def load(self, teams: Iterable[Dict[str, Any]], matches: Iterable[Dict[str, Any]]):
+        """Replace the whole store content"""
+        with self._lock:
+            self._teams.clear()
+            self._matches.clear()
+            self._by_status.clear()
+            self._by_tournament.clear()
+            self._by_team.clear()
+            self._views.clear()
+            self._modified.clear()
+            self._removed.clear()
+            # A reload replaces everything, older versions can't be diffed
+            self._horizon = self.version + 1
+            for team in teams:
+                self._teams[team["id"]] = team
+            for match in matches:
+                self._index_match(match)
+            self._changed()
+
+    def sync(
+        self,
+        teams: Iterable[Dict[str, Any]],
+        matches: Iterable[Dict[str, Any]],
+        version: Optional[int] = None,
+    ):
+        """Make the store content equal to ``teams``/``matches``, touching only
+        what differs, as a single change (one version bump).
+
+        ``version`` lets the store follow an external version (e.g. the shared
+        snapshot version); if it skips ahead, the changes in between are
+        unknown, so older versions can no longer be diffed.
+        """
+        with self._lock:
+            gap = version is not None and version > self._synced_version + 1
+            if version is not None:
+                self._synced_version = version
+            teams = {team["id"]: team for team in teams}
+            matches = {match["id"]: match for match in matches}
+            stale = [match_id for match_id in self._matches if match_id not in matches]
+            changed_teams = [team for team_id, team in teams.items() if self._teams.get(team_id) != team]
+            changed_matches = [match for match_id, match in matches.items() if self._matches.get(match_id) != match]
+            removed_teams = [team_id for team_id in self._teams if team_id not in teams]
+            if not (stale or changed_teams or changed_matches or removed_teams):
+                return
+            if version is not None and version > self.version + 1:
+                self.version = version - 1
+                if gap:
+                    self._horizon = version
+
+            for match_id in stale:
+                self._unindex_match(match_id)
+                self._modified.pop(match_id, None)
+                self._tombstone(match_id)
+            for team_id in removed_teams:
+                del self._teams[team_id]
+            for team in changed_teams:
+                self._teams[team["id"]] = team
+                for match_id in self._by_team.get(team["id"], ()):
+                    self._views[match_id] = self._join(self._matches[match_id])
+                    self._modified[match_id] = self.version + 1
+            for match in changed_matches:
+                if match["id"] in self._matches:
+                    self._unindex_match(match["id"])
+                self._index_match(match)
+            self._changed()
+
+    def upsert_team(self, team: Dict[str, Any]):
+        with self._lock:
+            self._teams[team["id"]] = team
+            for match_id in self._by_team.get(team["id"], ()):
+                self._views[match_id] = self._join(self._matches[match_id])
+                self._modified[match_id] = self.version + 1
+            self._changed()
+
+    def upsert_match(self, match: Dict[str, Any]):
+        with self._lock:
+            if match["id"] in self._matches:
+                self._unindex_match(match["id"])
+            self._index_match(match)
+            self._changed()
+
+    def remove_match(self, match_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if match_id not in self._matches:
+                return None
+            match = self._unindex_match(match_id)
+            self._modified.pop(match_id, None)
+            self._tombstone(match_id)
+            self._changed()
+            return match
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get_team(self, team_id: str) -> Optional[Dict[str, Any]]:
+        return self._teams.get(team_id)
+
+    def get_match(self, match_id: str) -> Optional[Dict[str, Any]]:
+        return self._matches.get(match_id)
+
+    def reading(self) -> threading.RLock:
+        """``with store.reading():`` keeps writes out, so ``version`` and every
+        read inside the block describe the same state"""
+        return self._lock
+
+    def teams(self) -> List[Dict[str, Any]]:
+        return list(self._teams.values())
+
+    def match_view(self, match_id: str) -> Optional[Dict[str, Any]]:
+        """Match joined with its teams"""
+        return self._views.get(match_id)
+
+    def match_views(
+        self,
+        status: Optional[str] = None,
+        tournament: Optional[str] = None,
+        team_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Joined match views, optionally filtered through the secondary indexes.
+
+        The unfiltered list is cached until the next write, so callers must
+        treat the returned dicts as read-only.
+        """
+        with self._lock:
+            if status is None and tournament is None and team_id is None:
+                if self._all_views is None:
+                    self._all_views = list(self._views.values())
+                return self._all_views
+
+            candidates = [
+                index.get(key, {})
+                for index, key in (
+                    (self._by_status, status),
+                    (self._by_tournament, tournament),
+                    (self._by_team, team_id),
+                )
+                if key is not None
+            ]
+            # Walk the smallest index and probe the others
+            candidates.sort(key=len)
+            smallest, rest = candidates[0], candidates[1:]
+            return [
+                self._views[match_id]
+                for match_id in smallest
+                if all(match_id in other for other in rest)
+            ]
+
+    def changes_since(
+        self, since: int
+    ) -> Optional[Tuple[List[Dict[str, Any]], List[str]]]:
+        """(changed views, removed ids) after version ``since``.
+
+        None if the change log no longer reaches back that far; the caller
+        should then send the full list.
+        """
+        with self._lock:
+            if since == self.version:
+                return [], []
+            if since < self._horizon or since > self.version:
+                return None
+            changed = [
+                self._views[match_id]
+                for match_id, modified in self._modified.items()
+                if modified > since
+            ]
+            removed = [match_id for match_id, removed_at in self._removed.items() if removed_at > since]
+            return changed, removed
+
+    def count(self, status: Optional[str] = None) -> int:
+        if status is None:
+            return len(self._matches)
+        return len(self._by_status.get(status, ()))
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+
+    def _join(self, match: Dict[str, Any]) -> Dict[str, Any]:
+        view = match.copy()
+        view["team1"] = self._teams.get(match.get("team1_id"))
+        view["team2"] = self._teams.get(match.get("team2_id"))
+        return view
+
+    def _index_match(self, match: Dict[str, Any]):
+        match_id = match["id"]
+        self._matches[match_id] = match
+        self._by_status[match.get("status")][match_id] = None
+        self._by_tournament[match.get("tournament")][match_id] = None
+        for key in ("team1_id", "team2_id"):
+            if match.get(key) is not None:
+                self._by_team[match[key]][match_id] = None
+        self._views[match_id] = self._join(match)
+        self._modified[match_id] = self.version + 1
+        self._removed.pop(match_id, None)
+
+    def _unindex_match(self, match_id: str) -> Dict[str, Any]:
+        match = self._matches.pop(match_id)
+        self._discard(self._by_status, match.get("status"), match_id)
+        self._discard(self._by_tournament, match.get("tournament"), match_id)
+        for key in ("team1_id", "team2_id"):
+            self._discard(self._by_team, match.get(key), match_id)
+        self._views.pop(match_id, None)
+        return match
+
+    def _tombstone(self, match_id: str):
+        self._removed[match_id] = self.version + 1
+        while len(self._removed) > self.max_tombstones:
+            _, removed_at = self._removed.popitem(last=False)
+            self._horizon = max(self._horizon, removed_at)
+
+    @staticmethod
+    def _discard(index: Dict[str, Dict[str, None]], key, match_id: str):
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.pop(match_id, None)
+        if not bucket:
+            del index[key]
+
+    def _changed(self):
+        self._all_views = None
+        self.version += 1
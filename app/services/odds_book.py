@@ -0,0 +1,463 @@
+"""
+Multi-bookmaker odds time series, margin removal and vectorized value bets
+"""
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.predictor import MatchPredictor
+
+# Bookmaker name for the single odds_team1/odds_team2 pair when a feed gives none
+DEFAULT_BOOKMAKER = "default"
+OPEN_STATUSES = ("live", "upcoming")
+# Expected value of the recommended side (per unit staked) for each odds_value label
+GOOD_VALUE = 0.05
+FAIR_VALUE = 0.0
+# Fraction of the full Kelly stake suggested
+KELLY_SCALE = 0.25
+
+
+def parse_odds(value: Any) -> float:
+    """Decimal odds as a float, NaN when missing or not a valid price (<= 1)"""
+    try:
+        odds = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return odds if odds > 1.0 else math.nan
+
+
+def implied_probabilities(odds: np.ndarray) -> np.ndarray:
+    """1 / decimal odds, elementwise (NaN stays NaN)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 1.0 / np.asarray(odds, dtype=np.float64)
+
+
+def overround(odds: np.ndarray) -> np.ndarray:
+    """Bookmaker margin of each market (last axis = outcomes): sum of implied probabilities - 1"""
+    return implied_probabilities(odds).sum(axis=-1) - 1.0
+
+
+def remove_margin(odds: np.ndarray, method: str = "proportional", iterations: int = 30) -> np.ndarray:
+    """Fair outcome probabilities of each market (last axis = outcomes).
+
+    ``proportional`` scales the implied probabilities to sum to 1;
+    ``power`` raises them to the exponent k that makes them sum to 1,
+    which moves more of the margin onto long shots (favourite-longshot
+    bias). Both run over all markets at once; markets with a missing price
+    come out NaN.
+    """
+    implied = implied_probabilities(odds)
+    if method == "proportional":
+        return implied / implied.sum(axis=-1, keepdims=True)
+    if method != "power":
+        raise ValueError(f"unknown margin removal method: {method}")
+    # Newton's method on f(k) = sum(p^k) - 1, all markets in parallel; f is
+    # convex and decreasing in k, so starting from k = 1 converges monotonically
+    log_p = np.log(implied)
+    k = np.ones(implied.shape[:-1] + (1,))
+    for _ in range(iterations):
+        powered = np.exp(k * log_p)
+        f = powered.sum(axis=-1, keepdims=True) - 1.0
+        slope = (powered * log_p).sum(axis=-1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.where(slope != 0, f / slope, 0.0)
+        k = k - step
+        if np.nanmax(np.abs(step), initial=0.0) < 1e-10:
+            break
+    return np.exp(k * log_p)
+
+
+def kelly_fraction(probability: np.ndarray, odds: np.ndarray) -> np.ndarray:
+    """Share of the bankroll the Kelly criterion stakes, 0 when the bet has no edge"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = (probability * odds - 1.0) / (odds - 1.0)
+    return np.clip(np.nan_to_num(fraction, nan=0.0), 0.0, 1.0)
+
+
+def match_quotes(match: Dict[str, Any]) -> List[Tuple[str, float, float]]:
+    """(bookmaker, team1 odds, team2 odds) quotes carried by a match dict.
+
+    The scraped odds_team1/odds_team2/bookmaker_name pair counts as one
+    bookmaker; feeds with several add ``odds``: [{"bookmaker", "team1",
+    "team2"}, ...].
+    """
+    quotes = {}
+    if match.get("odds_team1") is not None or match.get("odds_team2") is not None:
+        quotes[match.get("bookmaker_name") or DEFAULT_BOOKMAKER] = (
+            parse_odds(match.get("odds_team1")), parse_odds(match.get("odds_team2"))
+        )
+    for quote in match.get("odds") or ():
+        if isinstance(quote, dict) and quote.get("bookmaker"):
+            quotes[str(quote["bookmaker"])] = (parse_odds(quote.get("team1")), parse_odds(quote.get("team2")))
+    return [(book, odds1, odds2) for book, (odds1, odds2) in quotes.items()]
+
+
+class OddsBook:
+    """Odds of every match from every bookmaker, latest and over time.
+
+    Matches and bookmakers are interned to row/column numbers. The latest
+    prices live in one float32 array of shape (matches, bookmakers, 2), NaN
+    where a bookmaker has no price, so implied probabilities, margins and
+    value for all open matches are a handful of array operations. Every
+    price change is also appended to a columnar log (time, match,
+    bookmaker, odds) for line-movement history; repeats of an unchanged
+    price are not logged. Rows of closed matches are dropped by
+    :meth:`compact` once they outnumber the open ones.
+    """
+
+    def __init__(self, match_capacity: int = 256, book_capacity: int = 8, log_capacity: int = 4096):
+        self._lock = threading.RLock()
+        self.version = 0
+        self._match_rows: Dict[str, int] = {}
+        self._match_ids: List[str] = []
+        self._book_columns: Dict[str, int] = {}
+        self._books: List[str] = []
+        self._latest = np.full((match_capacity, book_capacity, 2), np.nan, dtype=np.float32)
+        self._latest_time = np.zeros((match_capacity, book_capacity))
+        self._match_versions = np.zeros(match_capacity, dtype=np.int64)
+        self._open = np.zeros(match_capacity, dtype=bool)
+        self._log_time = np.empty(log_capacity)
+        self._log_match = np.empty(log_capacity, dtype=np.int32)
+        self._log_book = np.empty(log_capacity, dtype=np.int16)
+        self._log_odds = np.empty((log_capacity, 2), dtype=np.float32)
+        self._log_size = 0
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def record(
+        self,
+        match_ids: Sequence[str],
+        bookmakers: Sequence[str],
+        odds: Any,
+        at: Optional[float] = None,
+    ) -> int:
+        """Store a batch of quotes (odds: n x 2 decimal prices); returns how many changed"""
+        if not len(match_ids):
+            return 0
+        at = time.time() if at is None else at
+        with self._lock:
+            rows = np.fromiter((self._row(m) for m in match_ids), dtype=np.int64, count=len(match_ids))
+            books = np.fromiter((self._column(b) for b in bookmakers), dtype=np.int64, count=len(bookmakers))
+            prices = np.asarray(odds, dtype=np.float32).reshape(-1, 2)
+            prices = np.where(prices > 1.0, prices, np.nan).astype(np.float32)
+            # Last quote wins when a batch repeats a (match, bookmaker)
+            cells = rows * len(self._books) + books
+            _, last = np.unique(cells[::-1], return_index=True)
+            keep = np.sort(len(cells) - 1 - last)
+            rows, books, prices = rows[keep], books[keep], prices[keep]
+
+            current = self._latest[rows, books]
+            same = (current == prices) | (np.isnan(current) & np.isnan(prices))
+            changed = ~same.all(axis=1)
+            if not changed.any():
+                return 0
+            rows, books, prices = rows[changed], books[changed], prices[changed]
+            self._latest[rows, books] = prices
+            self._latest_time[rows, books] = at
+            np.add.at(self._match_versions, rows, 1)
+            self._append_log(at, rows, books, prices)
+            self.version += 1
+            return len(rows)
+
+    def record_matches(self, matches: Iterable[Dict[str, Any]], at: Optional[float] = None) -> int:
+        """Record the quotes of a match list and mark exactly its live/upcoming matches open"""
+        match_ids, books, prices = [], [], []
+        open_ids = []
+        for match in matches:
+            if match.get("status") in OPEN_STATUSES:
+                open_ids.append(match["id"])
+            for book, odds1, odds2 in match_quotes(match):
+                match_ids.append(match["id"])
+                books.append(book)
+                prices.append((odds1, odds2))
+        with self._lock:
+            changed = self.record(match_ids, books, np.array(prices, dtype=np.float32).reshape(-1, 2), at)
+            self._open[:] = False
+            self._open[[self._match_rows[m] for m in open_ids if m in self._match_rows]] = True
+            if len(self._match_ids) - int(self._open.sum()) > max(1024, int(self._open.sum())):
+                self.compact()
+            return changed
+
+    def record_snapshot(self, snapshot):
+        """Snapshot listener: every published match list is an odds observation"""
+        self.record_matches(snapshot.matches, at=snapshot.created_at.timestamp())
+
+    def compact(self):
+        """Drop closed matches (their latest prices and history)"""
+        with self._lock:
+            n = len(self._match_ids)
+            keep = np.flatnonzero(self._open[:n])
+            remap = np.full(n, -1, dtype=np.int64)
+            remap[keep] = np.arange(len(keep))
+            self._match_ids = [self._match_ids[i] for i in keep]
+            self._match_rows = {match_id: row for row, match_id in enumerate(self._match_ids)}
+            for name in ("_latest", "_latest_time", "_match_versions", "_open"):
+                array = getattr(self, name)
+                compacted = np.zeros_like(array) if name != "_latest" else np.full_like(array, np.nan)
+                compacted[:len(keep)] = array[keep]
+                setattr(self, name, compacted)
+            size = self._log_size
+            kept = remap[self._log_match[:size]] >= 0
+            count = int(kept.sum())
+            self._log_time[:count] = self._log_time[:size][kept]
+            self._log_book[:count] = self._log_book[:size][kept]
+            self._log_odds[:count] = self._log_odds[:size][kept]
+            self._log_match[:count] = remap[self._log_match[:size][kept]]
+            self._log_size = count
+            self.version += 1
+
+    def _row(self, match_id: str) -> int:
+        row = self._match_rows.get(match_id)
+        if row is None:
+            row = self._match_rows[match_id] = len(self._match_ids)
+            self._match_ids.append(match_id)
+            if row >= len(self._latest):
+                grow = len(self._latest)
+                self._latest = np.concatenate([self._latest, np.full((grow,) + self._latest.shape[1:], np.nan, np.float32)])
+                self._latest_time = np.concatenate([self._latest_time, np.zeros((grow,) + self._latest_time.shape[1:])])
+                self._match_versions = np.concatenate([self._match_versions, np.zeros(grow, np.int64)])
+                self._open = np.concatenate([self._open, np.zeros(grow, bool)])
+        return row
+
+    def _column(self, bookmaker: str) -> int:
+        column = self._book_columns.get(bookmaker)
+        if column is None:
+            column = self._book_columns[bookmaker] = len(self._books)
+            self._books.append(bookmaker)
+            if column >= self._latest.shape[1]:
+                grow = self._latest.shape[1]
+                self._latest = np.concatenate([self._latest, np.full((len(self._latest), grow, 2), np.nan, np.float32)], axis=1)
+                self._latest_time = np.concatenate([self._latest_time, np.zeros((len(self._latest_time), grow))], axis=1)
+        return column
+
+    def _append_log(self, at: float, rows: np.ndarray, books: np.ndarray, prices: np.ndarray):
+        start, end = self._log_size, self._log_size + len(rows)
+        if end > len(self._log_time):
+            capacity = max(end, 2 * len(self._log_time))
+            for name in ("_log_time", "_log_match", "_log_book", "_log_odds"):
+                array = getattr(self, name)
+                grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+                grown[:start] = array[:start]
+                setattr(self, name, grown)
+        self._log_time[start:end] = at
+        self._log_match[start:end] = rows
+        self._log_book[start:end] = books
+        self._log_odds[start:end] = prices
+        self._log_size = end
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @property
+    def bookmakers(self) -> List[str]:
+        return list(self._books)
+
+    def match_version(self, match_id: str) -> int:
+        """Number of price changes of one match (part of analysis fingerprints)"""
+        row = self._match_rows.get(match_id)
+        return int(self._match_versions[row]) if row is not None else 0
+
+    def latest(self, match_ids: Sequence[str]) -> np.ndarray:
+        """Latest prices, (len(match_ids), bookmakers, 2); NaN for unknown matches"""
+        with self._lock:
+            rows = np.array([self._match_rows.get(m, -1) for m in match_ids], dtype=np.int64)
+            prices = self._latest[np.maximum(rows, 0), :len(self._books)].copy()
+            prices[rows < 0] = np.nan
+            return prices
+
+    def open_match_ids(self) -> List[str]:
+        with self._lock:
+            return [self._match_ids[row] for row in np.flatnonzero(self._open[:len(self._match_ids)])]
+
+    def history(self, match_id: str) -> Dict[str, Dict[str, List]]:
+        """Price changes of one match per bookmaker: {"time": [...], "team1": [...], "team2": [...]}"""
+        with self._lock:
+            row = self._match_rows.get(match_id)
+            if row is None:
+                return {}
+            size = self._log_size
+            selected = np.flatnonzero(self._log_match[:size] == row)
+            series: Dict[str, Dict[str, List]] = {}
+            for book in np.unique(self._log_book[selected]):
+                entries = selected[self._log_book[selected] == book]
+                odds = self._log_odds[entries].astype(np.float64)
+                series[self._books[book]] = {
+                    "time": self._log_time[entries].tolist(),
+                    "team1": [None if math.isnan(x) else round(x, 3) for x in odds[:, 0].tolist()],
+                    "team2": [None if math.isnan(x) else round(x, 3) for x in odds[:, 1].tolist()],
+                }
+            return series
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "matches": len(self._match_ids),
+                "open_matches": int(self._open[:len(self._match_ids)].sum()),
+                "bookmakers": len(self._books),
+                "logged_quotes": self._log_size,
+                "version": self.version,
+            }
+
+
+def _rounded(value, digits: int = 4) -> Optional[float]:
+    value = float(value)
+    return None if math.isnan(value) else round(value, digits)
+
+
+@dataclass
+class ValueTable:
+    """Market and model view of n matches; every array has the matches first, outcomes last"""
+    match_ids: List[str]
+    bookmakers: List[str]
+    quotes: np.ndarray          # (n, books, 2) latest prices
+    books_quoting: np.ndarray   # (n,) books with both prices
+    margin: np.ndarray          # (n,) mean overround across those books
+    fair: np.ndarray            # (n, 2) consensus margin-free probabilities
+    best_odds: np.ndarray       # (n, 2) best price per outcome
+    best_book: np.ndarray       # (n, 2) bookmaker column of that price
+    model: np.ndarray           # (n, 2) model probabilities
+    edge: np.ndarray            # (n, 2) model - fair
+    expected_value: np.ndarray  # (n, 2) per unit staked at the best price
+    kelly: np.ndarray           # (n, 2) scaled Kelly stake
+
+    def row(self, index: int, team1: str, team2: str) -> Dict[str, Any]:
+        """JSON-ready value of one match"""
+        if not self.books_quoting[index]:
+            return {"bookmakers": 0}
+        sides = {}
+        for side, team in enumerate((team1, team2)):
+            sides[team] = {
+                "best_odds": _rounded(self.best_odds[index, side], 3),
+                "bookmaker": self.bookmakers[self.best_book[index, side]],
+                "fair_probability": _rounded(self.fair[index, side]),
+                "model_probability": _rounded(self.model[index, side]),
+                "edge": _rounded(self.edge[index, side]),
+                "expected_value": _rounded(self.expected_value[index, side]),
+                "kelly_stake": _rounded(self.kelly[index, side]),
+            }
+        return {
+            "bookmakers": int(self.books_quoting[index]),
+            "margin": _rounded(self.margin[index]),
+            "sides": sides,
+        }
+
+
+def evaluate(odds: np.ndarray, model_team1: np.ndarray, method: str = "proportional") -> Dict[str, np.ndarray]:
+    """Margins, fair probabilities, best prices and value for (n, books, 2) prices at once"""
+    n, books = odds.shape[:2]
+    model = np.stack([model_team1, 1.0 - model_team1], axis=1)
+    # Only markets priced on both sides count towards margins and fair probabilities
+    complete = ~np.isnan(odds).any(axis=2)
+    books_quoting = complete.sum(axis=1)
+    quoted = np.maximum(books_quoting, 1)
+    masked = np.where(complete[:, :, None], odds, np.nan)
+    with np.errstate(invalid="ignore"):
+        margin = np.where(complete, overround(masked), 0.0).sum(axis=1) / quoted
+        fair = np.where(complete[:, :, None], remove_margin(masked, method), 0.0).sum(axis=1) / quoted[:, None]
+    margin[books_quoting == 0] = np.nan
+    fair[books_quoting == 0] = np.nan
+
+    if books:
+        priced = np.where(np.isnan(odds), -np.inf, odds)
+        best_book = priced.argmax(axis=1)
+        best_odds = np.take_along_axis(priced, best_book[:, None, :], axis=1)[:, 0]
+        best_odds[np.isinf(best_odds)] = np.nan
+    else:
+        best_book = np.zeros((n, 2), dtype=np.int64)
+        best_odds = np.full((n, 2), np.nan)
+    return {
+        "books_quoting": books_quoting,
+        "margin": margin,
+        "fair": fair,
+        "best_odds": best_odds,
+        "best_book": best_book,
+        "model": model,
+        "edge": model - fair,
+        "expected_value": model * best_odds - 1.0,
+        "kelly": KELLY_SCALE * kelly_fraction(model, best_odds),
+    }
+
+
+def odds_value_label(expected_value: Optional[float]) -> str:
+    """odds_value of the recommended bet, from its expected value"""
+    if expected_value is None:
+        return "Unknown"
+    if expected_value >= GOOD_VALUE:
+        return "Good"
+    if expected_value >= FAIR_VALUE:
+        return "Fair"
+    return "Poor"
+
+
+class ValueBetFinder:
+    """Value of every match of a snapshot, in one vectorized pass.
+
+    The table is computed once per (snapshot, ratings, odds) version from
+    the batched predictions and the OddsBook's latest prices; a request
+    for one match is then a dict lookup.
+    """
+
+    def __init__(self, odds: OddsBook, predictor: MatchPredictor, method: str = "proportional"):
+        self.odds = odds
+        self.predictor = predictor
+        self.method = method
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple[int, int, int]] = None
+        self._table: Optional[ValueTable] = None
+        self._index: Dict[str, int] = {}
+
+    def for_snapshot(self, snapshot) -> Tuple[ValueTable, Dict[str, int]]:
+        """(table, match id -> table row) for the snapshot's matches"""
+        key = (snapshot.version, self.predictor.engine.version, self.odds.version)
+        with self._lock:
+            if key != self._key:
+                predictions = self.predictor.for_snapshot(snapshot)
+                match_ids = [m["id"] for m in snapshot.matches if m["id"] in predictions]
+                model = np.array([predictions[m].team1_win_probability for m in match_ids], dtype=np.float64)
+                quotes = self.odds.latest(match_ids).astype(np.float64)
+                self._table = ValueTable(match_ids, self.odds.bookmakers, quotes,
+                                         **evaluate(quotes, model, self.method))
+                self._index = {match_id: i for i, match_id in enumerate(match_ids)}
+                self._key = key
+            return self._table, self._index
+
+    def match_value(self, snapshot, match: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        table, index = self.for_snapshot(snapshot)
+        row = index.get(match["id"])
+        if row is None:
+            return None
+        return table.row(row, match["team1"]["name"], match["team2"]["name"])
+
+    def value_bets(self, snapshot, min_expected_value: float = 0.0) -> List[Dict[str, Any]]:
+        """Open-match sides whose best price beats the model, best first"""
+        table, _ = self.for_snapshot(snapshot)
+        if not table.match_ids:
+            return []
+        ev = np.where(np.isnan(table.expected_value), -np.inf, table.expected_value)
+        rows, sides = np.nonzero(ev > min_expected_value)
+        order = np.argsort(-ev[rows, sides], kind="stable")
+        bets = []
+        for row, side in zip(rows[order].tolist(), sides[order].tolist()):
+            match = snapshot.get(table.match_ids[row])
+            if match is None or match.get("status") not in OPEN_STATUSES:
+                continue
+            team = match["team1" if side == 0 else "team2"]["name"]
+            bets.append({
+                "match_id": table.match_ids[row],
+                "team": team,
+                "status": match.get("status"),
+                "best_odds": round(float(table.best_odds[row, side]), 3),
+                "bookmaker": table.bookmakers[table.best_book[row, side]],
+                "model_probability": round(float(table.model[row, side]), 4),
+                "fair_probability": _rounded(table.fair[row, side]),
+                "expected_value": round(float(table.expected_value[row, side]), 4),
+                "kelly_stake": round(float(table.kelly[row, side]), 4),
+            })
+        return bets
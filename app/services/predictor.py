@@ -0,0 +1,86 @@
+"""
+Batched match predictions on top of the rating engine
+"""
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.services.rating_engine import RatingEngine, team_name
+
+# Teams with fewer rated series than this make any prediction high-risk
+MIN_GAMES = 5
+
+
+@dataclass(frozen=True)
+class Prediction:
+    match_id: str
+    team1: str
+    team2: str
+    team1_win_probability: float
+    map_win_probability: Optional[float]
+    team1_rating: float
+    team2_rating: float
+    min_games: int
+
+    @property
+    def winner(self) -> str:
+        return self.team1 if self.team1_win_probability >= 0.5 else self.team2
+
+    @property
+    def win_probability(self) -> float:
+        return max(self.team1_win_probability, 1 - self.team1_win_probability)
+
+    @property
+    def risk_level(self) -> str:
+        if self.min_games < MIN_GAMES or self.win_probability < 0.55:
+            return "High"
+        if self.win_probability < 0.65:
+            return "Medium"
+        return "Low"
+
+
+class MatchPredictor:
+    """Scores every match of a snapshot in one batched rating-engine call.
+
+    Results are cached per (snapshot version, engine version), so a request
+    for a single match is a dict lookup after the first one.
+    """
+
+    def __init__(self, engine: RatingEngine):
+        self.engine = engine
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple[int, int]] = None
+        self._predictions: Dict[str, Prediction] = {}
+
+    def predict_matches(self, matches: Iterable[Dict[str, Any]]) -> Dict[str, Prediction]:
+        matches = list(matches)
+        engine = self.engine
+        team1 = [team_name(m.get("team1")) for m in matches]
+        team2 = [team_name(m.get("team2")) for m in matches]
+        current_maps = [m.get("current_map") if m.get("status") == "live" else None for m in matches]
+
+        with engine.reading():
+            series = engine.predict(team1, team2)
+            on_map = engine.predict(team1, team2, maps=current_maps)
+
+            predictions = {}
+            for i, match in enumerate(matches):
+                predictions[match["id"]] = Prediction(
+                    match_id=match["id"],
+                    team1=team1[i],
+                    team2=team2[i],
+                    team1_win_probability=float(series[i]),
+                    map_win_probability=float(on_map[i]) if current_maps[i] else None,
+                    team1_rating=engine.rating(team1[i]),
+                    team2_rating=engine.rating(team2[i]),
+                    min_games=min(engine.games_played(team1[i]), engine.games_played(team2[i])),
+                )
+        return predictions
+
+    def for_snapshot(self, snapshot) -> Dict[str, Prediction]:
+        with self._lock, self.engine.reading():
+            key = (snapshot.version, self.engine.version)
+            if key != self._key:
+                self._predictions = self.predict_matches(snapshot.matches)
+                self._key = key
+            return self._predictions
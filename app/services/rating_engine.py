@@ -0,0 +1,342 @@
+"""
+Team and map Elo ratings computed with NumPy
+"""
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class MatchResult:
+    """Outcome of one finished series, normalised for the rating engine"""
+    played_at: float
+    team1: str
+    team2: str
+    score: float  # 1.0 team1 won, 0.0 team2 won, 0.5 draw
+    maps: List[Tuple[str, float]] = field(default_factory=list)
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def team_name(team) -> str:
+    return team.get("name", "") if isinstance(team, dict) else str(team or "")
+
+
+def map_key(name: Optional[str]) -> Optional[str]:
+    """Rating-engine map name: "de_Mirage" and "Mirage" are both "mirage" """
+    if not name:
+        return None
+    name = name.strip().lower()
+    return name[3:] if name.startswith("de_") else name
+
+
+def _score_pair(value) -> Optional[Tuple[int, int]]:
+    try:
+        a, b = str(value).split(":")
+        return int(a), int(b)
+    except (TypeError, ValueError):
+        return None
+
+
+def _outcome(a: int, b: int) -> float:
+    return 1.0 if a > b else 0.0 if b > a else 0.5
+
+
+def result_from_match(match: Dict[str, Any]) -> Optional[MatchResult]:
+    """Build a MatchResult from a finished match dict; None if the winner is unknown"""
+    team1, team2 = team_name(match.get("team1")), team_name(match.get("team2"))
+    if not team1 or not team2:
+        return None
+
+    maps = []
+    for played in match.get("maps") or ():
+        a, b = played.get("team1_score"), played.get("team2_score")
+        if a is not None and b is not None and played.get("name"):
+            maps.append((map_key(played["name"]), _outcome(a, b)))
+
+    winner = match.get("winner")
+    if winner:
+        score = 1.0 if winner == team1 else 0.0 if winner == team2 else None
+    else:
+        # Without a winner only a finished series that ended level counts (as a draw);
+        # a winner is never read off the score, which may be an in-progress one
+        maps_score = _score_pair(match.get("maps_score"))
+        drawn = match.get("status") == "finished" and maps_score and maps_score[0] == maps_score[1] > 0
+        score = 0.5 if drawn else None
+    if score is None:
+        return None
+    return MatchResult(_timestamp(match.get("start_time")), team1, team2, score, maps)
+
+
+class RatingEngine:
+    """Elo ratings per team and per (team, map).
+
+    History is processed in rating periods of ``period_seconds``: within a
+    period every expected score is computed from the ratings at the start of
+    the period, and all rating changes are accumulated with ``np.add.at``.
+    That makes each period a handful of array operations instead of a Python
+    loop per match, and :meth:`predict` scores any number of matchups in one
+    vectorized call.
+
+    Reads take the engine lock, so they never see an update half-applied.
+    Long updates of a shared engine run on a :meth:`blank` copy that
+    :meth:`replace_with` then swaps in at once.
+    """
+
+    def __init__(
+        self,
+        k: float = 32.0,
+        map_k: float = 24.0,
+        initial: float = 1500.0,
+        period_seconds: float = 86400.0,
+    ):
+        self.k = k
+        self.map_k = map_k
+        self.initial = initial
+        self.period_seconds = period_seconds
+        self.version = 0
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.team_index: Dict[str, int] = {}
+            self.map_index: Dict[str, int] = {}
+            self.ratings = np.full(0, self.initial)
+            self.map_ratings = np.full((0, 0), self.initial)
+            self.games = np.zeros(0, dtype=np.int64)
+            self.map_games = np.zeros((0, 0), dtype=np.int64)
+            self.version += 1
+
+    def reading(self) -> threading.RLock:
+        """``with engine.reading():`` keeps updates out, so ``version`` and every
+        read inside the block describe the same ratings"""
+        return self._lock
+
+    def blank(self) -> "RatingEngine":
+        """Empty engine with the same parameters"""
+        return RatingEngine(self.k, self.map_k, self.initial, self.period_seconds)
+
+    def replace_with(self, other: "RatingEngine"):
+        """Take over the ratings of ``other`` (which must not be used afterwards) in one step"""
+        with self._lock, other._lock:
+            self.team_index, self.map_index = other.team_index, other.map_index
+            self.ratings, self.map_ratings = other.ratings, other.map_ratings
+            self.games, self.map_games = other.games, other.map_games
+            self.version += 1
+
+    # ------------------------------------------------------------------
+    # Indexing
+    # ------------------------------------------------------------------
+
+    def _team(self, name: str) -> int:
+        index = self.team_index.get(name)
+        if index is None:
+            index = self.team_index[name] = len(self.team_index)
+        return index
+
+    def _map(self, name: str) -> int:
+        index = self.map_index.get(name)
+        if index is None:
+            index = self.map_index[name] = len(self.map_index)
+        return index
+
+    def _grow(self):
+        n_teams, n_maps = len(self.team_index), len(self.map_index)
+        old_teams, old_maps = self.map_ratings.shape
+        if n_teams == old_teams and n_maps == old_maps:
+            return
+        self.ratings = np.concatenate([self.ratings, np.full(n_teams - old_teams, self.initial)])
+        self.games = np.concatenate([self.games, np.zeros(n_teams - old_teams, dtype=np.int64)])
+        map_ratings = np.full((n_teams, n_maps), self.initial)
+        map_ratings[:old_teams, :old_maps] = self.map_ratings
+        map_games = np.zeros((n_teams, n_maps), dtype=np.int64)
+        map_games[:old_teams, :old_maps] = self.map_games
+        self.map_ratings, self.map_games = map_ratings, map_games
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def state(self) -> Dict[str, Any]:
+        """Copy of the rating state, suitable for saving with ``np.savez``"""
+        with self._lock:
+            return {
+                "teams": list(self.team_index),
+                "maps": list(self.map_index),
+                "ratings": self.ratings.copy(),
+                "map_ratings": self.map_ratings.copy(),
+                "games": self.games.copy(),
+                "map_games": self.map_games.copy(),
+            }
+
+    def load_state(self, state: Dict[str, Any]):
+        with self._lock:
+            self.team_index = {name: i for i, name in enumerate(state["teams"])}
+            self.map_index = {name: i for i, name in enumerate(state["maps"])}
+            self.ratings = np.array(state["ratings"], dtype=np.float64)
+            self.map_ratings = np.array(state["map_ratings"], dtype=np.float64).reshape(
+                len(self.team_index), len(self.map_index)
+            )
+            self.games = np.array(state["games"], dtype=np.int64)
+            self.map_games = np.array(state["map_games"], dtype=np.int64).reshape(self.map_ratings.shape)
+            self.version += 1
+
+    # ------------------------------------------------------------------
+    # Fitting
+    # ------------------------------------------------------------------
+
+    def period_of(self, result: MatchResult) -> float:
+        return result.played_at // self.period_seconds
+
+    @staticmethod
+    def expected(r1, r2):
+        return 1.0 / (1.0 + np.power(10.0, (r2 - r1) / 400.0))
+
+    def fit(self, results: Iterable[MatchResult]) -> "RatingEngine":
+        """Recompute all ratings from scratch"""
+        with self._lock:
+            self.reset()
+            self.apply(results)
+        return self
+
+    def apply(self, results: Iterable[MatchResult]):
+        """Apply results on top of the current ratings, oldest period first"""
+        results = sorted(results, key=lambda r: r.played_at)
+        if not results:
+            return
+        with self._lock:
+            self._apply(results)
+
+    def _apply(self, results: List[MatchResult]):
+
+        t1 = np.fromiter((self._team(r.team1) for r in results), dtype=np.int64, count=len(results))
+        t2 = np.fromiter((self._team(r.team2) for r in results), dtype=np.int64, count=len(results))
+        scores = np.fromiter((r.score for r in results), dtype=np.float64, count=len(results))
+        periods = np.fromiter(
+            (self.period_of(r) for r in results), dtype=np.float64, count=len(results)
+        )
+
+        map_rows = [(i, self._map(name), s) for i, r in enumerate(results) for name, s in r.maps]
+        self._grow()
+        map_match = np.array([m[0] for m in map_rows], dtype=np.int64)
+        map_ids = np.array([m[1] for m in map_rows], dtype=np.int64)
+        map_scores = np.array([m[2] for m in map_rows], dtype=np.float64)
+
+        bounds = np.flatnonzero(np.diff(periods)) + 1
+        starts = np.concatenate([[0], bounds])
+        ends = np.concatenate([bounds, [len(results)]])
+        # Map rows follow match order, so each period's maps are a contiguous slice
+        map_starts = np.searchsorted(map_match, starts)
+        map_ends = np.searchsorted(map_match, ends)
+        for start, end, map_start, map_end in zip(starts, ends, map_starts, map_ends):
+            self._apply_period(t1[start:end], t2[start:end], scores[start:end])
+            if map_end > map_start:
+                rows = map_match[map_start:map_end]
+                self._apply_map_period(
+                    t1[rows], t2[rows], map_ids[map_start:map_end], map_scores[map_start:map_end]
+                )
+        self.version += 1
+
+    def _apply_period(self, t1, t2, scores):
+        delta = self.k * (scores - self.expected(self.ratings[t1], self.ratings[t2]))
+        np.add.at(self.ratings, t1, delta)
+        np.add.at(self.ratings, t2, -delta)
+        np.add.at(self.games, t1, 1)
+        np.add.at(self.games, t2, 1)
+
+    def _apply_map_period(self, t1, t2, maps, scores):
+        flat = self.map_ratings.reshape(-1)
+        n_maps = self.map_ratings.shape[1]
+        i1, i2 = t1 * n_maps + maps, t2 * n_maps + maps
+        delta = self.map_k * (scores - self.expected(flat[i1], flat[i2]))
+        np.add.at(flat, i1, delta)
+        np.add.at(flat, i2, -delta)
+        games = self.map_games.reshape(-1)
+        np.add.at(games, i1, 1)
+        np.add.at(games, i2, 1)
+
+    # ------------------------------------------------------------------
+    # Predictions
+    # ------------------------------------------------------------------
+
+    def _indices(self, names: Sequence[str]) -> np.ndarray:
+        """Team indices; unknown teams map to -1 (rated at ``initial``)"""
+        return np.fromiter((self.team_index.get(n, -1) for n in names), dtype=np.int64, count=len(names))
+
+    def _lookup(self, values: np.ndarray, idx: np.ndarray) -> np.ndarray:
+        out = np.full(len(idx), self.initial)
+        known = idx >= 0
+        out[known] = values[idx[known]]
+        return out
+
+    def predict(
+        self,
+        team1: Sequence[str],
+        team2: Sequence[str],
+        maps: Optional[Sequence[Optional[str]]] = None,
+    ) -> np.ndarray:
+        """P(team1 wins) for every pair in one vectorized call.
+
+        With ``maps`` given, pairs that have a map use the (team, map)
+        ratings instead of the overall team ratings. Map names are matched
+        through :func:`map_key`, so "de_mirage" finds "mirage".
+        """
+        with self._lock:
+            i1, i2 = self._indices(team1), self._indices(team2)
+            r1, r2 = self._lookup(self.ratings, i1), self._lookup(self.ratings, i2)
+            if maps is not None and self.map_ratings.size:
+                m = np.fromiter((self.map_index.get(map_key(x), -1) for x in maps), dtype=np.int64, count=len(maps))
+                on_map = (m >= 0) & (i1 >= 0) & (i2 >= 0)
+                r1[on_map] = self.map_ratings[i1[on_map], m[on_map]]
+                r2[on_map] = self.map_ratings[i2[on_map], m[on_map]]
+        return self.expected(r1, r2)
+
+    def predict_maps(self, team1: str, team2: str, maps: Sequence[str]) -> np.ndarray:
+        """P(team1 wins) on each map from the (team, map) ratings; NaN where either team has not played it"""
+        out = np.full(len(maps), np.nan)
+        with self._lock:
+            i1, i2 = self.team_index.get(team1), self.team_index.get(team2)
+            if i1 is None or i2 is None or not self.map_ratings.size:
+                return out
+            m = np.fromiter((self.map_index.get(map_key(x), -1) for x in maps), dtype=np.int64, count=len(maps))
+            rated = m >= 0
+            rated[rated] = (self.map_games[i1, m[rated]] > 0) & (self.map_games[i2, m[rated]] > 0)
+            out[rated] = self.expected(self.map_ratings[i1, m[rated]], self.map_ratings[i2, m[rated]])
+        return out
+
+    def predict_index(self, i1: np.ndarray, i2: np.ndarray) -> np.ndarray:
+        """P(team1 wins) for arrays of known team indices"""
+        with self._lock:
+            return self.expected(self.ratings[i1], self.ratings[i2])
+
+    def rating(self, team: str) -> float:
+        with self._lock:
+            index = self.team_index.get(team)
+            return float(self.ratings[index]) if index is not None else self.initial
+
+    def map_pool_strength(self, team: str) -> float:
+        """Average expected map win rate against an average team, on a 0-10 scale"""
+        with self._lock:
+            index = self.team_index.get(team)
+            if index is None or not self.map_ratings.size:
+                return 5.0
+            played = self.map_games[index] > 0
+            if not played.any():
+                return 5.0
+            return float(self.expected(self.map_ratings[index, played], self.initial).mean() * 10)
+
+    def games_played(self, team: str) -> int:
+        with self._lock:
+            index = self.team_index.get(team)
+            return int(self.games[index]) if index is not None else 0
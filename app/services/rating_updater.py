@@ -0,0 +1,182 @@
+"""
+Incremental rating updates from the match archive
+
+Usage for backfills (full rebuild from the archive):
+    python -m app.services.rating_updater --rebuild
+"""
+import argparse
+import json
+import os
+import threading
+from dataclasses import asdict
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.services.match_archive import MatchArchive
+from app.services.rating_engine import MatchResult, RatingEngine, result_from_match
+
+
+class RatingUpdater:
+    """Keeps a RatingEngine in sync with the archive without replaying it.
+
+    The persisted state is the rating state at the start of the open
+    rating periods (the newest ``grace_periods`` of them), the results of
+    those periods and a watermark: the archive sequence number of the last
+    applied match. :meth:`update` reads only archive rows past the
+    watermark, folds periods that have closed into the saved state and
+    re-applies the open periods on top, which gives the same ratings as a
+    full rebuild. Keeping more than one period open lets matches that
+    finish out of start order around a period boundary (normal for a live
+    listing) land without a rebuild; only a result older than every open
+    period (e.g. from a backfill) triggers :meth:`rebuild`.
+    """
+
+    def __init__(
+        self,
+        engine: RatingEngine,
+        archive: MatchArchive,
+        state_path: str = "ratings_state.npz",
+        grace_periods: int = 2,
+    ):
+        self.engine = engine
+        self.archive = archive
+        self.state_path = state_path
+        self.grace_periods = max(1, grace_periods)
+        self.watermark = 0
+        self.rebuilds = 0
+        # Oldest open period; everything before it is folded into the saved state
+        self.open_period: Optional[float] = None
+        self._base = engine.state()
+        self._pending: List[MatchResult] = []
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self) -> bool:
+        """Restore the saved state; False if there is none"""
+        if not os.path.exists(self.state_path):
+            return False
+        with self._lock, np.load(self.state_path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            self._base = {
+                "teams": meta["teams"],
+                "maps": meta["maps"],
+                "ratings": data["ratings"],
+                "map_ratings": data["map_ratings"],
+                "games": data["games"],
+                "map_games": data["map_games"],
+            }
+            self.watermark = meta["watermark"]
+            self.open_period = meta["open_period"]
+            self._pending = [MatchResult(**r) for r in meta["pending"]]
+            self._restore()
+        return True
+
+    def save(self):
+        meta = {
+            "teams": self._base["teams"],
+            "maps": self._base["maps"],
+            "watermark": self.watermark,
+            "open_period": self.open_period,
+            "pending": [asdict(r) for r in self._pending],
+        }
+        tmp_path = f"{self.state_path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            meta=np.array(json.dumps(meta)),
+            ratings=self._base["ratings"],
+            map_ratings=self._base["map_ratings"],
+            games=self._base["games"],
+            map_games=self._base["map_games"],
+        )
+        os.replace(tmp_path, self.state_path)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def update(self) -> int:
+        """Apply archive rows past the watermark; returns the number of new results"""
+        with self._lock:
+            new, last_seq = self._read(self.watermark)
+            if last_seq == self.watermark:
+                return 0
+            if self.open_period is not None and any(
+                self.engine.period_of(r) < self.open_period for r in new
+            ):
+                return self._rebuild()
+            self._advance(self._pending + new, last_seq)
+            return len(new)
+
+    def rebuild(self) -> int:
+        """Recompute all ratings from the whole archive"""
+        with self._lock:
+            return self._rebuild()
+
+    def _rebuild(self) -> int:
+        self.rebuilds += 1
+        self._base = self.engine.blank().state()
+        self.open_period = None
+        self._pending = []
+        results, last_seq = self._read(0)
+        self._advance(results, last_seq)
+        return len(results)
+
+    def _read(self, seq: int) -> Tuple[List[MatchResult], int]:
+        results = []
+        last_seq = seq
+        for last_seq, match in self.archive.iter_since(seq):
+            result = result_from_match(match)
+            if result is not None:
+                results.append(result)
+        return results, last_seq
+
+    def _advance(self, results: List[MatchResult], last_seq: int):
+        # Built aside and swapped in at once: request threads read self.engine meanwhile
+        engine = self.engine.blank()
+        engine.load_state(self._base)
+        if results:
+            newest = max(engine.period_of(r) for r in results)
+            # Never reopen a period that is already folded into the saved state
+            first_open = newest - (self.grace_periods - 1)
+            if self.open_period is not None:
+                first_open = max(first_open, self.open_period)
+            closed = [r for r in results if engine.period_of(r) < first_open]
+            self._pending = [r for r in results if engine.period_of(r) >= first_open]
+            self.open_period = first_open
+            if closed:
+                engine.apply(closed)
+                self._base = engine.state()
+            engine.apply(self._pending)
+        self.engine.replace_with(engine)
+        self.watermark = last_seq
+        self.save()
+
+    def _restore(self):
+        engine = self.engine.blank()
+        engine.load_state(self._base)
+        engine.apply(self._pending)
+        self.engine.replace_with(engine)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update team ratings from the match archive")
+    parser.add_argument("--archive", default=os.getenv("ARCHIVE_DB_PATH", "match_archive.db"))
+    parser.add_argument("--state", default=os.getenv("RATINGS_STATE_PATH", "ratings_state.npz"))
+    parser.add_argument("--rebuild", action="store_true", help="recompute from the whole archive")
+    args = parser.parse_args()
+
+    updater = RatingUpdater(RatingEngine(), MatchArchive(args.archive), args.state)
+    if args.rebuild or not updater.load():
+        count = updater.rebuild()
+        print(f"Rebuilt ratings from {count} archived results")
+    else:
+        count = updater.update()
+        print(f"Applied {count} new results (watermark {updater.watermark})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Background refresh of the published match snapshot
+"""
+import asyncio
+import inspect
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from app.services.snapshot import MatchSnapshot, SnapshotCache
+
+Matches = List[Dict[str, Any]]
+MatchSource = Callable[[], Union[Matches, Awaitable[Matches]]]
+LiveSource = Callable[[Matches], Union[Matches, Awaitable[Matches]]]
+
+ACTIVE_STATUSES = ("live", "upcoming")
+
+
+async def _call(fn, *args):
+    result = fn(*args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+class RefreshScheduler:
+    """Refreshes matches in a background thread and publishes new snapshots.
+
+    Live matches are refreshed every ``live_interval`` seconds through
+    ``refresh_live``; the full list (upcoming matches included) is reloaded
+    every ``full_interval`` seconds through ``load_all``. Matches that finish
+    with a known winner are handed to ``on_finished`` and left out of the
+    next snapshot. A live match that drops off the full list is looked up
+    once more through ``refresh_live``; unless that confirms its result it
+    is only left out, never archived. All refreshes run one at a time on
+    the scheduler's own event loop, so request handlers only ever read
+    ``snapshots.current()``.
+    """
+
+    def __init__(
+        self,
+        snapshots: SnapshotCache,
+        load_all: MatchSource,
+        refresh_live: LiveSource,
+        live_interval: float = 15.0,
+        full_interval: float = 300.0,
+        on_finished: Optional[Callable[[Matches], Any]] = None,
+    ):
+        self.snapshots = snapshots
+        self.load_all = load_all
+        self.refresh_live = refresh_live
+        self.live_interval = live_interval
+        self.full_interval = full_interval
+        self.on_finished = on_finished
+        # One event loop thread for every refresh, periodic or on demand: the
+        # sources' pooled HTTP clients must stay on a single loop
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._thread_lock = threading.Lock()
+        self._stop: Optional[asyncio.Event] = None
+        self._periodic: Optional[Future] = None
+        # Last snapshot published here and its match list before enrichment
+        self._snapshot: Optional[MatchSnapshot] = None
+        self._matches: Matches = []
+        self._last_full: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether periodic refreshes are on"""
+        return self._periodic is not None and not self._periodic.done()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._lock = asyncio.Lock()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="match-refresh", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def start(self):
+        if self.running:
+            return
+        loop = self._ensure_loop()
+        self._stop = asyncio.Event()
+        self._periodic = asyncio.run_coroutine_threadsafe(self._main(), loop)
+
+    def stop(self, timeout: float = 10.0):
+        """Stop periodic refreshes; refresh_now() keeps working"""
+        if not self.running:
+            return
+        self._loop.call_soon_threadsafe(self._stop.set)
+        try:
+            self._periodic.result(timeout)
+        except Exception as e:
+            print(f"Error stopping the refresh scheduler: {e}")
+        self._periodic = None
+
+    def close(self, timeout: float = 10.0):
+        """Stop periodic refreshes and the event loop thread"""
+        self.stop(timeout)
+        with self._thread_lock:
+            if self._thread is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout)
+                self._loop.close()
+                self._thread = self._loop = self._lock = None
+
+    def refresh_now(self, full: bool = True, timeout: float = 60.0) -> MatchSnapshot:
+        """Run a refresh right away (on the scheduler's loop) and wait for it to be published"""
+        future = asyncio.run_coroutine_threadsafe(self._refresh(full), self._ensure_loop())
+        return future.result(timeout)
+
+    async def _main(self):
+        loop_time = self._loop.time
+        next_full = loop_time()
+        next_live = next_full + self.live_interval
+        if self._last_full is not None:
+            # A full refresh just ran (e.g. the one that seeded the first snapshot)
+            next_full += max(0.0, self._last_full + self.full_interval - time.monotonic())
+        while not self._stop.is_set():
+            now = loop_time()
+            try:
+                if now >= next_full:
+                    await self._refresh(full=True)
+                    next_full = now + self.full_interval
+                    next_live = now + self.live_interval
+                elif now >= next_live:
+                    await self._refresh(full=False)
+                    next_live = now + self.live_interval
+            except Exception as e:
+                print(f"Error refreshing matches: {e}")
+                next_live = now + self.live_interval
+            try:
+                await asyncio.wait_for(self._stop.wait(), max(0.0, min(next_full, next_live) - loop_time()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh(self, full: bool) -> MatchSnapshot:
+        async with self._lock:
+            current = self.snapshots.peek()
+            base = self._base(current)
+            if full or current is None:
+                matches = await _call(self.load_all)
+                self._last_full = time.monotonic()
+                seen = {m["id"] for m in matches}
+                vanished = [m for m in base if m["status"] == "live" and m["id"] not in seen]
+                if vanished:
+                    # Only a confirmed final result is archived; otherwise they are just dropped
+                    matches = matches + [
+                        m for m in await _call(self.refresh_live, vanished) if m["status"] == "finished"
+                    ]
+            else:
+                live = [m for m in base if m["status"] == "live"]
+                if not live:
+                    return current
+                updated = {m["id"]: m for m in await _call(self.refresh_live, live)}
+                matches = [updated.get(m["id"], m) for m in base]
+            return self._publish(current, matches)
+
+    def _base(self, current: Optional[MatchSnapshot]) -> Matches:
+        """Match list of ``current`` as published here, without the fields enrichers added"""
+        if current is None:
+            return []
+        if current is self._snapshot:
+            return self._matches
+        return list(current.matches)
+
+    def _publish(self, current: Optional[MatchSnapshot], matches: Matches) -> MatchSnapshot:
+        finished = [m for m in matches if m["status"] == "finished" and m.get("winner")]
+        active = [m for m in matches if m["status"] in ACTIVE_STATUSES]
+        if finished and self.on_finished is not None:
+            self.on_finished(finished)
+        # Keep the version stable when nothing changed
+        if current is not None and current is self._snapshot and active == self._matches:
+            return current
+        self._snapshot = self.snapshots.publish(active)
+        self._matches = active
+        return self._snapshot
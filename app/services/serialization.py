@@ -0,0 +1,134 @@
+"""
+Serialize-once response bodies with precomputed compressed variants
+"""
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional speedup
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = 512
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def dumps(payload: Any) -> bytes:
+    """JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, ensure_ascii=False, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def accepted_encodings(accept_encoding: Optional[str]) -> Dict[str, float]:
+    """Content codings from an Accept-Encoding header with their q-values"""
+    codings = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[name.strip().lower()] = q
+    return codings
+
+
+@dataclass(frozen=True)
+class EncodedBody:
+    """A response body serialized once, plus its compressed variants"""
+    raw: bytes
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def encode(cls, payload: Any) -> "EncodedBody":
+        raw = dumps(payload)
+        variants = {}
+        if len(raw) >= COMPRESS_MIN_SIZE:
+            if brotli is not None:
+                variants["br"] = brotli.compress(raw, quality=BROTLI_QUALITY)
+            variants["gzip"] = gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+        return cls(raw, variants)
+
+    def select(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """(body, content coding) best matching the client's Accept-Encoding"""
+        accepted = accepted_encodings(accept_encoding)
+        for coding in ("br", "gzip"):
+            if coding in self.variants and accepted.get(coding, accepted.get("*", 0)) > 0:
+                return self.variants[coding], coding
+        return self.raw, None
+
+    def headers(self, etag: str, coding: Optional[str]) -> Dict[str, str]:
+        """Headers for the selected variant; each coding gets its own strong ETag"""
+        headers = {"Cache-Control": "no-cache"}
+        if self.variants:
+            headers["Vary"] = "Accept-Encoding"
+        if coding is not None:
+            headers["Content-Encoding"] = coding
+            etag = f'{etag[:-1]}-{coding}"'
+        headers["ETag"] = etag
+        return headers
+
+
+class BodyCache:
+    """Small LRU of EncodedBody objects keyed on whatever identifies the content
+    (typically a snapshot version plus the query)"""
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, EncodedBody]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_encode(self, key: Hashable, build: Callable[[], Any]) -> EncodedBody:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return body
+        # Encode outside the lock; a concurrent miss just encodes twice
+        body = EncodedBody.encode(build())
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return body
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "orjson": orjson is not None,
+            "brotli": brotli is not None,
+        }
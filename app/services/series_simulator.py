@@ -0,0 +1,426 @@
+"""
+Monte Carlo series simulator: map count, total rounds and exact score distributions
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import repeat
+from math import comb
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.services.live_win_probability import (
+    OVERTIME_ROUNDS,
+    OVERTIME_START,
+    ROUNDS_TO_WIN,
+    InPlayModel,
+    best_of,
+    map_finished,
+)
+from app.services.predictor import Prediction
+from app.services.rating_engine import RatingEngine, map_key, team_name
+
+SIMULATIONS = int(os.getenv("SERIES_SIMULATIONS", 100_000))
+SEED = int(os.getenv("SERIES_SEED", 0))
+# Worker processes for simulate_many(); 0 or 1 simulates in the calling thread
+PROCESSES = int(os.getenv("SIMULATION_PROCESSES", 0))
+
+# Active Duty map pool, in the naming of the rating engine (lowercase HLTV map names)
+ACTIVE_DUTY = ("ancient", "anubis", "dust2", "inferno", "mirage", "nuke", "train")
+# HLTV veto order per format: (team, action), team 0 being team1
+VETO = {
+    1: ((0, "ban"), (1, "ban"), (0, "ban"), (1, "ban"), (0, "ban"), (1, "ban")),
+    2: ((0, "ban"), (1, "ban"), (0, "pick"), (1, "pick")),
+    3: ((0, "ban"), (1, "ban"), (0, "pick"), (1, "pick"), (0, "ban"), (1, "ban")),
+    5: ((0, "ban"), (1, "ban"), (0, "pick"), (1, "pick"), (0, "pick"), (1, "pick")),
+    7: ((0, "pick"), (1, "pick"), (0, "pick"), (1, "pick"), (0, "pick"), (1, "pick")),
+}
+# Usual bookmaker lines per format
+MAPS_LINES = {3: 2.5, 5: 3.5}
+ROUNDS_LINES = {1: 21.5, 2: 44.5, 3: 55.5, 5: 92.5}
+
+_OVERTIME_TO_WIN = OVERTIME_ROUNDS + 1
+
+
+def veto(map_probabilities: Mapping[str, float], maps: int) -> List[str]:
+    """Maps of a best-of-``maps`` in playing order.
+
+    Follows the HLTV veto of the format with each team banning its weakest
+    and picking its strongest map (by P(team1 wins) from ``map_probabilities``);
+    the leftover maps are deciders.
+    """
+    remaining = list(map_probabilities)
+    picks = []
+    for team, action in VETO.get(maps, ()):
+        if len(remaining) <= 1:
+            break
+        strength = (lambda m: map_probabilities[m]) if team == 0 else (lambda m: 1 - map_probabilities[m])
+        choice = (min if action == "ban" else max)(remaining, key=strength)
+        remaining.remove(choice)
+        if action == "pick":
+            picks.append(choice)
+    return (picks + remaining)[:maps]
+
+
+@dataclass
+class SeriesSpec:
+    """Everything simulate_series() needs; plain data so it can be sent to a worker process"""
+    match_id: str
+    best_of: int
+    maps: List[str]                   # playing order, maps already played first
+    map_probabilities: List[float]    # P(team1 wins) of each map
+    round_probabilities: List[float]  # per-round probability giving that map probability
+    played: List[Tuple[int, int]] = field(default_factory=list)  # final round scores of played maps
+    decided: List[bool] = field(default_factory=list)  # then maps with a known winner (True: team1) only
+    current: Optional[Tuple[int, int]] = None  # round score of the map in progress (the next one)
+    seed: int = SEED
+
+
+def _race(r: float, x: int, y: int, target: int) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Final scores of a race to ``target`` rounds from x:y that goes to overtime at one short each.
+
+    Returns (win, lose, tie): win[k] = P(team1 wins target:(y + k)),
+    lose[k] = P(team2 wins (x + k):target), tie = P((target - 1):(target - 1)).
+    """
+    need1, need2 = target - x, target - y
+    k = np.arange(target - 1 - y)
+    win = np.array([comb(need1 - 1 + i, i) for i in k], dtype=np.float64) * r ** need1 * (1 - r) ** k
+    k = np.arange(target - 1 - x)
+    lose = np.array([comb(need2 - 1 + i, i) for i in k], dtype=np.float64) * (1 - r) ** need2 * r ** k
+    tie = comb(need1 - 1 + need2 - 1, need1 - 1) * r ** (need1 - 1) * (1 - r) ** (need2 - 1)
+    return win, lose, tie
+
+
+def _sample_race(rng: np.random.Generator, n: int, r: float, x: int, y: int, target: int, decided: bool = False):
+    """n outcomes of _race(): (team1 rounds, team2 rounds, tied) relative to the race start.
+
+    With ``decided``, outcomes are drawn given that the race does not end tied.
+    """
+    win, lose, tie = _race(r, x, y, target)
+    cumulative = np.cumsum(np.concatenate([win, lose, [0.0 if decided else tie]]))
+    outcome = np.searchsorted(cumulative, rng.random(n) * cumulative[-1], side="right")
+    outcome = np.minimum(outcome, len(cumulative) - 1)
+    won = outcome < len(win)
+    lost = ~won & (outcome < len(win) + len(lose))
+    rounds1 = np.where(won, target, np.where(lost, x + outcome - len(win), target - 1))
+    rounds2 = np.where(won, y + outcome, np.where(lost, target, target - 1))
+    return rounds1, rounds2, ~won & ~lost
+
+
+def sample_map(rng: np.random.Generator, n: int, r: float, rounds: Tuple[int, int] = (0, 0)):
+    """Final round scores (team1, team2) of n simulations of one MR12 map from a round score.
+
+    The final score is drawn from its exact distribution (negative
+    binomial race to 13, then MR3 overtimes with a geometric number of
+    3:3 draws) instead of round by round.
+    """
+    x, y = rounds
+    if x >= OVERTIME_START and y >= OVERTIME_START:
+        base = OVERTIME_START + (min(x, y) - OVERTIME_START) // OVERTIME_ROUNDS * OVERTIME_ROUNDS
+        rounds1, rounds2, tied = _sample_race(rng, n, r, x - base, y - base, _OVERTIME_TO_WIN)
+        # A tied overtime ends one round short each, where the next one starts
+        overtime_start = base + OVERTIME_ROUNDS
+    else:
+        base = 0
+        rounds1, rounds2, tied = _sample_race(rng, n, r, x, y, ROUNDS_TO_WIN)
+        overtime_start = OVERTIME_START
+    rounds1, rounds2 = rounds1 + base, rounds2 + base
+
+    ties = int(tied.sum())
+    if ties:
+        _, _, draw = _race(r, 0, 0, _OVERTIME_TO_WIN)
+        # Further drawn overtimes, then the deciding one
+        extra = rng.geometric(1 - draw, ties) - 1
+        deciding1, deciding2, _ = _sample_race(rng, ties, r, 0, 0, _OVERTIME_TO_WIN, decided=True)
+        start = overtime_start + OVERTIME_ROUNDS * extra
+        rounds1[tied] = start + deciding1
+        rounds2[tied] = start + deciding2
+    return rounds1, rounds2
+
+
+def _pair(value: Any) -> Optional[Tuple[int, int]]:
+    try:
+        a, b = str(value).split(":")
+        return int(a), int(b)
+    except (TypeError, ValueError):
+        return None
+
+
+def _match_key(match_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(match_id.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+@dataclass
+class SeriesDistribution:
+    """Simulated outcome counts of one series"""
+    match_id: str
+    best_of: int
+    maps: List[str]
+    map_probabilities: List[float]
+    simulations: int
+    seed: int
+    team1_wins: int
+    draws: int
+    map_counts: np.ndarray    # [k] series that lasted k maps
+    map_played: np.ndarray    # [i] series in which the i-th map was played
+    scores: Dict[str, int]    # "2:1" -> series with that map score
+    total_rounds: np.ndarray  # [k] series with k rounds in total
+
+    def probability_over_maps(self, line: float) -> float:
+        return float(self.map_counts[int(line) + 1:].sum()) / self.simulations
+
+    def probability_over_rounds(self, line: float) -> float:
+        return float(self.total_rounds[int(line) + 1:].sum()) / self.simulations
+
+    def rounds_quantile(self, q: float) -> int:
+        return int(np.searchsorted(np.cumsum(self.total_rounds), q * self.simulations))
+
+    def markets(self) -> List[Dict[str, Any]]:
+        """Over/under probabilities at the usual lines of the format"""
+        markets = []
+        if self.best_of in MAPS_LINES:
+            line = MAPS_LINES[self.best_of]
+            over = self.probability_over_maps(line)
+            markets += [{"bet": f"Over {line} Maps", "probability": round(over, 4)},
+                        {"bet": f"Under {line} Maps", "probability": round(1 - over, 4)}]
+        if self.best_of in ROUNDS_LINES:
+            line = ROUNDS_LINES[self.best_of]
+            over = self.probability_over_rounds(line)
+            markets += [{"bet": f"Total Rounds Over {line}", "probability": round(over, 4)},
+                        {"bet": f"Total Rounds Under {line}", "probability": round(1 - over, 4)}]
+        return markets
+
+    def alternative_bets(self) -> List[str]:
+        """The likelier side of each over/under market"""
+        markets = self.markets()
+        return [max(pair, key=lambda m: m["probability"])["bet"] for pair in zip(markets[::2], markets[1::2])]
+
+    def to_dict(self, distribution: bool = False) -> Dict[str, Any]:
+        """JSON-ready summary; with ``distribution``, also the probability of every round total"""
+        n = self.simulations
+        series = {"team1": round(self.team1_wins / n, 4),
+                  "team2": round((n - self.team1_wins - self.draws) / n, 4)}
+        if self.best_of % 2 == 0:
+            series["draw"] = round(self.draws / n, 4)
+        rounds = {
+            "mean": round(float(np.arange(len(self.total_rounds)) @ self.total_rounds) / n, 2),
+            "p10": self.rounds_quantile(0.1),
+            "median": self.rounds_quantile(0.5),
+            "p90": self.rounds_quantile(0.9),
+        }
+        if distribution:
+            rounds["distribution"] = {
+                str(k): round(int(c) / n, 5) for k, c in enumerate(self.total_rounds.tolist()) if c
+            }
+        return {
+            "simulations": n,
+            "seed": self.seed,
+            "maps": [
+                {"name": name, "team1_win_probability": round(p, 4), "played_probability": round(int(c) / n, 4)}
+                for name, p, c in zip(self.maps, self.map_probabilities, self.map_played.tolist())
+            ],
+            "series_win_probability": series,
+            "map_count": {str(k): round(int(c) / n, 4) for k, c in enumerate(self.map_counts.tolist()) if c},
+            "exact_scores": {score: round(c / n, 4) for score, c in sorted(self.scores.items(), key=lambda s: -s[1])},
+            "total_rounds": rounds,
+            "markets": self.markets(),
+        }
+
+
+def simulate_series(spec: SeriesSpec, simulations: int = SIMULATIONS) -> SeriesDistribution:
+    """Simulate a series ``simulations`` times, all at once per map.
+
+    The random stream depends only on (spec.seed, match id), so a match
+    gets the same result whether it is simulated alone, in a batch or in
+    a worker process.
+    """
+    rng = np.random.default_rng(np.random.SeedSequence([spec.seed, _match_key(spec.match_id)]))
+    n, maps = simulations, spec.best_of
+    rounds1 = np.zeros((n, maps), dtype=np.int64)
+    rounds2 = np.zeros((n, maps), dtype=np.int64)
+    for i, (a, b) in enumerate(spec.played[:maps]):
+        rounds1[:, i], rounds2[:, i] = a, b
+    settled = len(spec.played) + len(spec.decided)
+    for i in range(len(spec.played), maps):
+        start = spec.current if i == settled and spec.current else (0, 0)
+        rounds1[:, i], rounds2[:, i] = sample_map(rng, n, spec.round_probabilities[i], start)
+        if i < settled:
+            # Only the winner is known: keep the simulated score, oriented to that winner
+            flip = (rounds1[:, i] > rounds2[:, i]) != spec.decided[i - len(spec.played)]
+            rounds1[flip, i], rounds2[flip, i] = rounds2[flip, i], rounds1[flip, i]
+
+    won = rounds1 > rounds2
+    wins1, wins2 = np.cumsum(won, axis=1), np.cumsum(~won, axis=1)
+    need = maps // 2 + 1
+    over = (wins1 >= need) | (wins2 >= need)
+    last = np.where(over.any(axis=1), over.argmax(axis=1), maps - 1)
+    played = np.arange(maps) <= last[:, None]
+    rows = np.arange(n)
+    score1, score2 = wins1[rows, last], wins2[rows, last]
+    totals = ((rounds1 + rounds2) * played).sum(axis=1)
+
+    codes, counts = np.unique(score1 * (maps + 1) + score2, return_counts=True)
+    return SeriesDistribution(
+        match_id=spec.match_id,
+        best_of=maps,
+        maps=list(spec.maps),
+        map_probabilities=list(spec.map_probabilities),
+        simulations=n,
+        seed=spec.seed,
+        team1_wins=int((score1 >= need).sum()),
+        draws=int((score1 == score2).sum()),
+        map_counts=np.bincount(last + 1, minlength=maps + 1),
+        map_played=played.sum(axis=0),
+        scores={f"{c // (maps + 1)}:{c % (maps + 1)}": int(k) for c, k in zip(codes.tolist(), counts.tolist())},
+        total_rounds=np.bincount(totals),
+    )
+
+
+class SeriesSimulator:
+    """Series outcome distributions for current matches.
+
+    Per-map probabilities come from the (team, map) ratings where both
+    teams have played the map, else from the per-map probability implied
+    by the pre-match series probability; the maps are ordered by veto()
+    over ``pool``. Maps already played (the match's "maps" list) are kept
+    as they ended, maps only counted in a live match's maps_score keep
+    their winner, and a live map continues from its round score.
+
+    :meth:`simulate` keeps the last ``cache_size`` distributions per
+    (match, snapshot version, ratings version, simulations), so rebuilding
+    an analysis of an unchanged match does not simulate it again.
+    """
+
+    def __init__(
+        self,
+        engine: RatingEngine,
+        model: InPlayModel,
+        simulations: int = SIMULATIONS,
+        seed: int = SEED,
+        processes: int = PROCESSES,
+        pool: Iterable[str] = ACTIVE_DUTY,
+        cache_size: int = 256,
+    ):
+        self.engine = engine
+        self.model = model
+        self.simulations = simulations
+        self.seed = seed
+        self.processes = processes
+        self.pool = tuple(pool)
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple, Optional[SeriesDistribution]]" = OrderedDict()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._workers = 0
+
+    def spec(self, match: Dict[str, Any], prediction: Prediction) -> Optional[SeriesSpec]:
+        """Simulation input of a live or upcoming match (None for other matches or unknown formats)"""
+        maps = best_of(match)
+        if maps is None or match.get("status") not in ("live", "upcoming"):
+            return None
+        team1, team2 = team_name(match.get("team1")), team_name(match.get("team2"))
+        known, played = [], []
+        for entry in match.get("maps") or ():
+            name = map_key(entry.get("name"))
+            if name and entry.get("team1_score") is not None and entry.get("team2_score") is not None:
+                known.append(name)
+                played.append((int(entry["team1_score"]), int(entry["team2_score"])))
+        known, played = known[:maps], played[:maps]
+
+        decided, current_map, current = [], None, None
+        if match.get("status") == "live":
+            # Maps counted in maps_score but missing from the "maps" list: winner known, score not
+            series_score = _pair(match.get("maps_score"))
+            need = maps // 2 + 1
+            if series_score and 0 <= min(series_score) < need:
+                won1 = sum(a > b for a, b in played)
+                decided = ([True] * max(0, series_score[0] - won1)
+                           + [False] * max(0, series_score[1] - (len(played) - won1)))
+                decided = decided[:maps - len(played)]
+            rounds = _pair(match.get("rounds_score"))
+            if map_key(match.get("current_map")) and rounds and not map_finished(rounds):
+                if len(played) + len(decided) < maps:
+                    current_map, current = map_key(match["current_map"]), rounds
+
+        names = list(dict.fromkeys(list(self.pool) + known + ([current_map] if current_map else [])))
+        default = self.model.map_probability_for(prediction.team1_win_probability, maps)
+        rated = self.engine.predict_maps(team1, team2, names)
+        probabilities = dict(zip(names, np.where(np.isnan(rated), default, rated).tolist()))
+        rest = veto({m: p for m, p in probabilities.items() if m not in known and m != current_map}, maps)
+        order = known + rest[:len(decided)] + ([current_map] if current_map else []) + rest[len(decided):]
+        order = order[:maps]
+        while len(order) < maps:
+            order.append("decider")
+            probabilities["decider"] = default
+        return SeriesSpec(
+            match_id=match["id"],
+            best_of=maps,
+            maps=order,
+            map_probabilities=[probabilities[m] for m in order],
+            round_probabilities=[self.model.round_probability_for(probabilities[m]) for m in order],
+            played=played,
+            decided=decided,
+            current=current,
+            seed=self.seed,
+        )
+
+    def simulate(
+        self,
+        match: Dict[str, Any],
+        prediction: Prediction,
+        simulations: Optional[int] = None,
+        version: Optional[int] = None,
+    ) -> Optional[SeriesDistribution]:
+        """Distribution of one match; cached when ``version`` (the snapshot version) is given"""
+        simulations = simulations or self.simulations
+        key = (match["id"], version, self.engine.version, simulations) if version is not None else None
+        if key is not None:
+            with self._lock:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    return self._cache[key]
+        spec = self.spec(match, prediction)
+        result = simulate_series(spec, simulations) if spec is not None else None
+        if key is not None:
+            with self._lock:
+                self._cache[key] = result
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def simulate_many(
+        self,
+        matches: Iterable[Dict[str, Any]],
+        predictions: Mapping[str, Prediction],
+        simulations: Optional[int] = None,
+        processes: Optional[int] = None,
+    ) -> Dict[str, SeriesDistribution]:
+        """Distributions of several matches, spread over a process pool when ``processes`` > 1"""
+        specs = [s for s in (self.spec(m, predictions[m["id"]]) for m in matches if m["id"] in predictions) if s]
+        simulations = simulations or self.simulations
+        processes = self.processes if processes is None else processes
+        if processes > 1 and len(specs) > 1:
+            results = self._pool(processes).map(simulate_series, specs, repeat(simulations),
+                                                chunksize=max(1, len(specs) // (processes * 4)))
+        else:
+            results = (simulate_series(spec, simulations) for spec in specs)
+        return {result.match_id: result for result in results}
+
+    def _pool(self, processes: int) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._workers != processes:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ProcessPoolExecutor(max_workers=processes)
+                self._workers = processes
+            return self._executor
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
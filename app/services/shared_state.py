@@ -0,0 +1,170 @@
+"""
+Snapshot sharing between worker processes (SQLite WAL + leader election)
+"""
+import fcntl
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.serialization import dumps, loads
+from app.services.snapshot import MatchSnapshot
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    version INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    body BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class SharedSnapshots:
+    """Published match snapshots shared by all workers of one deployment.
+
+    One process holds an exclusive ``flock`` on ``<path>.lock`` and is the
+    leader: it runs the refresh scheduler and writes every snapshot it
+    publishes (already serialized) to the database. The other workers only
+    read: they poll the newest version and install it under the same version
+    number, so versions, ETags and ``?since=`` deltas agree across workers.
+    The OS drops the lock when the leader exits, and the next worker to poll
+    takes over. WAL mode lets readers proceed while the leader writes.
+    """
+
+    def __init__(self, path: str = "shared_state.db", keep: int = 32):
+        self.path = path
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (secrets.token_hex(4),)
+        )
+
+    def close(self):
+        self.release_leadership()
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Leadership
+    # ------------------------------------------------------------------
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_file is not None
+
+    def try_acquire_leadership(self) -> bool:
+        """Become the leader if no other process is; non-blocking"""
+        if self._lock_file is not None:
+            return True
+        lock_file = open(f"{self.path}.lock", "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        lock_file.seek(0)
+        lock_file.truncate()
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._lock_file = lock_file
+        return True
+
+    def release_leadership(self):
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+
+    def epoch(self) -> str:
+        """Token shared by all workers for as long as the database exists"""
+        return self._get_meta("epoch")
+
+    def latest_version(self) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT MAX(version) FROM snapshots").fetchone()
+        return row[0] or 0
+
+    def write(self, snapshot: MatchSnapshot):
+        """Store a snapshot published by the leader and prune old ones"""
+        body = dumps(list(snapshot.matches))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO snapshots (version, created_at, body) VALUES (?, ?, ?)",
+                    (snapshot.version, snapshot.created_at.isoformat(), body),
+                )
+                self._conn.execute(
+                    "DELETE FROM snapshots WHERE version <= ?", (snapshot.version - self.keep,)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def read_newer(self, version: int) -> Optional[Tuple[int, datetime, List[Dict[str, Any]]]]:
+        """(version, created_at, matches) of the newest snapshot if it is newer than ``version``"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version, created_at, body FROM snapshots WHERE version > ? "
+                "ORDER BY version DESC LIMIT 1",
+                (version,),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], datetime.fromisoformat(row[1]), loads(row[2])
+
+    # ------------------------------------------------------------------
+    # Refresh requests from followers
+    # ------------------------------------------------------------------
+
+    def request_refresh(self) -> float:
+        """Ask the leader for an immediate full refresh; returns the request time"""
+        requested_at = time.time()
+        self._set_meta("refresh_requested", str(requested_at))
+        return requested_at
+
+    def refresh_requested(self) -> bool:
+        """Whether a refresh was requested after the last one the leader completed"""
+        requested = float(self._get_meta("refresh_requested") or 0)
+        return requested > float(self._get_meta("refreshed_at") or 0)
+
+    def mark_refreshed(self):
+        self._set_meta("refreshed_at", str(time.time()))
+
+    def wait_refreshed(self, requested_at: float, timeout: float = 60.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if float(self._get_meta("refreshed_at") or 0) >= requested_at:
+                return True
+            time.sleep(0.2)
+        return False
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
@@ -0,0 +1,178 @@
+"""
+Versioned, immutable snapshots of the current match list
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from app.services.http_cache import diff_by_id
+
+
+class SnapshotUnavailable(RuntimeError):
+    """No snapshot has been published yet and this cache does not build its own"""
+
+
+@dataclass(frozen=True)
+class MatchSnapshot:
+    """One published version of the match list.
+
+    Snapshots are shared between requests and never mutated after they are
+    built; the match dicts they hold must be treated as read-only.
+    """
+    version: int
+    matches: Tuple[Dict[str, Any], ...]
+    by_id: Mapping[str, Dict[str, Any]]
+    live_count: int
+    upcoming_count: int
+    created_at: datetime
+    created_monotonic: float = field(repr=False)
+
+    @classmethod
+    def build(
+        cls, version: int, matches: List[Dict[str, Any]], created_at: Optional[datetime] = None
+    ) -> "MatchSnapshot":
+        matches = tuple(matches)
+        return cls(
+            version=version,
+            matches=matches,
+            by_id=MappingProxyType({m["id"]: m for m in matches}),
+            live_count=sum(1 for m in matches if m.get("status") == "live"),
+            upcoming_count=sum(1 for m in matches if m.get("status") == "upcoming"),
+            created_at=created_at or datetime.now(),
+            created_monotonic=time.monotonic(),
+        )
+
+    def get(self, match_id: str) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(match_id)
+
+    def age(self) -> float:
+        return time.monotonic() - self.created_monotonic
+
+
+class SnapshotCache:
+    """Holds the latest MatchSnapshot.
+
+    Readers call :meth:`current`; only one thread builds a missing snapshot
+    (or one older than ``ttl`` seconds, if a TTL is set) while the others wait
+    for it. :meth:`refresh` forces a rebuild and :meth:`publish` installs a
+    match list built elsewhere, e.g. by the background refresh scheduler.
+    The last ``history_size`` snapshots are kept so that :meth:`delta` can
+    tell a polling client what changed since the version it already has.
+
+    With ``build_locally`` off (a worker that follows another process's
+    snapshots), :meth:`current` never calls the builder: it returns the
+    last published snapshot, or raises SnapshotUnavailable before the first.
+    """
+
+    def __init__(
+        self,
+        builder: Callable[[], List[Dict[str, Any]]],
+        ttl: Optional[float] = 300.0,
+        history_size: int = 32,
+    ):
+        self._builder = builder
+        self.ttl = ttl
+        self.build_locally = True
+        self.history_size = history_size
+        self._snapshot: Optional[MatchSnapshot] = None
+        self._version = 0
+        self._build_lock = threading.Lock()
+        self._history: "OrderedDict[int, MatchSnapshot]" = OrderedDict()
+        self._listeners: List[Callable[[MatchSnapshot], Any]] = []
+        self._enrichers: List[Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]] = []
+
+    def add_listener(self, listener: Callable[[MatchSnapshot], Any]):
+        """Call ``listener(snapshot)`` after every publish (in the publishing thread)"""
+        self._listeners.append(listener)
+
+    def add_enricher(self, enricher: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]):
+        """Pass every match list through ``enricher(matches) -> matches`` before it is frozen"""
+        self._enrichers.append(enricher)
+
+    def _fresh(self, snapshot: Optional[MatchSnapshot]) -> bool:
+        return snapshot is not None and (self.ttl is None or snapshot.age() < self.ttl)
+
+    def peek(self) -> Optional[MatchSnapshot]:
+        """Latest snapshot without building one"""
+        return self._snapshot
+
+    def current(self) -> MatchSnapshot:
+        snapshot = self._snapshot
+        if self._fresh(snapshot):
+            return snapshot
+        if not self.build_locally:
+            if snapshot is None:
+                raise SnapshotUnavailable("no match snapshot has been published yet")
+            return snapshot
+        with self._build_lock:
+            # Another thread may have rebuilt it while we were waiting
+            snapshot = self._snapshot
+            if self._fresh(snapshot):
+                return snapshot
+            return self._publish(self._builder())
+
+    def refresh(self) -> MatchSnapshot:
+        with self._build_lock:
+            return self._publish(self._builder())
+
+    def publish(
+        self,
+        matches: List[Dict[str, Any]],
+        version: Optional[int] = None,
+        created_at: Optional[datetime] = None,
+    ) -> MatchSnapshot:
+        """Install a match list as the next snapshot.
+
+        ``version``/``created_at`` install a snapshot built by another process
+        under its own version; it must be newer than the current one.
+        """
+        with self._build_lock:
+            if version is not None:
+                if version <= self._version:
+                    raise ValueError(f"snapshot version {version} is not newer than {self._version}")
+                self._version = version - 1
+            return self._publish(matches, created_at)
+
+    def advance_version(self, version: int):
+        """Make the next locally built snapshot newer than ``version``"""
+        with self._build_lock:
+            self._version = max(self._version, version)
+
+    def delta(
+        self, since: int, snapshot: Optional[MatchSnapshot] = None
+    ) -> Optional[Tuple[List[Dict[str, Any]], List[str]]]:
+        """(changed, removed) between version ``since`` and ``snapshot``.
+
+        None if that version is no longer (or was never) in the history; the
+        caller should then send the full list.
+        """
+        snapshot = snapshot or self.current()
+        if since == snapshot.version:
+            return [], []
+        base = self._history.get(since)
+        if base is None or since > snapshot.version:
+            return None
+        return diff_by_id(base.by_id, snapshot.by_id)
+
+    def _publish(self, matches: List[Dict[str, Any]], created_at: Optional[datetime] = None) -> MatchSnapshot:
+        for enricher in self._enrichers:
+            try:
+                matches = enricher(list(matches))
+            except Exception as e:
+                print(f"Snapshot enricher failed: {e}")
+        self._version += 1
+        snapshot = MatchSnapshot.build(self._version, matches, created_at)
+        self._history[snapshot.version] = snapshot
+        while len(self._history) > self.history_size:
+            self._history.popitem(last=False)
+        self._snapshot = snapshot
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                print(f"Snapshot listener failed: {e}")
+        return snapshot
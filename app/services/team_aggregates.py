@@ -0,0 +1,245 @@
+"""
+Precomputed per-team and per-pair aggregates (form, map records, head-to-head)
+"""
+import bisect
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.history_store import HistoryStore
+from app.services.match_archive import MatchArchive
+from app.services.match_store import team_key
+from app.services.rating_engine import MatchResult, result_from_match
+
+
+@dataclass
+class TeamRecord:
+    """Running aggregates of one team"""
+    played: int = 0
+    wins: int = 0
+    draws: int = 0
+    last_played: float = 0.0
+    # (time, score) of the latest ``form_size`` series, oldest first
+    recent: List[Tuple[float, float]] = field(default_factory=list)
+    recent_points: float = 0.0
+    # map -> [maps played, points won]
+    maps: Dict[str, List[float]] = field(default_factory=dict)
+
+    @property
+    def losses(self) -> int:
+        return self.played - self.wins - self.draws
+
+    @property
+    def form(self) -> Optional[float]:
+        return self.recent_points / len(self.recent) if self.recent else None
+
+
+class TeamAggregates:
+    """Form, per-map records and head-to-head for every team, kept current.
+
+    Each team has running totals, its last ``form_size`` results (so rolling
+    form is a stored sum divided by a length) and per-map counters; each pair
+    of teams has its win/draw/loss record. Answering an analysis request is
+    then a few dict lookups.
+
+    :meth:`rebuild` bootstraps everything from the columnar HistoryStore
+    with vectorized bincounts; :meth:`update` then applies archive rows past
+    the watermark one result at a time, so matches that finish are folded in
+    without rescanning any history. Every worker keeps its own index and
+    follows the shared archive the same way.
+    """
+
+    def __init__(self, form_size: int = 10):
+        self.form_size = form_size
+        self._lock = threading.RLock()
+        self.watermark = 0
+        self.version = 0
+        self._teams: Dict[str, TeamRecord] = {}
+        # team -> opponent -> [wins, draws, losses] of team
+        self._pairs: Dict[str, Dict[str, List[int]]] = defaultdict(dict)
+        # team_key slug -> team name, for lookups by URL id
+        self._keys: Dict[str, str] = {}
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def resolve(self, team: str) -> Optional[str]:
+        """Team name for a name or a team_key slug"""
+        if team in self._teams:
+            return team
+        return self._keys.get(team)
+
+    def team(self, name: str) -> Optional[TeamRecord]:
+        return self._teams.get(name)
+
+    def form(self, name: str) -> Optional[float]:
+        record = self._teams.get(name)
+        return record.form if record is not None else None
+
+    def head_to_head(self, team: str, opponent: str) -> Tuple[int, int, int]:
+        """(wins, draws, losses) of ``team`` against ``opponent``"""
+        record = self._pairs.get(team, {}).get(opponent)
+        return tuple(record) if record is not None else (0, 0, 0)
+
+    def map_win_rates(self, name: str) -> Dict[str, Dict[str, Any]]:
+        record = self._teams.get(name)
+        if record is None:
+            return {}
+        with self._lock:
+            maps = sorted(record.maps.items(), key=lambda item: -item[1][0])
+        return {
+            map_name: {"played": int(played), "win_rate": round(points / played, 3)}
+            for map_name, (played, points) in maps
+        }
+
+    def stats(self, name: str, opponents: int = 10) -> Dict[str, Any]:
+        """JSON-ready aggregates of one team, with its most frequent opponents.
+
+        A team without archived results gets zero counts.
+        """
+        record = self._teams.get(name) or TeamRecord()
+        with self._lock:
+            recent = list(record.recent)
+            pairs = sorted(self._pairs.get(name, {}).items(), key=lambda item: (-sum(item[1]), item[0]))[:opponents]
+            return {
+                "played": record.played,
+                "wins": record.wins,
+                "draws": record.draws,
+                "losses": record.losses,
+                "recent_form": round(record.form, 3) if record.form is not None else None,
+                "recent_results": "".join("W" if s == 1.0 else "D" if s == 0.5 else "L" for _, s in recent),
+                "map_win_rates": self.map_win_rates(name),
+                "head_to_head": {
+                    opponent: {"wins": w, "draws": d, "losses": l} for opponent, (w, d, l) in pairs
+                },
+                "last_played": record.last_played or None,
+            }
+
+    def __len__(self) -> int:
+        return len(self._teams)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def update(self, archive: MatchArchive) -> int:
+        """Apply archive rows past the watermark; returns the number of new results"""
+        with self._lock:
+            applied = 0
+            for seq, match in archive.iter_since(self.watermark):
+                result = result_from_match(match)
+                if result is not None:
+                    self.apply(result)
+                    applied += 1
+                self.watermark = seq
+            if applied:
+                self.version += 1
+            return applied
+
+    def apply(self, result: MatchResult):
+        """Fold one finished series into the aggregates"""
+        with self._lock:
+            for team, opponent, score, sign in (
+                (result.team1, result.team2, result.score, 1),
+                (result.team2, result.team1, 1.0 - result.score, -1),
+            ):
+                record = self._record(team)
+                record.played += 1
+                record.wins += score == 1.0
+                record.draws += score == 0.5
+                record.last_played = max(record.last_played, result.played_at)
+                self._push_recent(record, result.played_at, score)
+                for map_name, outcome in result.maps:
+                    counts = record.maps.setdefault(map_name, [0, 0.0])
+                    counts[0] += 1
+                    counts[1] += outcome if sign == 1 else 1.0 - outcome
+                pair = self._pairs[team].setdefault(opponent, [0, 0, 0])
+                pair[0 if score == 1.0 else 1 if score == 0.5 else 2] += 1
+
+    def _record(self, name: str) -> TeamRecord:
+        record = self._teams.get(name)
+        if record is None:
+            record = self._teams[name] = TeamRecord()
+            self._keys[team_key({"name": name})] = name
+        return record
+
+    def _push_recent(self, record: TeamRecord, played_at: float, score: float):
+        recent = record.recent
+        if len(recent) == self.form_size and played_at < recent[0][0]:
+            # Older than the whole window (e.g. a backfilled result)
+            return
+        # Ties keep arrival order, like the history's stable (team, time) sort
+        bisect.insort(recent, (played_at, score), key=lambda item: item[0])
+        record.recent_points += score
+        if len(recent) > self.form_size:
+            record.recent_points -= recent.pop(0)[1]
+
+    def rebuild(self, history: HistoryStore) -> int:
+        """Recompute everything from the columnar history (vectorized); returns the team count"""
+        with self._lock:
+            self._teams = {}
+            self._pairs = defaultdict(dict)
+            self._keys = {}
+            names = list(history.team_index)
+            map_names = list(history.map_index)
+            n_teams, n_maps = len(names), len(map_names)
+            series = _concat(history, "series", ("team", "opponent", "score", "time"))
+            maps = _concat(history, "maps", ("team", "map", "score"))
+
+            if n_teams and len(series["team"]):
+                team = series["team"].astype(np.int64)
+                played = np.bincount(team, minlength=n_teams)
+                wins = np.bincount(team, weights=series["score"] == 1.0, minlength=n_teams)
+                draws = np.bincount(team, weights=series["score"] == 0.5, minlength=n_teams)
+                last = np.zeros(n_teams)
+                np.maximum.at(last, team, series["time"])
+                map_cells = team_map = None
+                if n_maps and len(maps["team"]):
+                    team_map = maps["team"].astype(np.int64) * n_maps + maps["map"]
+                    map_cells = (
+                        np.bincount(team_map, minlength=n_teams * n_maps).reshape(n_teams, n_maps),
+                        np.bincount(team_map, weights=maps["score"], minlength=n_teams * n_maps).reshape(n_teams, n_maps),
+                    )
+
+                for index in np.flatnonzero(played):
+                    record = self._record(names[index])
+                    record.played, record.wins, record.draws = int(played[index]), int(wins[index]), int(draws[index])
+                    record.last_played = float(last[index])
+                    rows = history.team_rows(names[index], columns=("time", "score"))
+                    record.recent = list(zip(rows["time"][-self.form_size:].tolist(),
+                                             rows["score"][-self.form_size:].tolist()))
+                    record.recent_points = float(sum(score for _, score in record.recent))
+                    if map_cells is not None:
+                        for map_index in np.flatnonzero(map_cells[0][index]):
+                            record.maps[map_names[map_index]] = [
+                                int(map_cells[0][index, map_index]), float(map_cells[1][index, map_index])
+                            ]
+
+                # Pair records: one bincount per outcome over team * n + opponent
+                pair = team * n_teams + series["opponent"]
+                keys, inverse = np.unique(pair, return_inverse=True)
+                counts = np.stack([
+                    np.bincount(inverse, weights=series["score"] == value, minlength=len(keys))
+                    for value in (1.0, 0.5, 0.0)
+                ], axis=1).astype(np.int64)
+                for key, (w, d, l) in zip(keys.tolist(), counts.tolist()):
+                    self._pairs[names[key // n_teams]][names[key % n_teams]] = [w, d, l]
+
+            self.watermark = history.watermark
+            self.version += 1
+            return len(self._teams)
+
+
+def _concat(history: HistoryStore, table: str, columns: Iterable[str]) -> Dict[str, np.ndarray]:
+    segments = history.segments
+    if len(segments) == 1:
+        return {column: getattr(segments[0], table)[column] for column in columns}
+    return {
+        column: np.concatenate([getattr(segment, table)[column] for segment in segments])
+        if segments else np.empty(0)
+        for column in columns
+    }
@@ -0,0 +1,211 @@
+"""
+Telegram bot: user registration, match commands and admin broadcasts
+"""
+import asyncio
+import fcntl
+import os
+from typing import Iterable, Optional
+
+from telegram import Update
+from telegram.ext import Application, ApplicationBuilder, CommandHandler, ContextTypes
+
+from app.core.state import get_core
+from app.database import BotUser, Broadcast, get_session_factory, upsert_rows
+from app.services.telegram_broadcast import BroadcastEngine, broadcast_status, create_broadcast
+
+DEFAULT_API_URL = "https://api.telegram.org/bot"
+LOCK_POLL_INTERVAL = 5.0
+BROADCAST_POLL_INTERVAL = 5.0
+# How long stop() waits for in-flight broadcast sends
+STOP_TIMEOUT = 10.0
+MATCHES_PER_REPLY = 10
+
+
+def _admin_ids(value: Optional[str]) -> set:
+    return {int(part) for part in (value or "").replace(",", " ").split() if part.lstrip("-").isdigit()}
+
+
+class TelegramBot:
+    """The bot, run by exactly one worker process of the deployment.
+
+    Like the refresh leader, the process holding an exclusive ``flock`` on
+    TELEGRAM_LOCK_PATH polls Telegram for updates and sends broadcasts; the
+    other workers retry the lock every few seconds and take over if that
+    process exits. Broadcasts are rows of the ``broadcasts`` table, queued
+    by the /broadcast command or the admin API from any worker and picked up
+    here (interrupted ones resume from their checkpoint).
+
+    TELEGRAM_API_URL points the bot at another Bot API server (a local
+    ``telegram-bot-api`` or a test double).
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        base_url: Optional[str] = None,
+        admin_ids: Optional[Iterable[int]] = None,
+        lock_path: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        rate: Optional[float] = None,
+    ):
+        self.token = token or os.environ["TELEGRAM_BOT_TOKEN"]
+        self.base_url = base_url or os.getenv("TELEGRAM_API_URL", DEFAULT_API_URL)
+        self.admin_ids = set(admin_ids) if admin_ids is not None else _admin_ids(os.getenv("TELEGRAM_ADMIN_IDS"))
+        self.lock_path = lock_path or os.getenv("TELEGRAM_LOCK_PATH", "telegram_bot.lock")
+        self.concurrency = concurrency or int(os.getenv("TELEGRAM_BROADCAST_CONCURRENCY", "32"))
+        self.rate = rate or float(os.getenv("TELEGRAM_BROADCAST_RATE", "30"))
+        self.session_factory = get_session_factory()
+        self.application: Optional[Application] = None
+        self.engine: Optional[BroadcastEngine] = None
+        self._lock_file = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._stopping.set()
+        if self.engine is not None:
+            self.engine.stop()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            except Exception as e:
+                print(f"Telegram bot stopped with an error: {e}")
+            self._task = None
+
+    def _try_lock(self) -> bool:
+        lock_file = open(self.lock_path, "a+")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _release_lock(self):
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def _wait(self, seconds: float) -> bool:
+        """Sleep unless stop() is called first; True if stopping"""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+        return self._stopping.is_set()
+
+    async def _run(self):
+        while not self._try_lock():
+            if await self._wait(LOCK_POLL_INTERVAL):
+                return
+        try:
+            self.application = self.build_application()
+            await self.application.initialize()
+            await self.application.start()
+            await self.application.updater.start_polling()
+            self.engine = BroadcastEngine(self.application.bot, self.session_factory,
+                                          concurrency=self.concurrency, rate=self.rate)
+            print(f"Telegram bot running in worker {os.getpid()}")
+            while True:
+                try:
+                    await self.engine.run_unfinished()
+                except Exception as e:
+                    print(f"Error running broadcasts: {e}")
+                if await self._wait(BROADCAST_POLL_INTERVAL):
+                    break
+        except Exception as e:
+            print(f"Telegram bot failed: {e}")
+        finally:
+            if self.application is not None:
+                if self.application.updater.running:
+                    await self.application.updater.stop()
+                if self.application.running:
+                    await self.application.stop()
+                await self.application.shutdown()
+            self._release_lock()
+
+    def build_application(self) -> Application:
+        application = (
+            ApplicationBuilder()
+            .token(self.token)
+            .base_url(self.base_url)
+            # One connection per broadcast worker, plus room for command replies
+            .connection_pool_size(self.concurrency + 8)
+            .build()
+        )
+        application.add_handler(CommandHandler("start", self.on_start))
+        application.add_handler(CommandHandler("matches", self.on_matches))
+        application.add_handler(CommandHandler("broadcast", self.on_broadcast))
+        application.add_handler(CommandHandler("broadcast_status", self.on_broadcast_status))
+        return application
+
+    # ------------------------------------------------------------------
+    # Commands
+    # ------------------------------------------------------------------
+
+    async def on_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Register (or re-activate) the user and say hello"""
+        chat, user = update.effective_chat, update.effective_user
+        async with self.session_factory() as session:
+            await upsert_rows(session, BotUser.__table__, [{
+                "id": chat.id,
+                "username": user.username if user else None,
+                "first_name": user.first_name if user else chat.title,
+                "blocked": False,
+            }])
+            await session.commit()
+        await update.effective_message.reply_text(
+            "Welcome to CS2 Analytics! Use /matches for live and upcoming matches."
+        )
+
+    async def on_matches(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        store = get_core().store
+        lines = []
+        for status, label in (("live", "LIVE"), ("upcoming", "Upcoming")):
+            for match in store.match_views(status=status)[:MATCHES_PER_REPLY - len(lines)]:
+                team1, team2 = match.get("team1") or {}, match.get("team2") or {}
+                lines.append(f"{label}: {team1.get('name', 'TBD')} vs {team2.get('name', 'TBD')}"
+                             f" ({match.get('tournament') or 'unknown event'})")
+        await update.effective_message.reply_text("\n".join(lines) or "No matches right now.")
+
+    async def on_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """/broadcast <text>: queue a message to every user (admins only)"""
+        if update.effective_user is None or update.effective_user.id not in self.admin_ids:
+            return
+        text = update.effective_message.text.partition(" ")[2].strip()
+        if not text:
+            await update.effective_message.reply_text("Usage: /broadcast <text>")
+            return
+        async with self.session_factory() as session:
+            broadcast = await create_broadcast(session, text)
+            await session.commit()
+        await update.effective_message.reply_text(f"Broadcast #{broadcast.id} queued.")
+
+    async def on_broadcast_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        if update.effective_user is None or update.effective_user.id not in self.admin_ids:
+            return
+        if not context.args or not context.args[0].isdigit():
+            await update.effective_message.reply_text("Usage: /broadcast_status <id>")
+            return
+        async with self.session_factory() as session:
+            broadcast = await session.get(Broadcast, int(context.args[0]))
+        if broadcast is None:
+            await update.effective_message.reply_text("No such broadcast.")
+            return
+        status = broadcast_status(broadcast)
+        await update.effective_message.reply_text(
+            f"Broadcast #{status['id']}: {status['status']}, {status['sent']}/{status['total']} sent, "
+            f"{status['blocked']} blocked, {status['failed']} failed"
+            + (f", {status['messages_per_second']} msg/s" if status["messages_per_second"] else "")
+        )
@@ -0,0 +1,399 @@
+"""
+Broadcasts to every bot user through a rate-limited, resumable worker pool
+"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from telegram import Bot
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TelegramError
+
+from app.database import BotUser, Broadcast, get_session_factory
+from app.services.hltv_client import TokenBucket
+
+# Bot API limits: about 30 messages/sec overall, 1/sec per chat, 20/min per group
+GLOBAL_RATE = 30.0
+PRIVATE_CHAT_INTERVAL = 1.0
+GROUP_CHAT_INTERVAL = 3.0
+
+SENT, FAILED, BLOCKED = "sent", "failed", "blocked"
+FINISHED_STATUSES = ("done", "cancelled")
+
+
+@dataclass
+class BroadcastReport:
+    """Outcome of one run of a broadcast (a resumed broadcast only counts this run)"""
+    broadcast_id: int
+    status: str = "running"
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    blocked: int = 0
+    # Users already handled by an earlier, interrupted run
+    skipped: int = 0
+    # 429 answers, and retries after network errors
+    rate_limited: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def handled(self) -> int:
+        return self.sent + self.failed + self.blocked
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.sent / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self), handled=self.handled,
+                    messages_per_second=round(self.messages_per_second, 1))
+
+
+class ChatRateLimiter:
+    """Minimum spacing between two messages to the same chat"""
+
+    def __init__(self, private_interval: float = PRIVATE_CHAT_INTERVAL,
+                 group_interval: float = GROUP_CHAT_INTERVAL, max_chats: int = 10_000):
+        self.private_interval = private_interval
+        self.group_interval = group_interval
+        self.max_chats = max_chats
+        self._next: Dict[int, float] = {}
+
+    async def acquire(self, chat_id: int):
+        now = time.monotonic()
+        at = max(now, self._next.get(chat_id, 0.0))
+        self._next[chat_id] = at + (self.group_interval if chat_id < 0 else self.private_interval)
+        if len(self._next) > self.max_chats:
+            self._next = {chat: t for chat, t in self._next.items() if t > now}
+        if at > now:
+            await asyncio.sleep(at - now)
+
+
+class DeliveryCheckpoint:
+    """Handled chat ids of a broadcast: a low watermark plus the ids above it.
+
+    Chat ids are dispatched in ascending order but complete out of order,
+    so the checkpoint is the highest id below which everything is handled
+    (``cursor``) and the handful of ids past it that are already done. Both
+    stay small whatever the size of the user base.
+    """
+
+    def __init__(self, cursor: Optional[int] = None, done: Iterable[int] = ()):
+        self.cursor = cursor
+        self.done = set(done)
+        self._dispatched: deque = deque()
+
+    def dispatch(self, chat_id: int):
+        self._dispatched.append(chat_id)
+
+    def complete(self, chat_id: int):
+        self.done.add(chat_id)
+        dispatched = self._dispatched
+        while dispatched and dispatched[0] in self.done:
+            self.cursor = dispatched.popleft()
+            self.done.discard(self.cursor)
+
+    def state(self) -> Dict[str, Any]:
+        cursor = self.cursor
+        return {"cursor": cursor, "done": sorted(c for c in self.done if cursor is None or c > cursor)}
+
+
+class BroadcastEngine:
+    """Sends a broadcast to all bot users with a pool of concurrent senders.
+
+    A producer pages through ``bot_users`` by chat id (keyset pagination, so
+    memory stays flat for any number of users) into a bounded queue that
+    ``concurrency`` workers drain. Every send first waits for its chat's
+    slot (1/sec per user, 20/min per group), then for a token of the global
+    bucket (``rate`` messages/sec). A 429 pauses all workers for its
+    ``retry_after`` (flood control applies to the whole bot) and the message
+    is retried; 403 marks the user as blocked.
+
+    Progress is checkpointed to the ``broadcasts`` row every
+    ``checkpoint_interval`` seconds and when the run ends, so a broadcast
+    interrupted by a restart resumes where it stopped: :meth:`stop` lets
+    in-flight sends finish, and after a crash at most the last interval's
+    sends are repeated.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        session_factory: Optional[Callable] = None,
+        concurrency: int = 32,
+        rate: float = GLOBAL_RATE,
+        burst: float = 1.0,
+        private_interval: float = PRIVATE_CHAT_INTERVAL,
+        group_interval: float = GROUP_CHAT_INTERVAL,
+        retries: int = 3,
+        max_rate_limited: int = 10,
+        checkpoint_interval: float = 2.0,
+        progress_interval: float = 10.0,
+        page_size: int = 1000,
+    ):
+        self.bot = bot
+        self.session_factory = session_factory or get_session_factory()
+        self.concurrency = concurrency
+        self.retries = retries
+        self.max_rate_limited = max_rate_limited
+        self.checkpoint_interval = checkpoint_interval
+        self.progress_interval = progress_interval
+        self.page_size = page_size
+        self.rate_limiter = TokenBucket(rate, burst)
+        self.chat_limiter = ChatRateLimiter(private_interval, group_interval)
+        self._resume_at = 0.0
+        self._stopping = asyncio.Event()
+
+    # ------------------------------------------------------------------
+    # Broadcasts
+    # ------------------------------------------------------------------
+
+    async def unfinished(self) -> List[int]:
+        """Ids of pending broadcasts and of runs that were interrupted, oldest first"""
+        async with self.session_factory() as session:
+            rows = await session.scalars(
+                select(Broadcast.id).where(Broadcast.status.in_(("pending", "running"))).order_by(Broadcast.id)
+            )
+            return list(rows)
+
+    async def run_unfinished(self) -> List[BroadcastReport]:
+        reports = []
+        for broadcast_id in await self.unfinished():
+            if self._stopping.is_set():
+                break
+            reports.append(await self.run(broadcast_id))
+        return reports
+
+    def stop(self):
+        """Stop dispatching; runs end after their in-flight sends and stay resumable"""
+        self._stopping.set()
+
+    async def run(self, broadcast_id: int) -> BroadcastReport:
+        """Send (or resume) one broadcast"""
+        async with self.session_factory() as session:
+            broadcast = await session.get(Broadcast, broadcast_id)
+            if broadcast is None:
+                raise KeyError(broadcast_id)
+            report = BroadcastReport(broadcast_id, status=broadcast.status, total=broadcast.total)
+            if broadcast.status in FINISHED_STATUSES:
+                return report
+            if broadcast.status == "pending":
+                broadcast.total = await session.scalar(
+                    select(func.count()).select_from(BotUser).where(BotUser.blocked.is_(False))
+                )
+                broadcast.started_at = datetime.now()
+                broadcast.status = "running"
+                await session.commit()
+            report.total = broadcast.total
+            text, parse_mode = broadcast.text, broadcast.parse_mode
+            checkpoint = DeliveryCheckpoint(broadcast.cursor, broadcast.done or ())
+            base = {"sent": broadcast.sent or 0, "failed": broadcast.failed or 0,
+                    "blocked": broadcast.blocked or 0, "seconds": broadcast.seconds or 0.0}
+
+        run = _Run(report, checkpoint, base)
+        print(f"Broadcast {broadcast_id}: sending to {report.total} users"
+              + (f" (resuming after chat {checkpoint.cursor})" if checkpoint.cursor is not None else ""))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        workers = [asyncio.create_task(self._worker(queue, run, text, parse_mode))
+                   for _ in range(self.concurrency)]
+        flusher = asyncio.create_task(self._checkpoint_loop(run))
+        started = time.perf_counter()
+        completed = False
+        try:
+            await self._produce(queue, run)
+            await asyncio.gather(*workers)
+            completed = not self._stopping.is_set()
+        finally:
+            for task in (*workers, flusher):
+                task.cancel()
+            await asyncio.gather(*workers, flusher, return_exceptions=True)
+            report.seconds = time.perf_counter() - started
+            report.status = "done" if completed else "running"
+            await self._flush(run)
+        print(f"Broadcast {broadcast_id} {'finished' if completed else 'interrupted'}: "
+              f"{report.sent} sent, {report.blocked} blocked, {report.failed} failed "
+              f"in {report.seconds:.1f}s ({report.messages_per_second:.1f} msg/s, "
+              f"{report.rate_limited} rate limited)")
+        return report
+
+    # ------------------------------------------------------------------
+    # Producer and workers
+    # ------------------------------------------------------------------
+
+    async def _produce(self, queue: asyncio.Queue, run: "_Run"):
+        after = run.checkpoint.cursor
+        try:
+            while not self._stopping.is_set():
+                async with self.session_factory() as session:
+                    stmt = select(BotUser.id).where(BotUser.blocked.is_(False)).order_by(BotUser.id).limit(self.page_size)
+                    if after is not None:
+                        stmt = stmt.where(BotUser.id > after)
+                    chat_ids = list(await session.scalars(stmt))
+                if not chat_ids:
+                    break
+                after = chat_ids[-1]
+                for chat_id in chat_ids:
+                    if self._stopping.is_set():
+                        break
+                    if chat_id in run.checkpoint.done:
+                        run.report.skipped += 1
+                        continue
+                    run.checkpoint.dispatch(chat_id)
+                    await queue.put(chat_id)
+        finally:
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+    async def _worker(self, queue: asyncio.Queue, run: "_Run", text: str, parse_mode: Optional[str]):
+        while True:
+            chat_id = await queue.get()
+            if chat_id is None:
+                return
+            if self._stopping.is_set():
+                # Left for the resumed run
+                continue
+            outcome = await self._deliver(run.report, chat_id, text, parse_mode)
+            run.record(chat_id, outcome)
+
+    async def _deliver(self, report: BroadcastReport, chat_id: int, text: str, parse_mode: Optional[str]) -> str:
+        attempts = rate_limited = 0
+        while True:
+            await self._wait_resume()
+            await self.chat_limiter.acquire(chat_id)
+            await self.rate_limiter.acquire()
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+                return SENT
+            except RetryAfter as e:
+                report.rate_limited += 1
+                rate_limited += 1
+                self._pause(e.retry_after)
+                if rate_limited > self.max_rate_limited:
+                    return FAILED
+            except Forbidden:
+                return BLOCKED
+            except BadRequest as e:
+                # Chat not found, deactivated account, malformed text: retrying won't help
+                print(f"Broadcast to {chat_id} failed: {e}")
+                return FAILED
+            except NetworkError:
+                attempts += 1
+                if attempts > self.retries:
+                    return FAILED
+                report.retries += 1
+                await asyncio.sleep(min(10.0, 0.5 * 2 ** attempts))
+            except TelegramError as e:
+                print(f"Broadcast to {chat_id} failed: {e}")
+                return FAILED
+
+    def _pause(self, retry_after):
+        if isinstance(retry_after, timedelta):
+            retry_after = retry_after.total_seconds()
+        self._resume_at = max(self._resume_at, time.monotonic() + float(retry_after))
+
+    async def _wait_resume(self):
+        while True:
+            delay = self._resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    # ------------------------------------------------------------------
+    # Checkpoints
+    # ------------------------------------------------------------------
+
+    async def _checkpoint_loop(self, run: "_Run"):
+        last_progress = started = time.perf_counter()
+        while True:
+            await asyncio.sleep(self.checkpoint_interval)
+            run.report.seconds = time.perf_counter() - started
+            try:
+                await self._flush(run)
+            except Exception as e:
+                print(f"Error checkpointing broadcast {run.report.broadcast_id}: {e}")
+            if time.perf_counter() - last_progress >= self.progress_interval:
+                last_progress = time.perf_counter()
+                report = run.report
+                print(f"Broadcast {report.broadcast_id}: {report.handled + report.skipped}/{report.total} "
+                      f"handled, {report.messages_per_second:.1f} msg/s")
+
+    async def _flush(self, run: "_Run"):
+        """Write the counters, the checkpoint and newly blocked users"""
+        report = run.report
+        newly_blocked, run.blocked_users = run.blocked_users, []
+        # Absolute values (earlier runs + this one), so a repeated flush is harmless
+        base = run.base
+        values: Dict[str, Any] = dict(
+            run.checkpoint.state(),
+            sent=base["sent"] + report.sent,
+            failed=base["failed"] + report.failed,
+            blocked=base["blocked"] + report.blocked,
+            seconds=base["seconds"] + report.seconds,
+        )
+        if report.status == "done":
+            values.update(status="done", finished_at=datetime.now())
+        try:
+            async with self.session_factory() as session:
+                await session.execute(update(Broadcast).where(Broadcast.id == report.broadcast_id).values(**values))
+                for start in range(0, len(newly_blocked), 500):
+                    await session.execute(
+                        update(BotUser).where(BotUser.id.in_(newly_blocked[start:start + 500])).values(blocked=True)
+                    )
+                await session.commit()
+        except BaseException:
+            run.blocked_users.extend(newly_blocked)
+            raise
+
+
+class _Run:
+    """Mutable state of one broadcast run"""
+
+    def __init__(self, report: BroadcastReport, checkpoint: DeliveryCheckpoint, base: Dict[str, Any]):
+        self.report = report
+        self.checkpoint = checkpoint
+        # Counters of earlier runs, from the broadcasts row
+        self.base = base
+        self.blocked_users: List[int] = []
+
+    def record(self, chat_id: int, outcome: str):
+        report = self.report
+        if outcome == SENT:
+            report.sent += 1
+        elif outcome == BLOCKED:
+            report.blocked += 1
+            self.blocked_users.append(chat_id)
+        else:
+            report.failed += 1
+        self.checkpoint.complete(chat_id)
+
+
+async def create_broadcast(session: AsyncSession, text: str, parse_mode: Optional[str] = None) -> Broadcast:
+    """Queue a broadcast; the process running the bot picks it up"""
+    broadcast = Broadcast(text=text, parse_mode=parse_mode, status="pending", done=[])
+    session.add(broadcast)
+    await session.flush()
+    await session.refresh(broadcast)
+    return broadcast
+
+
+def broadcast_status(broadcast: Broadcast) -> Dict[str, Any]:
+    """JSON-ready progress of a broadcast row"""
+    handled = broadcast.sent + broadcast.failed + broadcast.blocked
+    return {
+        "id": broadcast.id,
+        "status": broadcast.status,
+        "total": broadcast.total,
+        "sent": broadcast.sent,
+        "failed": broadcast.failed,
+        "blocked": broadcast.blocked,
+        "progress": round(handled / broadcast.total, 3) if broadcast.total else None,
+        "messages_per_second": round(broadcast.sent / broadcast.seconds, 1) if broadcast.seconds else None,
+        "created_at": broadcast.created_at.isoformat() if broadcast.created_at else None,
+        "started_at": broadcast.started_at.isoformat() if broadcast.started_at else None,
+        "finished_at": broadcast.finished_at.isoformat() if broadcast.finished_at else None,
+    }
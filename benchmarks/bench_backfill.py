@@ -0,0 +1,86 @@
+"""
+Benchmark: historical results backfill against the local fixture server
+
+Crawls eight weeks of synthetic results (pages overlap like HLTV's do, and
+every 10th response is a 429) with one worker, a thread pool and a process
+pool, checks that the merged output holds every match exactly once, then
+drops one window and re-runs to show that only that window is crawled again.
+
+Run from the repository root:
+    python benchmarks/bench_backfill.py
+"""
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.backfill import Backfill, read_matches
+from fixture_server import start_fixture_server
+
+END = date(2025, 9, 30)
+START = END - timedelta(weeks=8) + timedelta(days=1)
+PER_DAY = 40
+LATENCY = 0.05
+WORKERS = 4
+CLIENT_OPTIONS = {"rate": 1000, "burst": 50, "per_host_limit": 1, "retries": 5, "backoff_base": 0.01}
+
+
+def run(base_url, out_dir, workers, executor):
+    backfill = Backfill(out_dir, base_url=base_url, window_days=7, workers=workers,
+                        executor=executor, client_options=CLIENT_OPTIONS)
+    return backfill, backfill.run(START, END)
+
+
+def check_output(backfill, expected):
+    ids = [match["id"] for match in read_matches(backfill.output_path)]
+    assert len(ids) == len(set(ids)) == expected, (len(ids), len(set(ids)), expected)
+    with gzip.open(backfill.output_path, "rb") as f:
+        raw = len(f.read())
+    return raw, os.path.getsize(backfill.output_path)
+
+
+def main():
+    expected = ((END - START).days + 1) * PER_DAY
+    server = start_fixture_server(latency=LATENCY, fail_every=10, results_per_day=PER_DAY, results_overlap=5)
+    print(f"{START} .. {END}: {expected} results, {LATENCY * 1000:.0f} ms per page, "
+          f"{os.cpu_count()} CPU core(s)")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for workers, executor in ((1, "thread"), (WORKERS, "thread"), (WORKERS, "process")):
+            out_dir = os.path.join(workdir, f"{executor}-{workers}")
+            server.requests = 0
+            backfill, report = run(server.base_url, out_dir, workers, executor)
+            raw, compressed = check_output(backfill, expected)
+            print(f"{workers} {executor} worker(s): {report.pages:>3} pages  {report.seconds:6.2f}s  "
+                  f"{report.pages / report.seconds:6.1f} pages/s  {report.unique_matches} unique matches  "
+                  f"{server.requests} requests  output {compressed / 1024:.0f} KiB (raw {raw / 1024:.0f} KiB)")
+
+        # Simulate a crash that lost the newest window: only it is crawled again
+        with open(backfill.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        lost = sorted(checkpoint["windows"])[-1]
+        del checkpoint["windows"][lost]
+        with open(backfill.checkpoint_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.remove(os.path.join(backfill.windows_dir, f"{lost}.jsonl.gz"))
+
+        server.requests = 0
+        started = time.perf_counter()
+        backfill, report = run(server.base_url, out_dir, WORKERS, "thread")
+        check_output(backfill, expected)
+        print(f"resume after losing window {lost}: {report.skipped}/{report.windows} windows skipped, "
+              f"{report.pages} pages crawled, {time.perf_counter() - started:.2f}s")
+        assert report.skipped == report.windows - 1
+        shutil.rmtree(out_dir)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Benchmark: Gemini analyses for many users against the local stub endpoint
+
+BENCH_USERS users each ask for the analysis of all BENCH_MATCHES current
+matches at once. The naive way is one model call per match per user; the
+GeminiAnalyzer coalesces the duplicates and batches the rest. Then a fresh
+analyzer (a restart) answers everything from the disk cache, a few matches
+change score and only those are sent again, and a small request budget
+makes the rest fall back to the numeric prediction.
+
+Run from the repository root:
+    python benchmarks/bench_gemini_analyzer.py
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.gemini_analyzer import PROMPT, GeminiAnalyzer, match_block
+from fake_gemini_api import start_fake_gemini_api
+
+MATCHES = int(os.getenv("BENCH_MATCHES", 100))
+USERS = int(os.getenv("BENCH_USERS", 5))
+LATENCY = 0.3
+PER_MATCH_LATENCY = 0.02
+CHANGED = 10
+NAIVE_CONNECTIONS = 50
+
+
+def make_matches(n):
+    matches, analyses = {}, {}
+    for i in range(n):
+        team1, team2 = f"Team {2 * i}", f"Team {2 * i + 1}"
+        match_id = f"m{i}"
+        matches[match_id] = {
+            "id": match_id, "team1": {"name": team1}, "team2": {"name": team2},
+            "tournament": "Bench Cup", "format": "bo3", "status": "upcoming",
+            "maps_score": None, "odds_team1": 1.6, "odds_team2": 2.3,
+        }
+        analyses[match_id] = {
+            "prediction": {"winner": team1, "confidence": 60.0 + i % 30,
+                           "reasoning": f"{team1} is rated higher", "risk_level": "Medium"},
+            "team_stats": {team1: {"recent_form": "70%"}, team2: {"recent_form": "40%"}},
+        }
+    return matches, analyses
+
+
+async def everyone_asks(analyzer, matches, analyses):
+    started = time.perf_counter()
+    answers = await asyncio.gather(*[
+        analyzer.analyze(match_id, matches[match_id], analyses[match_id])
+        for _ in range(USERS) for match_id in matches
+    ])
+    return answers, time.perf_counter() - started
+
+
+async def naive(base_url, matches, analyses):
+    """One generateContent call per match per user"""
+    async with httpx.AsyncClient(timeout=60, limits=httpx.Limits(max_connections=NAIVE_CONNECTIONS)) as client:
+        async def one(match_id):
+            prompt = PROMPT.format(matches=json.dumps(match_block(match_id, matches[match_id], analyses[match_id])))
+            response = await client.post(f"{base_url}/v1beta/models/stub:generateContent",
+                                         json={"contents": [{"role": "user", "parts": [{"text": prompt}]}]})
+            return response.json()
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one(match_id) for _ in range(USERS) for match_id in matches])
+        return time.perf_counter() - started
+
+
+def line(label, server, seconds, extra=""):
+    print(f"{label:<36} {server.calls:>5} calls {server.tokens:>8} tokens {seconds:7.2f}s{extra}")
+
+
+async def main():
+    server = start_fake_gemini_api(latency=LATENCY, per_match_latency=PER_MATCH_LATENCY)
+    matches, analyses = make_matches(MATCHES)
+    requests = MATCHES * USERS
+    print(f"{USERS} users x {MATCHES} matches = {requests} requests, stub latency "
+          f"{LATENCY * 1000:.0f} ms + {PER_MATCH_LATENCY * 1000:.0f} ms per match")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cache_path = os.path.join(workdir, "gemini_cache.db")
+        options = dict(api_key="test", model="stub", base_url=server.base_url, cache_path=cache_path,
+                       requests_per_minute=1000, tokens_per_minute=10_000_000)
+
+        seconds = await naive(server.base_url, matches, analyses)
+        line("one call per match per user", server, seconds)
+
+        server.reset()
+        analyzer = GeminiAnalyzer(**options)
+        answers, seconds = await everyone_asks(analyzer, matches, analyses)
+        assert all(a is not None for a in answers) and server.matches == MATCHES, server.matches
+        line("analyzer (batched, coalesced)", server, seconds,
+             f"   {analyzer.coalesced} coalesced, {MATCHES / server.calls:.1f} matches per call")
+        await analyzer.close()
+
+        server.reset()
+        analyzer = GeminiAnalyzer(**options)
+        answers, seconds = await everyone_asks(analyzer, matches, analyses)
+        assert all(a is not None for a in answers) and server.calls == 0
+        line("after a restart (disk cache)", server, seconds,
+             f"   {analyzer.hits} hits, {seconds / requests * 1e6:.0f} us per request")
+
+        server.reset()
+        for match_id in list(matches)[:CHANGED]:
+            matches[match_id] = dict(matches[match_id], status="live", maps_score="1:0")
+        answers, seconds = await everyone_asks(analyzer, matches, analyses)
+        assert all(a is not None for a in answers) and server.matches == CHANGED
+        line(f"{CHANGED} matches changed score", server, seconds)
+        analyzer.cache.close()
+        await analyzer.close()
+
+        server.reset()
+        budget = dict(options, cache_path=os.path.join(workdir, "budget.db"), requests_per_minute=3)
+        analyzer = GeminiAnalyzer(**budget)
+        answers, seconds = await everyone_asks(analyzer, matches, analyses)
+        answered = sum(a is not None for a in answers) // USERS
+        assert server.calls == 3 and answered == server.matches
+        line("budget of 3 requests/minute", server, seconds,
+             f"   {answered} from the model, {MATCHES - answered} fall back to the numeric prediction")
+        analyzer.cache.close()
+        await analyzer.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Benchmark: head-to-head and team-form lookups at 1M archived matches
+
+Compares the archive path (query a team's rows from SQLite, decode the JSON
+and walk the dicts, as the former AppCore.team_history did) with the columnar
+HistoryStore (CSR row range + vectorized mask over memory-mapped columns),
+both with the store compacted into one segment and spread over 16 segments.
+
+Run from the repository root (BENCH_MATCHES overrides the size):
+    python benchmarks/bench_history_store.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.history_store import HistoryStore
+from app.services.match_archive import MatchArchive
+from app.services.rating_engine import result_from_match
+
+MATCHES = int(os.getenv("BENCH_MATCHES", 1_000_000))
+TEAMS = 1000
+MAPS = ["mirage", "inferno", "nuke", "ancient", "anubis", "dust2", "train"]
+BASELINE_LOOKUPS = 20
+LOOKUPS = 2000
+
+
+def make_matches(n, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2015, 1, 1)
+    for i in range(n):
+        team1, team2 = rng.sample(range(TEAMS), 2)
+        maps = []
+        for name in rng.sample(MAPS, rng.choice((1, 2, 3))):
+            rounds = (13, rng.randint(0, 11)) if rng.random() < 0.5 else (rng.randint(0, 11), 13)
+            maps.append({"name": name, "team1_score": rounds[0], "team2_score": rounds[1]})
+        won = sum(a > b for a, b in ((m["team1_score"], m["team2_score"]) for m in maps))
+        yield {
+            "id": str(i),
+            "team1": {"name": f"Team {team1}"},
+            "team2": {"name": f"Team {team2}"},
+            "start_time": (start + timedelta(minutes=5 * i)).isoformat(),
+            "maps_score": f"{won}:{len(maps) - won}",
+            "maps": maps,
+        }
+
+
+def archive_head_to_head(archive, team, opponent):
+    """Full-history version of the former AppCore.team_history archive scan"""
+    matches, _ = archive.query(team=team, page_size=MATCHES)
+    wins = draws = losses = 0
+    for match in matches:
+        result = result_from_match(match)
+        if result is None or opponent not in (result.team1, result.team2):
+            continue
+        if result.score == 0.5:
+            draws += 1
+        elif (result.score == 1.0) == (result.team1 == team):
+            wins += 1
+        else:
+            losses += 1
+    return wins, draws, losses
+
+
+def timed(fn, pairs):
+    start = time.perf_counter()
+    results = [fn(a, b) for a, b in pairs]
+    return (time.perf_counter() - start) / len(pairs), results
+
+
+def main():
+    rng = random.Random(2)
+    pairs = [tuple(f"Team {t}" for t in rng.sample(range(TEAMS), 2)) for _ in range(LOOKUPS)]
+    print(f"{MATCHES} matches, {TEAMS} teams")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        archive = MatchArchive(os.path.join(workdir, "archive.db"), max_rows=MATCHES * 2,
+                               max_age_days=None, compact_every=MATCHES * 2)
+        start = time.perf_counter()
+        batch = []
+        for match in make_matches(MATCHES):
+            batch.append(match)
+            if len(batch) == 50_000:
+                archive.append(batch)
+                batch = []
+        archive.append(batch)
+        print(f"archive filled in {time.perf_counter() - start:.1f}s")
+
+        store = HistoryStore(os.path.join(workdir, "history"), max_segments=16)
+        start = time.perf_counter()
+        store.sync(archive, batch_size=MATCHES // 16 + 1)
+        print(f"history store synced from the archive in {time.perf_counter() - start:.1f}s "
+              f"({len(store.segments)} segments)")
+        fragmented, _ = timed(store.head_to_head, pairs)
+        start = time.perf_counter()
+        store.compact()
+        print(f"compacted into {len(store.segments)} segment in {time.perf_counter() - start:.2f}s")
+
+        baseline, expected = timed(lambda a, b: archive_head_to_head(archive, a, b), pairs[:BASELINE_LOOKUPS])
+        columnar, results = timed(store.head_to_head, pairs)
+        assert results[:BASELINE_LOOKUPS] == expected, "head-to-head results differ"
+        form, _ = timed(lambda a, b: store.form(a, 10), pairs)
+        maps, _ = timed(lambda a, b: store.map_stats(a), pairs)
+
+        print(f"{'head-to-head, archive JSON scan':<40} {baseline * 1e6:>12.1f} us")
+        print(f"{'head-to-head, 16 segments':<40} {fragmented * 1e6:>12.1f} us")
+        print(f"{'head-to-head, 1 segment':<40} {columnar * 1e6:>12.1f} us   x{baseline / columnar:.0f}")
+        print(f"{'form over last 10 series':<40} {form * 1e6:>12.1f} us")
+        print(f"{'per-map record':<40} {maps * 1e6:>12.1f} us")
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
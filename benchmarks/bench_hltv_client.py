@@ -0,0 +1,70 @@
+"""
+Benchmark: parallel HLTV page fetching through HLTVClient against the local fixture server
+
+Compares sequential fetching with the pooled, concurrency-limited client.
+Every 10th response from the stub is a 429 so the retry path is exercised.
+
+Run from the repository root:
+    python benchmarks/bench_hltv_client.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.hltv_client import FetchError, HLTVClient
+from fixture_server import start_fixture_server
+
+MATCH_PAGES = 40
+TEAM_PAGES = 40
+LATENCY = 0.05
+
+
+def page_paths():
+    match_paths = [f"/matches/{2382000 + i}/team-a-vs-team-b" for i in range(MATCH_PAGES)]
+    team_paths = [f"/team/{4000 + i}/team-{i}" for i in range(TEAM_PAGES)]
+    return match_paths, team_paths
+
+
+async def run_sequential(base_url):
+    match_paths, team_paths = page_paths()
+    async with HLTVClient(base_url, per_host_limit=1, rate=1000, retries=3, backoff_base=0.01) as client:
+        start = time.perf_counter()
+        results = {}
+        for path in ["/matches", *match_paths, *team_paths]:
+            try:
+                results[path] = await client.fetch(path)
+            except FetchError as e:
+                results[path] = e
+        return results, time.perf_counter() - start
+
+
+async def run_parallel(base_url, per_host_limit):
+    match_paths, team_paths = page_paths()
+    async with HLTVClient(base_url, per_host_limit=per_host_limit, rate=1000, burst=50,
+                          retries=3, backoff_base=0.01) as client:
+        start = time.perf_counter()
+        results = await client.fetch_pages(match_paths, team_paths)
+        return results, time.perf_counter() - start
+
+
+def report(label, results, elapsed):
+    failed = sum(1 for r in results.values() if isinstance(r, FetchError))
+    print(f"{label:<28} {len(results):>4} pages  {elapsed:6.2f}s  "
+          f"{len(results) / elapsed:7.1f} pages/s  failed={failed}")
+
+
+def main():
+    server = start_fixture_server(latency=LATENCY, fail_every=10)
+    print(f"Fixture server: {server.base_url} (latency {LATENCY * 1000:.0f} ms/request)")
+    report("sequential", *asyncio.run(run_sequential(server.base_url)))
+    for limit in (4, 8, 16):
+        report(f"parallel, per-host limit {limit}", *asyncio.run(run_parallel(server.base_url, limit)))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
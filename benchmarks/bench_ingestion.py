@@ -0,0 +1,127 @@
+"""
+Benchmark: ingesting scraper batches into SQLite
+
+Compares writing 10k synthetic matches row by row through the ORM
+(session.merge) with the MatchIngestor (diff + one ON CONFLICT executemany
+per table), then re-ingests the same batch with no changes and with 2% of
+the matches changed. "lock" is the time spent in the write transaction.
+
+Run from the repository root:
+    python benchmarks/bench_ingestion.py
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database import Base, Match, Team, create_engine, match_row, team_row
+from app.services.ingestion import MatchIngestor
+from app.services.match_store import split_teams
+
+MATCHES = 10_000
+TEAMS = 400
+CHANGED_SHARE = 0.02
+
+
+def make_matches(n, n_teams, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    matches = []
+    for i in range(n):
+        team1, team2 = rng.sample(range(n_teams), 2)
+        matches.append({
+            "id": f"m{i:06d}",
+            "team1": {"name": f"Team {team1}", "short_name": f"T{team1}"},
+            "team2": {"name": f"Team {team2}", "short_name": f"T{team2}"},
+            "tournament": f"Tournament {i % 120}",
+            "start_time": (start + timedelta(minutes=30 * i)).isoformat(),
+            "format": rng.choice(["BO1", "BO3", "BO5"]),
+            "status": "upcoming",
+            "odds_team1": round(rng.uniform(1.1, 4.0), 2),
+            "odds_team2": round(rng.uniform(1.1, 4.0), 2),
+        })
+    return matches
+
+
+def change_some(matches, share, seed=2):
+    rng = random.Random(seed)
+    changed = [dict(match) for match in matches]
+    for index in rng.sample(range(len(changed)), int(len(changed) * share)):
+        changed[index].update(status="live", maps_score="1:0", rounds_score=f"{rng.randint(0, 12)}:{rng.randint(0, 12)}")
+    return changed
+
+
+async def fresh_database(path):
+    engine = create_engine(f"sqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def row_count(sessions):
+    async with sessions() as session:
+        return await session.scalar(select(func.count()).select_from(Match))
+
+
+async def orm_row_by_row(sessions, matches):
+    teams, rows = split_teams(matches)
+    started = time.perf_counter()
+    async with sessions() as session:
+        for team in teams:
+            await session.merge(Team(**team_row(team)))
+        for row in rows:
+            await session.merge(Match(**match_row(row)))
+        await session.commit()
+    return time.perf_counter() - started
+
+
+def report(label, seconds, result=None):
+    line = f"{label:<34} {seconds * 1000:9.1f} ms"
+    if result is not None:
+        line += (f"   lock {result.write_seconds * 1000:8.1f} ms   inserted {result.inserted:>6}"
+                 f"  updated {result.updated:>6}  unchanged {result.unchanged:>6}")
+    print(line)
+
+
+async def main():
+    matches = make_matches(MATCHES, TEAMS)
+    changed = change_some(matches, CHANGED_SHARE)
+    print(f"{MATCHES} matches, {TEAMS} teams, {CHANGED_SHARE:.0%} changed in the last batch")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        engine, sessions = await fresh_database(os.path.join(workdir, "orm.db"))
+        seconds = await orm_row_by_row(sessions, matches)
+        report("ORM merge, row by row (insert)", seconds)
+        seconds = await orm_row_by_row(sessions, changed)
+        report("ORM merge, row by row (2% changed)", seconds)
+        assert await row_count(sessions) == MATCHES
+        await engine.dispose()
+
+        engine, sessions = await fresh_database(os.path.join(workdir, "ingest.db"))
+        ingestor = MatchIngestor(sessions)
+        for label, batch in (("ingestor: initial load", matches), ("ingestor: same batch", matches),
+                             ("ingestor: 2% changed", changed)):
+            started = time.perf_counter()
+            result = await ingestor.ingest(batch)
+            report(label, time.perf_counter() - started, result)
+
+        # A restarted leader has no cache and diffs against the database
+        cold = MatchIngestor(sessions)
+        started = time.perf_counter()
+        result = await cold.ingest(changed)
+        report("ingestor: same batch, cold cache", time.perf_counter() - started, result)
+        assert result.written == 0 and result.unchanged == MATCHES
+        assert await row_count(sessions) == MATCHES
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
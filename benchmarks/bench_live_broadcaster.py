@@ -0,0 +1,106 @@
+"""
+Load test: LiveBroadcaster fan-out to thousands of subscribers
+
+A local publisher updates the round score of live matches several times a
+second while thousands of subscriber tasks consume events; a share of them
+are deliberately slow to exercise the resync path.
+
+Run from the repository root:
+    python benchmarks/bench_live_broadcaster.py
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.live_broadcaster import LiveBroadcaster
+
+SUBSCRIBERS = 5000
+SLOW_SHARE = 0.02
+LIVE_MATCHES = 50
+UPCOMING_MATCHES = 200
+UPDATES = 200
+UPDATE_INTERVAL = 0.01
+
+
+def initial_matches():
+    matches = []
+    for i in range(LIVE_MATCHES + UPCOMING_MATCHES):
+        live = i < LIVE_MATCHES
+        matches.append({
+            "id": f"match_{i}",
+            "team1": {"id": str(2 * i), "name": f"Team {2 * i}"},
+            "team2": {"id": str(2 * i + 1), "name": f"Team {2 * i + 1}"},
+            "tournament": "Benchmark Cup",
+            "format": "BO3",
+            "status": "live" if live else "upcoming",
+            "maps_score": "0:0" if live else None,
+            "rounds_score": "0:0" if live else None,
+            "current_map": "de_mirage" if live else None,
+        })
+    return matches
+
+
+async def subscriber(broadcaster, slow, latencies, counts):
+    subscription = broadcaster.subscribe()
+    try:
+        async for event in subscription:
+            # Events are shared strings, so the publish time is looked up by identity
+            sent_at = broadcaster.sent_at.get(id(event))
+            if sent_at is None:
+                counts["snapshot"] += 1
+            else:
+                counts["diff"] += 1
+                latencies.append(time.perf_counter() - sent_at)
+            if slow:
+                await asyncio.sleep(0.2)
+    finally:
+        subscription.close()
+
+
+async def main():
+    broadcaster = LiveBroadcaster(queue_size=32)
+    broadcaster.sent_at = {}
+    matches = initial_matches()
+    broadcaster.publish(matches)
+
+    latencies, counts = [], {"snapshot": 0, "diff": 0}
+    tasks = [
+        asyncio.create_task(subscriber(broadcaster, i < SUBSCRIBERS * SLOW_SHARE, latencies, counts))
+        for i in range(SUBSCRIBERS)
+    ]
+    await asyncio.sleep(0.5)
+
+    publish_times, events = [], []
+    start = time.perf_counter()
+    for update in range(UPDATES):
+        i = update % LIVE_MATCHES
+        match = dict(matches[i], rounds_score=f"{update // LIVE_MATCHES}:{update % 13}")
+        matches[i] = match
+        t = time.perf_counter()
+        event = broadcaster.publish(matches)
+        publish_times.append(time.perf_counter() - t)
+        broadcaster.sent_at[id(event)] = t
+        # Keep events alive so their ids are not reused
+        events.append(event)
+        await asyncio.sleep(UPDATE_INTERVAL)
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(1.0)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies.sort()
+    print(f"subscribers: {SUBSCRIBERS} ({int(SUBSCRIBERS * SLOW_SHARE)} slow), updates: {UPDATES} in {elapsed:.2f}s")
+    print(f"publish (diff + serialize + fan-out): median {statistics.median(publish_times) * 1000:.2f} ms, "
+          f"max {max(publish_times) * 1000:.2f} ms")
+    print(f"delivered diffs: {counts['diff']}, snapshots: {counts['snapshot']}, resyncs: {broadcaster.resyncs}")
+    print(f"delivery latency: p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,166 @@
+"""
+Benchmark: in-play win probabilities for thousands of live matches
+
+BENCH_LIVE live BO1/BO3/BO5 matches advance round by round; on every tick
+BENCH_CHANGED of them change score. Measures one InPlayModel evaluation,
+one LiveWinTracker update (changed and unchanged state) and annotating a
+whole match list the way every snapshot publish does. For reference, a
+sample of updates is also computed from scratch: the per-round
+probability found by bisection over a memoized round-by-round recursion,
+which is what each update would cost without the lookup tables. Both
+must agree.
+
+Run from the repository root:
+    python benchmarks/bench_live_win_probability.py
+"""
+import os
+import random
+import sys
+import time
+from functools import lru_cache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.live_win_probability import InPlayModel, LiveWinTracker, map_finished
+from app.services.predictor import Prediction
+
+LIVE = int(os.getenv("BENCH_LIVE", 5000))
+CHANGED = float(os.getenv("BENCH_CHANGED", 0.1))
+TICKS = int(os.getenv("BENCH_TICKS", 20))
+FROM_SCRATCH_SAMPLE = 200
+
+
+def make_matches(rng):
+    matches, predictions = [], {}
+    for i in range(LIVE):
+        match_id = f"live{i}"
+        matches.append({
+            "id": match_id, "status": "live", "format": rng.choice(["BO1", "BO3", "BO3", "BO5"]),
+            "team1": {"name": f"Team {2 * i}"}, "team2": {"name": f"Team {2 * i + 1}"},
+            "maps_score": "0:0", "rounds_score": "0:0", "current_map": "de_mirage",
+        })
+        series = rng.uniform(0.2, 0.8)
+        predictions[match_id] = Prediction(match_id, f"Team {2 * i}", f"Team {2 * i + 1}", series,
+                                           min(max(series + rng.uniform(-0.1, 0.1), 0.05), 0.95),
+                                           1500.0, 1500.0, 10)
+    return matches, predictions
+
+
+def play_round(match, rng):
+    """Next round of a match; a decided map is added to the series score, a decided series restarts"""
+    x, y = map(int, match["rounds_score"].split(":"))
+    a, b = map(int, match["maps_score"].split(":"))
+    if rng.random() < 0.5:
+        x += 1
+    else:
+        y += 1
+    if map_finished((x, y)):
+        a, b = (a + 1, b) if x > y else (a, b + 1)
+        x = y = 0
+        if max(a, b) > int(match["format"][2:]) // 2:
+            a = b = 0
+    return dict(match, maps_score=f"{a}:{b}", rounds_score=f"{x}:{y}")
+
+
+def from_scratch(pre_series, pre_map, maps, series_score, rounds):
+    """The same probability without tables: bisection on a memoized recursion per update"""
+    def map_win(r, x, y):
+        @lru_cache(maxsize=None)
+        def w(x, y):
+            if x >= 12 and y >= 12:
+                if max(x, y) >= 16:
+                    return 1.0 if x > y else 0.0
+                if x == y == 15:
+                    return overtime
+            elif max(x, y) >= 13:
+                return 1.0 if x > y else 0.0
+            return r * w(x + 1, y) + (1 - r) * w(x, y + 1)
+
+        # 15:15 restarts overtime: iterate W(12:12) to a fixed point
+        overtime = 0.5
+        for _ in range(60):
+            w.cache_clear()
+            overtime = w(12, 12)
+        if x >= 12 and y >= 12:
+            shift = (min(x, y) - 12) // 3 * 3
+            x, y = x - shift, y - shift
+        return w(x, y)
+
+    def series_win(q, a, b):
+        need = maps // 2 + 1
+        if a >= need or b >= need or a + b >= maps:
+            return 1.0 if a >= need else 0.0
+        return q * series_win(q, a + 1, b) + (1 - q) * series_win(q, a, b + 1)
+
+    def solve(f, target):
+        lo, hi = 0.0, 1.0
+        for _ in range(40):
+            mid = (lo + hi) / 2
+            lo, hi = (mid, hi) if f(mid) < target else (lo, mid)
+        return (lo + hi) / 2
+
+    r = solve(lambda r: map_win(r, 0, 0), pre_map)
+    q = solve(lambda q: series_win(q, 0, 0), pre_series)
+    on_map = map_win(r, *rounds)
+    a, b = series_score
+    return on_map * series_win(q, a + 1, b) + (1 - on_map) * series_win(q, a, b + 1)
+
+
+def main():
+    rng = random.Random(7)
+    started = time.perf_counter()
+    model = InPlayModel()
+    build = time.perf_counter() - started
+    matches, predictions = make_matches(rng)
+    # Play everyone into a spread of realistic states first
+    for _ in range(rng.randrange(0, 40)):
+        matches = [play_round(m, rng) for m in matches]
+    print(f"{LIVE} live matches, {CHANGED:.0%} change state per tick, {TICKS} ticks; "
+          f"tables built in {build * 1000:.0f} ms, {os.cpu_count()} CPU core(s)")
+
+    states = []
+    for m in matches:
+        p = predictions[m["id"]]
+        states.append((p.team1_win_probability, int(m["format"][2:]),
+                       tuple(map(int, m["maps_score"].split(":"))),
+                       tuple(map(int, m["rounds_score"].split(":"))), p.map_win_probability))
+    started = time.perf_counter()
+    for pre_series, maps, series_score, rounds, pre_map in states:
+        model.series_probability(pre_series, maps, series_score, rounds, pre_map)
+    lookup = (time.perf_counter() - started) / len(states)
+    print(f"{'InPlayModel.series_probability':<34} {lookup * 1e6:8.2f} us per update")
+
+    sample = states[:FROM_SCRATCH_SAMPLE]
+    started = time.perf_counter()
+    exact = [from_scratch(s[0], s[4], s[1], s[2], s[3]) for s in sample if not map_finished(s[3])]
+    scratch = (time.perf_counter() - started) / len(exact)
+    tabled = [model.series_probability(s[0], s[1], s[2], s[3], s[4])["team1"] for s in sample if not map_finished(s[3])]
+    error = max(abs(a - b) for a, b in zip(exact, tabled))
+    assert error < 0.01, error
+    print(f"{'from scratch (no tables)':<34} {scratch * 1e6:8.0f} us per update  "
+          f"{scratch / lookup:.0f}x slower, max difference {error:.4f}")
+
+    tracker = LiveWinTracker(model)
+    tracker.annotate(matches, predictions)
+    tracker.seconds, tracker.recomputed = 0.0, 0
+    annotate = 0.0
+    for _ in range(TICKS):
+        moving = set(rng.sample(range(LIVE), int(LIVE * CHANGED)))
+        matches = [play_round(m, rng) if i in moving else m for i, m in enumerate(matches)]
+        started = time.perf_counter()
+        annotated = tracker.annotate(matches, predictions)
+        annotate += time.perf_counter() - started
+    assert all(m["live_win_probability"] is not None for m in annotated)
+
+    started = time.perf_counter()
+    for m in annotated:
+        tracker.update(m, predictions[m["id"]])
+    unchanged = (time.perf_counter() - started) / len(annotated)
+    print(f"{'tracker update, state changed':<34} {tracker.seconds / tracker.recomputed * 1e6:8.2f} us per update")
+    print(f"{'tracker update, state unchanged':<34} {unchanged * 1e6:8.2f} us per update")
+    print(f"{'annotate a snapshot':<34} {annotate / TICKS * 1000:8.2f} ms per snapshot  "
+          f"{annotate / TICKS / LIVE * 1e6:.2f} us per live match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: match/team lookups with the indexed MatchStore vs linear list scans
+
+Run from the repository root:
+    python benchmarks/bench_match_store.py
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.match_store import MatchStore
+
+LIVE_MATCHES = 10
+REPEATS = 2000
+
+
+def make_data(n_matches, n_teams):
+    teams = [
+        {"id": str(i), "name": f"Team {i}", "short_name": f"T{i}", "created_at": datetime.now()}
+        for i in range(n_teams)
+    ]
+    matches = []
+    for i in range(n_matches):
+        matches.append({
+            "id": f"match_{i}",
+            "team1_id": str(i % n_teams),
+            "team2_id": str((i * 7 + 1) % n_teams),
+            "tournament": f"Tournament {i % 50}",
+            "start_time": datetime.now(),
+            "format": "BO3",
+            "status": "live" if i < LIVE_MATCHES else "upcoming",
+        })
+    return teams, matches
+
+
+def linear_analyze(matches, teams, match_id):
+    match = next((m for m in matches if m["id"] == match_id), None)
+    team1 = next((t for t in teams if t["id"] == match["team1_id"]), None)
+    team2 = next((t for t in teams if t["id"] == match["team2_id"]), None)
+    return match, team1, team2
+
+
+def linear_live(matches, teams):
+    result = []
+    for match in matches:
+        if match["status"] != "live":
+            continue
+        match_data = match.copy()
+        match_data["team1"] = next((t for t in teams if t["id"] == match["team1_id"]), None)
+        match_data["team2"] = next((t for t in teams if t["id"] == match["team2_id"]), None)
+        result.append(match_data)
+    return result
+
+
+def timeit(fn, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    print(f"{'matches':>8} {'teams':>6} | {'analyze linear':>15} {'analyze store':>14} | "
+          f"{'live linear':>12} {'live store':>11} | {'all store':>10}  (µs/call)")
+    for n_matches, n_teams in ((100, 20), (1_000, 100), (10_000, 500), (50_000, 1_000)):
+        teams, matches = make_data(n_matches, n_teams)
+        store = MatchStore()
+        store.load(teams, matches)
+        target = matches[-1]["id"]
+        repeats = max(20, REPEATS * 100 // n_matches)
+
+        analyze_linear = timeit(lambda: linear_analyze(matches, teams, target), repeats)
+        analyze_store = timeit(lambda: store.match_view(target))
+        live_linear = timeit(lambda: linear_live(matches, teams), repeats)
+        live_store = timeit(lambda: store.match_views(status="live"))
+        all_store = timeit(lambda: store.match_views())
+
+        print(f"{n_matches:>8} {n_teams:>6} | {analyze_linear:>15.2f} {analyze_store:>14.2f} | "
+              f"{live_linear:>12.2f} {live_store:>11.2f} | {all_store:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: odds ingestion and value bets across every open match
+
+BENCH_MATCHES open matches are priced by BENCH_BOOKS bookmakers; every
+refresh moves a fraction of the prices. Each refresh is recorded into the
+OddsBook (only the changed prices reach the history log) and the value of
+every match is recomputed: first with a per-match Python loop over the
+bookmakers (implied probabilities, margin removal, best price, expected
+value), then with the vectorized evaluate(). Both must agree.
+
+Run from the repository root:
+    python benchmarks/bench_odds_book.py
+"""
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.odds_book import KELLY_SCALE, OddsBook, evaluate
+
+MATCHES = int(os.getenv("BENCH_MATCHES", 2000))
+BOOKS = int(os.getenv("BENCH_BOOKS", 8))
+REFRESHES = int(os.getenv("BENCH_REFRESHES", 50))
+MOVED = 0.1
+
+
+def make_market(rng):
+    """True probabilities, model probabilities and bookmaker prices with a 3-8% margin"""
+    truth = rng.uniform(0.15, 0.85, MATCHES)
+    model = np.clip(truth + rng.normal(0, 0.05, MATCHES), 0.02, 0.98)
+    return truth, model, prices(rng, truth)
+
+
+def prices(rng, truth):
+    p = np.stack([truth, 1 - truth], axis=1)[:, None, :] * rng.uniform(1.03, 1.08, (MATCHES, BOOKS, 1))
+    p = p * rng.uniform(0.97, 1.03, (MATCHES, BOOKS, 2))
+    odds = np.round(1 / p, 2)
+    odds[rng.random((MATCHES, BOOKS)) < 0.1] = np.nan  # not every book prices every match
+    return odds
+
+
+def loop_value(odds, model):
+    """What a per-match implementation does: one Python pass per match and book"""
+    rows = []
+    for i in range(len(odds)):
+        margins, fair1, fair2 = [], [], []
+        best = [(math.nan, -1), (math.nan, -1)]
+        for b in range(odds.shape[1]):
+            o1, o2 = float(odds[i, b, 0]), float(odds[i, b, 1])
+            for side, o in enumerate((o1, o2)):
+                if not math.isnan(o) and (math.isnan(best[side][0]) or o > best[side][0]):
+                    best[side] = (o, b)
+            if math.isnan(o1) or math.isnan(o2):
+                continue
+            total = 1 / o1 + 1 / o2
+            margins.append(total - 1)
+            fair1.append(1 / o1 / total)
+            fair2.append(1 / o2 / total)
+        p = (float(model[i]), 1 - float(model[i]))
+        sides = []
+        for side in range(2):
+            price = best[side][0]
+            ev = p[side] * price - 1
+            kelly = max(0.0, (p[side] * price - 1) / (price - 1)) * KELLY_SCALE if not math.isnan(price) else math.nan
+            sides.append((price, ev, kelly))
+        rows.append((sum(margins) / len(margins) if margins else math.nan,
+                     sum(fair1) / len(fair1) if fair1 else math.nan, sides))
+    return rows
+
+
+def main():
+    rng = np.random.default_rng(7)
+    truth, model, odds = make_market(rng)
+    match_ids = [f"m{i}" for i in range(MATCHES)]
+    books = [f"book{b}" for b in range(BOOKS)]
+    print(f"{MATCHES} open matches x {BOOKS} bookmakers, {REFRESHES} refreshes moving {MOVED:.0%} of prices, "
+          f"{os.cpu_count()} CPU core(s)")
+
+    book = OddsBook()
+    flat_ids = np.repeat(match_ids, BOOKS)
+    flat_books = np.tile(books, MATCHES)
+    loop_seconds = vector_seconds = record_seconds = 0.0
+    for refresh in range(REFRESHES):
+        moved = rng.random((MATCHES, BOOKS, 1)) < MOVED
+        odds = np.where(moved, prices(rng, truth), odds)
+
+        started = time.perf_counter()
+        book.record(flat_ids, flat_books, odds.reshape(-1, 2), at=float(refresh))
+        record_seconds += time.perf_counter() - started
+
+        latest = book.latest(match_ids).astype(np.float64)
+        started = time.perf_counter()
+        rows = loop_value(latest, model)
+        loop_seconds += time.perf_counter() - started
+
+        started = time.perf_counter()
+        value = evaluate(latest, model)
+        vector_seconds += time.perf_counter() - started
+
+        if refresh == 0:
+            margin = np.array([r[0] for r in rows])
+            ev = np.array([[s[1] for s in r[2]] for r in rows])
+            assert np.allclose(margin, value["margin"], equal_nan=True)
+            assert np.allclose(np.array([r[1] for r in rows]), value["fair"][:, 0], equal_nan=True)
+            assert np.allclose(ev, value["expected_value"], equal_nan=True)
+
+    stats = book.stats()
+    quotes = MATCHES * BOOKS * REFRESHES
+    print(f"{'record (dedup + history log)':<32} {record_seconds / REFRESHES * 1000:8.2f} ms/refresh "
+          f"{quotes / record_seconds / 1e6:6.2f} M quotes/s, {stats['logged_quotes']} of {quotes} logged")
+    print(f"{'value, per-match Python loop':<32} {loop_seconds / REFRESHES * 1000:8.2f} ms/refresh")
+    print(f"{'value, vectorized evaluate()':<32} {vector_seconds / REFRESHES * 1000:8.2f} ms/refresh "
+          f"{loop_seconds / vector_seconds:6.1f}x faster")
+    value_bets = int((np.nan_to_num(value["expected_value"], nan=-1) > 0.02).sum())
+    print(f"{value_bets} sides with expected value above 2% after the last refresh")
+
+    started = time.perf_counter()
+    power = evaluate(latest, model, method="power")
+    seconds = time.perf_counter() - started
+    assert np.allclose(power["fair"].sum(axis=1)[~np.isnan(power["margin"])], 1.0)
+    print(f"{'value, power margin removal':<32} {seconds * 1000:8.2f} ms/refresh")
+
+
+if __name__ == "__main__":
+    main()
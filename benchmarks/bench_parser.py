@@ -0,0 +1,73 @@
+"""
+Benchmark: HLTV page parse throughput (pages/sec)
+
+Compares a full BeautifulSoup parse with html.parser (the previous default),
+the strained parse on each available backend and the content-hash skip for
+unchanged pages.
+
+Run from the repository root:
+    python benchmarks/bench_parser.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from app.services import hltv_parser
+from app.services.hltv_parser import HLTVParser
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "hltv")
+SECONDS = 2.0
+
+
+def load(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def throughput(fn):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < SECONDS:
+        fn()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def full_parse(html, backend):
+    soup = BeautifulSoup(html, backend)
+    return soup.select("div.liveMatch-container, div.upcomingMatch, div.teamsBox")
+
+
+def main():
+    pages = {"matches.html": hltv_parser.parse_matches_page, "match.html": hltv_parser.parse_match_page}
+    backends = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+        backends.append("lxml")
+    except ImportError:
+        print("lxml not installed, strained parse only measured on html.parser")
+
+    print(f"{'page':<14} {'variant':<28} {'pages/sec':>12}")
+    for name, parse in pages.items():
+        html = load(name)
+        print(f"{name:<14} {'full, html.parser':<28} {throughput(lambda: full_parse(html, 'html.parser')):>12.1f}")
+        for backend in backends:
+            hltv_parser.PARSER_BACKEND = backend
+            print(f"{name:<14} {'strained, ' + backend:<28} {throughput(lambda: parse(html)):>12.1f}")
+
+        parser = HLTVParser()
+        key = "/" + name
+        if name == "matches.html":
+            cached = lambda: parser.parse_matches_page(html, key)
+        else:
+            cached = lambda: parser.parse_match_page(html, key)
+        cached()
+        print(f"{name:<14} {'unchanged (hash skip)':<28} {throughput(cached):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
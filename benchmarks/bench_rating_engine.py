@@ -0,0 +1,70 @@
+"""
+Benchmark: RatingEngine fitting and batched matchup scoring
+
+Run from the repository root:
+    python benchmarks/bench_rating_engine.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.rating_engine import MatchResult, RatingEngine
+
+N_TEAMS = 500
+N_HISTORY = 200_000
+MAPS = ["mirage", "inferno", "nuke", "ancient", "anubis", "dust2", "train"]
+
+
+def synthetic_history(rng):
+    strength = rng.normal(0, 200, N_TEAMS)
+    t1 = rng.integers(0, N_TEAMS, N_HISTORY)
+    t2 = (t1 + rng.integers(1, N_TEAMS, N_HISTORY)) % N_TEAMS
+    p = 1 / (1 + 10 ** ((strength[t2] - strength[t1]) / 400))
+    won = rng.random(N_HISTORY) < p
+    played_at = np.sort(rng.uniform(1.6e9, 1.6e9 + 5 * 365 * 86400, N_HISTORY))
+    map_choice = rng.integers(0, len(MAPS), (N_HISTORY, 2))
+    return [
+        MatchResult(
+            played_at=float(played_at[i]),
+            team1=f"team{t1[i]}",
+            team2=f"team{t2[i]}",
+            score=1.0 if won[i] else 0.0,
+            maps=[(MAPS[m], 1.0 if won[i] else 0.0) for m in map_choice[i]],
+        )
+        for i in range(N_HISTORY)
+    ]
+
+
+def main():
+    rng = np.random.default_rng(7)
+    history = synthetic_history(rng)
+
+    engine = RatingEngine()
+    start = time.perf_counter()
+    engine.fit(history)
+    fit_time = time.perf_counter() - start
+    print(f"fit: {N_HISTORY} series ({N_HISTORY * 2} maps) over {N_TEAMS} teams in {fit_time:.2f}s")
+
+    for n in (1_000, 10_000, 100_000):
+        team1 = [f"team{i}" for i in rng.integers(0, N_TEAMS, n)]
+        team2 = [f"team{i}" for i in rng.integers(0, N_TEAMS, n)]
+        maps = [MAPS[i] for i in rng.integers(0, len(MAPS), n)]
+
+        start = time.perf_counter()
+        engine.predict(team1, team2, maps=maps)
+        batched = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for a, b in zip(team1, team2):
+            1 / (1 + 10 ** ((engine.rating(b) - engine.rating(a)) / 400))
+        looped = time.perf_counter() - start
+
+        print(f"{n:>7} matchups: batched {n / batched:>12,.0f}/s   python loop {n / looped:>12,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: incremental rating updates vs full rebuild from the archive
+
+Archives synthetic results in batches, applies each batch incrementally
+(restarting the updater from its saved state halfway through) and checks
+that the final ratings match a full rebuild.
+
+Run from the repository root:
+    python benchmarks/bench_rating_updater.py
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.match_archive import MatchArchive
+from app.services.rating_engine import RatingEngine
+from app.services.rating_updater import RatingUpdater
+
+N_TEAMS = 200
+BATCHES = 40
+BATCH_SIZE = 500
+MAPS = ["Mirage", "Inferno", "Nuke", "Ancient", "Anubis", "Dust2", "Train"]
+
+
+def synthetic_batch(rng, batch, start):
+    matches = []
+    for i in range(BATCH_SIZE):
+        a, b = rng.choice(N_TEAMS, 2, replace=False)
+        won = rng.random() < 0.5 + (b - a) / (4 * N_TEAMS)
+        n = batch * BATCH_SIZE + i
+        matches.append({
+            "id": f"m{n}",
+            "team1": {"name": f"team{a}"},
+            "team2": {"name": f"team{b}"},
+            "winner": f"team{a}" if won else f"team{b}",
+            "tournament": "Synthetic Cup",
+            # ~3 days of matches per batch, so batches straddle rating periods
+            "start_time": (start + timedelta(minutes=9 * n)).isoformat(),
+            "status": "finished",
+            "maps": [
+                {"name": MAPS[rng.integers(len(MAPS))], "team1_score": 13 if won else 9,
+                 "team2_score": 9 if won else 13}
+            ],
+        })
+    return matches
+
+
+def ratings_by_team(engine):
+    return {name: engine.ratings[i] for name, i in engine.team_index.items()}
+
+
+def main():
+    rng = np.random.default_rng(3)
+    start = datetime(2024, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = MatchArchive(os.path.join(tmp, "archive.db"), max_rows=10**7)
+        state_path = os.path.join(tmp, "ratings.npz")
+        updater = RatingUpdater(RatingEngine(), archive, state_path)
+
+        incremental = 0.0
+        for batch in range(BATCHES):
+            archive.append(synthetic_batch(rng, batch, start))
+            if batch == BATCHES // 2:
+                # Simulated restart: resume from the saved state and watermark
+                updater = RatingUpdater(RatingEngine(), archive, state_path)
+                assert updater.load()
+            t = time.perf_counter()
+            updater.update()
+            incremental += time.perf_counter() - t
+
+        full = RatingUpdater(RatingEngine(), archive, os.path.join(tmp, "full.npz"))
+        t = time.perf_counter()
+        full.rebuild()
+        rebuild = time.perf_counter() - t
+
+        a, b = ratings_by_team(updater.engine), ratings_by_team(full.engine)
+        diff = max(abs(a[name] - b[name]) for name in b)
+        print(f"{BATCHES * BATCH_SIZE} results in {BATCHES} batches")
+        print(f"incremental: {incremental / BATCHES * 1000:8.2f} ms per batch")
+        print(f"rebuild:     {rebuild * 1000:8.2f} ms for the whole archive")
+        print(f"max rating difference incremental vs rebuild: {diff:.2e}")
+        assert a.keys() == b.keys() and diff < 1e-6, "incremental ratings diverged from rebuild"
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark: match listing requests/sec, per-request serialization vs
+pre-serialized snapshot bodies
+
+"before" re-implements the previous handlers (dicts built per request and
+encoded by FastAPI, counts recomputed each time); "after" is the current
+endpoint serving a cached body. Requests go through the in-process test
+client of the unified app, so the numbers include routing and response
+handling but no network.
+
+Run from the repository root:
+    python benchmarks/bench_serialization.py
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("ARCHIVE_DB_PATH", os.path.join(_tmp, "archive.db"))
+os.environ.setdefault("RATINGS_STATE_PATH", os.path.join(_tmp, "ratings.npz"))
+os.environ.setdefault("SHARED_STATE_PATH", os.path.join(_tmp, "shared_state.db"))
+os.environ.setdefault("HISTORY_STORE_PATH", os.path.join(_tmp, "match_history"))
+
+from fastapi.testclient import TestClient
+
+from app.core.state import get_core
+from main import app
+
+N_MATCHES = 500
+N_TEAMS = 200
+DURATION = 2.0
+
+
+def synthetic_matches():
+    matches = []
+    for i in range(N_MATCHES):
+        matches.append({
+            "id": f"match_{i}",
+            "team1": {"name": f"Team {i % N_TEAMS}", "logo": "", "country": "EU"},
+            "team2": {"name": f"Team {(i * 7 + 1) % N_TEAMS}", "logo": "", "country": "EU"},
+            "tournament": f"Tournament {i % 20}",
+            "start_time": datetime.now().isoformat(),
+            "format": "BO3",
+            "status": "live" if i < 50 else "upcoming",
+            "maps_score": "1:0" if i < 50 else None,
+            "rounds_score": "7:5" if i < 50 else None,
+            "current_map": "de_mirage" if i < 50 else None,
+            "odds_team1": 1.85,
+            "odds_team2": 1.95,
+            "bookmaker_name": "Bookmaker",
+        })
+    return matches
+
+
+def requests_per_second(get, path, headers=None):
+    count = 0
+    deadline = time.perf_counter() + DURATION
+    while time.perf_counter() < deadline:
+        response = get(path, headers=headers or {})
+        assert response.status_code == 200
+        count += 1
+    return count / DURATION
+
+
+async def legacy_python_matches():
+    snapshot = get_core().snapshots.current()
+    matches = snapshot.matches
+    return {
+        "matches": matches,
+        "total": len(matches),
+        "live_count": len([m for m in matches if m["status"] == "live"]),
+        "upcoming_count": len([m for m in matches if m["status"] == "upcoming"]),
+        "source": "Real-time HLTV Data",
+        "backend": "Python/Flask",
+        "version": snapshot.version,
+        "last_updated": snapshot.created_at.isoformat()
+    }
+
+
+async def legacy_fastapi_matches():
+    matches_with_teams = get_core().store.match_views()
+    return {
+        "message": "Matches from FastAPI Python backend",
+        "matches": matches_with_teams,
+        "total": len(matches_with_teams),
+        "backend": "FastAPI"
+    }
+
+
+def report(name, before, after):
+    print(f"{name:34s} before {before:8.0f} req/s   after {after:8.0f} req/s   x{after / before:.1f}")
+
+
+def main():
+    print(f"{N_MATCHES} matches, {DURATION:.0f}s per measurement")
+    os.environ["REFRESH_SCHEDULER"] = "0"
+    app.add_api_route("/bench/legacy-python-matches", legacy_python_matches)
+    app.add_api_route("/bench/legacy-fastapi-matches", legacy_fastapi_matches)
+
+    with TestClient(app) as client:
+        get_core().snapshots.publish(synthetic_matches())
+        identity = {"Accept-Encoding": "identity"}
+
+        before = requests_per_second(client.get, "/bench/legacy-python-matches", identity)
+        after = requests_per_second(client.get, "/api/python/matches", identity)
+        report("/api/python/matches", before, after)
+        after_compressed = requests_per_second(client.get, "/api/python/matches", {"Accept-Encoding": "gzip, br"})
+        report("/api/python/matches, compressed", before, after_compressed)
+
+        before = requests_per_second(client.get, "/bench/legacy-fastapi-matches", identity)
+        after = requests_per_second(client.get, "/api/matches-fastapi", identity)
+        report("/api/matches-fastapi", before, after)
+
+        sizes = [
+            # httpx decodes compressed bodies, so read the wire size from the header
+            f"{coding} {client.get('/api/python/matches', headers={'Accept-Encoding': coding}).headers['content-length']}"
+            for coding in ("identity", "gzip", "br")
+        ]
+        print(f"body size (bytes): {', '.join(sizes)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark: Monte Carlo series simulation with batch sampling
+
+Simulates BENCH_SIMULATIONS BO1/BO3/BO5 series per match with
+simulate_series() (every map's final score drawn for all simulations at
+once) and, for reference, round by round in a Python loop on a sample.
+Checks the simulated series win and map-count probabilities against the
+exact ones (InPlayModel tables, closed forms), that a seed reproduces a
+result exactly, and that BENCH_MATCHES matches give the same
+distributions inline and across a BENCH_PROCESSES process pool.
+
+Run from the repository root:
+    python benchmarks/bench_series_simulator.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.live_win_probability import InPlayModel
+from app.services.predictor import Prediction
+from app.services.rating_engine import RatingEngine
+from app.services.series_simulator import SeriesSimulator, SeriesSpec, simulate_series
+
+SIMULATIONS = int(os.getenv("BENCH_SIMULATIONS", 100_000))
+MATCHES = int(os.getenv("BENCH_MATCHES", 32))
+PROCESSES = int(os.getenv("BENCH_PROCESSES", max(2, os.cpu_count() or 1)))
+LOOP_SAMPLE = 5_000
+MAPS = ["mirage", "nuke", "ancient", "inferno", "dust2"]
+
+
+def loop_series(spec, n, rng):
+    """Round by round, one series at a time: (maps played, total rounds) per series"""
+    need = spec.best_of // 2 + 1
+    results = []
+    for _ in range(n):
+        wins, total = [0, 0], 0
+        for r in spec.round_probabilities:
+            x = y = 0
+            while True:
+                if rng.random() < r:
+                    x += 1
+                else:
+                    y += 1
+                if x >= 12 and y >= 12:
+                    shift = (min(x, y) - 12) // 3 * 3
+                    if max(x, y) - shift >= 16:
+                        break
+                elif max(x, y) >= 13:
+                    break
+            wins[x < y] += 1
+            total += x + y
+            if max(wins) == need:
+                break
+        results.append((sum(wins), total))
+    return results
+
+
+def main():
+    model = InPlayModel()
+    print(f"{SIMULATIONS} simulations per match, {os.cpu_count()} CPU core(s)")
+
+    for best_of, probabilities in ((1, [0.6]), (3, [0.6, 0.55, 0.45]), (5, [0.6, 0.55, 0.45, 0.5, 0.65])):
+        spec = SeriesSpec(f"bo{best_of}", best_of, MAPS[:best_of], probabilities,
+                          [model.round_probability_for(p) for p in probabilities])
+        started = time.perf_counter()
+        result = simulate_series(spec, SIMULATIONS)
+        batched = time.perf_counter() - started
+
+        started = time.perf_counter()
+        loop = loop_series(spec, LOOP_SAMPLE, random.Random(1))
+        looped = (time.perf_counter() - started) / LOOP_SAMPLE * SIMULATIONS
+
+        assert simulate_series(spec, SIMULATIONS).scores == result.scores
+        summary = result.to_dict()
+        loop_mean = sum(total for _, total in loop) / len(loop)
+        assert abs(summary["total_rounds"]["mean"] - loop_mean) < 1.5, (summary["total_rounds"]["mean"], loop_mean)
+        print(f"BO{best_of}: batch {batched * 1000:7.1f} ms, Python loop {looped * 1000:8.0f} ms "
+              f"({looped / batched:.0f}x), mean rounds {summary['total_rounds']['mean']:.1f} "
+              f"(loop {loop_mean:.1f}), maps {summary['map_count']}")
+
+    # Equal map probabilities: the series and map-count probabilities have closed forms
+    q = 0.58
+    spec = SeriesSpec("exact", 3, MAPS[:3], [q] * 3, [model.round_probability_for(q)] * 3)
+    result = simulate_series(spec, SIMULATIONS).to_dict()
+    exact_series = q * q * (3 - 2 * q)
+    exact_three = 2 * q * (1 - q)
+    simulated_three = result["map_count"]["3"]
+    print(f"BO3 at {q}: series {result['series_win_probability']['team1']:.4f} (exact {exact_series:.4f}), "
+          f"3 maps {simulated_three:.4f} (exact {exact_three:.4f})")
+    assert abs(result["series_win_probability"]["team1"] - exact_series) < 0.01
+    assert abs(simulated_three - exact_three) < 0.01
+    live = model.series_probability(0.6, 3, (1, 0), (5, 9))["team1"]
+    spec = SeriesSpec("live", 3, MAPS[:3], [model.map_probability_for(0.6, 3)] * 3,
+                      [model.round_probability_for(model.map_probability_for(0.6, 3))] * 3,
+                      decided=[True], current=(5, 9))
+    simulated = simulate_series(spec, SIMULATIONS).to_dict()["series_win_probability"]["team1"]
+    print(f"BO3 1:0, 5:9 on map 2: series {simulated:.4f} (in-play model {live:.4f})")
+    assert abs(simulated - live) < 0.01
+
+    simulator = SeriesSimulator(RatingEngine(), model, simulations=SIMULATIONS)
+    rng = random.Random(3)
+    matches, predictions = [], {}
+    for i in range(MATCHES):
+        match_id = f"m{i}"
+        matches.append({"id": match_id, "status": "upcoming", "format": rng.choice(["BO1", "BO3", "BO3", "BO5"]),
+                        "team1": {"name": f"Team {2 * i}"}, "team2": {"name": f"Team {2 * i + 1}"}})
+        predictions[match_id] = Prediction(match_id, f"Team {2 * i}", f"Team {2 * i + 1}",
+                                           rng.uniform(0.25, 0.75), None, 1500.0, 1500.0, 10)
+    started = time.perf_counter()
+    inline = simulator.simulate_many(matches, predictions, processes=0)
+    inline_seconds = time.perf_counter() - started
+    simulator.simulate_many(matches[:PROCESSES], predictions, processes=PROCESSES)  # start the workers
+    started = time.perf_counter()
+    pooled = simulator.simulate_many(matches, predictions, processes=PROCESSES)
+    pooled_seconds = time.perf_counter() - started
+    simulator.close()
+    assert all(pooled[m].scores == inline[m].scores and (pooled[m].total_rounds == inline[m].total_rounds).all()
+               for m in inline)
+    print(f"{MATCHES} matches inline {inline_seconds:6.2f}s, {PROCESSES} processes {pooled_seconds:6.2f}s "
+          f"({inline_seconds / pooled_seconds:.1f}x), identical distributions")
+
+
+if __name__ == "__main__":
+    main()
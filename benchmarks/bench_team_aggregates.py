@@ -0,0 +1,94 @@
+"""
+Benchmark: team_stats for one analysis, archive query vs precomputed aggregates
+
+The archive path is the former AppCore.team_history (newest 50 rows of the
+team from SQLite, JSON decode, walk the dicts), done for both teams. The
+aggregate path is the form/head-to-head/map lookups build_match_analysis
+now makes. Also reports the vectorized rebuild from the history store and
+the cost of folding newly finished matches in incrementally.
+
+Run from the repository root (BENCH_MATCHES overrides the size):
+    python benchmarks/bench_team_aggregates.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.history_store import HistoryStore
+from app.services.match_archive import MatchArchive
+from app.services.rating_engine import result_from_match
+from app.services.team_aggregates import TeamAggregates
+from bench_history_store import TEAMS, make_matches
+
+MATCHES = int(os.getenv("BENCH_MATCHES", 200_000))
+NEW_MATCHES = 1000
+LOOKUPS = 500
+
+
+def archive_team_history(archive, team, opponent, limit=10):
+    recent, _ = archive.query(team=team, page_size=50)
+    wins, h2h = [], [0, 0]
+    for match in recent:
+        result = result_from_match(match)
+        if result is None or result.score == 0.5:
+            continue
+        won = (result.score == 1.0) == (result.team1.lower() == team.lower())
+        if len(wins) < limit:
+            wins.append(won)
+        if opponent.lower() in (result.team1.lower(), result.team2.lower()):
+            h2h[0 if won else 1] += 1
+    return wins, h2h
+
+
+def aggregate_team_stats(aggregates, team, opponent):
+    return aggregates.form(team), aggregates.head_to_head(team, opponent), aggregates.map_win_rates(team)
+
+
+def per_analysis(fn, source, pairs):
+    start = time.perf_counter()
+    for team1, team2 in pairs:
+        fn(source, team1, team2)
+        fn(source, team2, team1)
+    return (time.perf_counter() - start) / len(pairs)
+
+
+def main():
+    rng = random.Random(3)
+    pairs = [tuple(f"Team {t}" for t in rng.sample(range(TEAMS), 2)) for _ in range(LOOKUPS)]
+    matches = list(make_matches(MATCHES + NEW_MATCHES))
+    print(f"{MATCHES} archived matches, {TEAMS} teams")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        archive = MatchArchive(os.path.join(workdir, "archive.db"), max_rows=MATCHES * 2,
+                               max_age_days=None, compact_every=MATCHES * 2)
+        for start in range(0, MATCHES, 50_000):
+            archive.append(matches[start:min(MATCHES, start + 50_000)])
+        history = HistoryStore(os.path.join(workdir, "history"))
+        history.sync(archive)
+        history.compact()
+
+        aggregates = TeamAggregates()
+        start = time.perf_counter()
+        aggregates.rebuild(history)
+        print(f"{'rebuild from the history store':<36} {time.perf_counter() - start:10.2f} s")
+
+        archive.append(matches[MATCHES:])
+        start = time.perf_counter()
+        applied = aggregates.update(archive)
+        elapsed = time.perf_counter() - start
+        print(f"{'incremental update':<36} {elapsed / applied * 1e6:10.1f} us per finished match")
+
+        baseline = per_analysis(archive_team_history, archive, pairs[:50])
+        lookups = per_analysis(aggregate_team_stats, aggregates, pairs)
+        print(f"{'team_stats via archive query':<36} {baseline * 1e6:10.1f} us per analysis")
+        print(f"{'team_stats via aggregates':<36} {lookups * 1e6:10.1f} us per analysis   x{baseline / lookups:.0f}")
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: multi-worker deployment with shared snapshot state
+
+Starts the unified app under uvicorn with 1 and then WORKERS worker
+processes (in a temporary directory, without HLTV scraping) and checks
+that exactly one worker is the refresh leader, that all workers serve the
+same snapshot version and ETag, and measures /api/python/matches
+requests/sec with concurrent keep-alive clients. Scaling depends on the
+number of CPU cores available.
+
+Run from the repository root:
+    python benchmarks/bench_workers.py
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKERS = int(os.getenv("BENCH_WORKERS", max(2, min(os.cpu_count() or 1, 4))))
+CLIENTS = 32
+DURATION = 5.0
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers, port, workdir):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop("HLTV_SCRAPING", None)
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_ready(base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/api/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+def worker_stats(base_url, workers):
+    """Poll /api/admin/stats until every worker has answered"""
+    stats = {}
+    # A new connection per request, so that the kernel spreads them over the workers
+    for _ in range(200 * workers):
+        data = httpx.get(f"{base_url}/api/admin/stats").json()
+        stats[data["worker_pid"]] = data
+        if len(stats) == workers:
+            break
+    return stats
+
+
+async def load(base_url):
+    count = 0
+    deadline = time.perf_counter() + DURATION
+
+    async def client_loop(client):
+        nonlocal count
+        while time.perf_counter() < deadline:
+            response = await client.get("/api/python/matches", headers={"Accept-Encoding": "gzip"})
+            assert response.status_code == 200
+            count += 1
+
+    limits = httpx.Limits(max_connections=CLIENTS)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(CLIENTS)))
+    return count / DURATION
+
+
+def run(workers):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as workdir:
+        server = start_server(workers, port, workdir)
+        try:
+            wait_ready(base_url)
+            # Give followers a poll interval to install the leader's snapshot
+            time.sleep(2)
+            stats = worker_stats(base_url, workers)
+            leaders = [pid for pid, data in stats.items() if data["leader"]]
+            versions = {data["snapshot_version"] for data in stats.values()}
+            etags = {httpx.get(f"{base_url}/api/python/matches").headers["etag"] for _ in range(10 * workers)}
+            rps = asyncio.run(load(base_url))
+        finally:
+            server.terminate()
+            server.wait(10)
+
+    print(f"{workers} worker(s): {len(stats)} answered, leaders {len(leaders)}, "
+          f"snapshot versions {sorted(versions)}, distinct ETags {len(etags)}, {rps:8.0f} req/s")
+    assert len(leaders) == 1, "expected exactly one refresh leader"
+    assert len(versions) == 1 and len(etags) == 1, "workers disagree on the published snapshot"
+    return rps
+
+
+def main():
+    print(f"{os.cpu_count()} CPU core(s), {CLIENTS} concurrent clients, {DURATION:.0f}s per run")
+    single = run(1)
+    multi = run(WORKERS)
+    print(f"speedup with {WORKERS} workers: x{multi / single:.2f}")
+
+
+if __name__ == "__main__":
+    main()
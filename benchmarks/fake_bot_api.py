@@ -0,0 +1,183 @@
+"""
+Local stand-in for the Telegram Bot API (https://api.telegram.org/bot<token>/<method>)
+
+Implements what the bot and the broadcast engine call: getMe, deleteWebhook,
+getUpdates (answers from a queue of injected updates) and sendMessage. It
+enforces rate limits the way Telegram does from the client's point of view:
+more than ``global_rate`` messages in any one second, or two messages to
+one chat less than ``chat_interval`` apart, get a 429 with
+``parameters.retry_after``. Chats in ``blocked`` answer 403, chats in
+``missing`` answer 400. Every delivered message is counted per chat.
+
+Can be run standalone (``python benchmarks/fake_bot_api.py 8081``) or started
+in a background thread with :func:`start_fake_bot_api`.
+"""
+import json
+import sys
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+BOT_USER = {"id": 1000, "is_bot": True, "first_name": "CS2 Analytics", "username": "cs2_analytics_bot"}
+
+
+class FakeBotAPI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, global_rate=30, chat_interval=1.0, retry_after=1):
+        super().__init__(address, FakeBotAPIHandler)
+        self.latency = latency
+        self.global_rate = global_rate
+        self.chat_interval = chat_interval
+        self.retry_after = retry_after
+        self.blocked = set()
+        self.missing = set()
+        self.delivered = Counter()
+        self.messages = []
+        self.rejected_429 = 0
+        self.updates = deque()
+        self.update_id = 0
+        self.lock = threading.Lock()
+        self._window = deque()
+        self._last_chat_send = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def reset(self):
+        with self.lock:
+            self.delivered.clear()
+            self.messages.clear()
+            self.rejected_429 = 0
+            self._window.clear()
+            self._last_chat_send.clear()
+
+    def push_message(self, chat_id, text, user_id=None, username=None):
+        """Queue an incoming private message for getUpdates"""
+        with self.lock:
+            self.update_id += 1
+            now = int(time.time())
+            user_id = user_id if user_id is not None else chat_id
+            self.updates.append({
+                "update_id": self.update_id,
+                "message": {
+                    "message_id": self.update_id,
+                    "date": now,
+                    "chat": {"id": chat_id, "type": "private"},
+                    "from": {"id": user_id, "is_bot": False, "first_name": f"User {user_id}", "username": username},
+                    "text": text,
+                    "entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+                    if text.startswith("/") else [],
+                },
+            })
+
+    # ------------------------------------------------------------------
+    # Methods
+    # ------------------------------------------------------------------
+
+    def send_message(self, params):
+        chat_id = int(params["chat_id"])
+        if chat_id in self.blocked:
+            return 403, {"ok": False, "error_code": 403, "description": "Forbidden: bot was blocked by the user"}
+        if chat_id in self.missing:
+            return 400, {"ok": False, "error_code": 400, "description": "Bad Request: chat not found"}
+        with self.lock:
+            now = time.monotonic()
+            window = self._window
+            while window and window[0] <= now - 1.0:
+                window.popleft()
+            last = self._last_chat_send.get(chat_id)
+            if len(window) >= self.global_rate or (last is not None and now - last < self.chat_interval):
+                self.rejected_429 += 1
+                return 429, {
+                    "ok": False, "error_code": 429,
+                    "description": f"Too Many Requests: retry after {self.retry_after}",
+                    "parameters": {"retry_after": self.retry_after},
+                }
+            window.append(now)
+            self._last_chat_send[chat_id] = now
+            self.delivered[chat_id] += 1
+            self.messages.append((chat_id, params.get("text")))
+            message_id = len(self.messages)
+        return 200, {"ok": True, "result": {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "group"},
+            "text": params.get("text", ""),
+        }}
+
+    def get_updates(self, params):
+        offset = int(params.get("offset") or 0)
+        deadline = time.monotonic() + min(float(params.get("timeout") or 0), 1.0)
+        while True:
+            with self.lock:
+                while self.updates and self.updates[0]["update_id"] < offset:
+                    self.updates.popleft()
+                if self.updates or time.monotonic() >= deadline:
+                    return 200, {"ok": True, "result": list(self.updates)}
+            time.sleep(0.05)
+
+
+class FakeBotAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        params = _parse_params(self.headers.get("Content-Type", ""), body)
+        method = self.path.rstrip("/").rsplit("/", 1)[-1]
+        if server.latency:
+            time.sleep(server.latency)
+
+        if method == "getMe":
+            status, payload = 200, {"ok": True, "result": BOT_USER}
+        elif method in ("deleteWebhook", "close", "logOut"):
+            status, payload = 200, {"ok": True, "result": True}
+        elif method == "getUpdates":
+            status, payload = server.get_updates(params)
+        elif method == "sendMessage":
+            status, payload = server.send_message(params)
+        else:
+            status, payload = 404, {"ok": False, "error_code": 404, "description": "Not Found"}
+        self._send(status, payload)
+
+    do_GET = do_POST
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _parse_params(content_type, body):
+    if not body:
+        return {}
+    if content_type.startswith("application/json"):
+        return json.loads(body)
+    return {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+
+def start_fake_bot_api(latency=0.0, global_rate=30, chat_interval=1.0, retry_after=1, port=0):
+    """Start the fake API in a daemon thread; returns the server"""
+    server = FakeBotAPI(("127.0.0.1", port), latency=latency, global_rate=global_rate,
+                        chat_interval=chat_interval, retry_after=retry_after)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8081
+    server = FakeBotAPI(("127.0.0.1", port))
+    print(f"Serving a fake Bot API on {server.base_url}<token>/")
+    server.serve_forever()
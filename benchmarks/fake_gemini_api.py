@@ -0,0 +1,116 @@
+"""
+Local stand-in for the Gemini generateContent endpoint
+
+POST /v1beta/models/<model>:generateContent answers the GeminiAnalyzer
+prompt: it reads the JSON match lines after "MATCHES:" and returns a JSON
+array with one answer per match (the model favorite, at its confidence),
+plus usageMetadata computed at 4 characters per token. Every call sleeps
+``latency`` + ``per_match_latency`` * matches, and every ``fail_every``-th
+call answers 429.
+
+Can be run standalone (``python benchmarks/fake_gemini_api.py 8082``) or
+started in a background thread with :func:`start_fake_gemini_api`.
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeGeminiAPI(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, latency=0.0, per_match_latency=0.0, fail_every=0):
+        super().__init__(address, FakeGeminiHandler)
+        self.latency = latency
+        self.per_match_latency = per_match_latency
+        self.fail_every = fail_every
+        self.calls = 0
+        self.matches = 0
+        self.tokens = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset(self):
+        with self.lock:
+            self.calls = self.matches = self.tokens = 0
+
+
+def answer(prompt):
+    blocks = [json.loads(line) for line in prompt.split("MATCHES:", 1)[-1].splitlines() if line.strip()]
+    return [
+        {
+            "match_id": block["match_id"],
+            "winner": block["model_favorite"],
+            "confidence": block["model_confidence"],
+            "reasoning": f"{block['model_favorite']} is the stronger side on current form.",
+            "key_factors": ["rating", "form"],
+        }
+        for block in blocks
+    ]
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        if not self.path.split("?")[0].endswith(":generateContent"):
+            self._send(404, {"error": {"code": 404, "message": "Not found"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)))
+        prompt = "".join(part.get("text", "") for part in body["contents"][0]["parts"])
+        items = answer(prompt)
+        with server.lock:
+            server.calls += 1
+            n = server.calls
+        time.sleep(server.latency + server.per_match_latency * len(items))
+        if server.fail_every and n % server.fail_every == 0:
+            self._send(429, {"error": {"code": 429, "message": "Resource has been exhausted",
+                                       "status": "RESOURCE_EXHAUSTED"}}, {"Retry-After": "1"})
+            return
+
+        text = json.dumps(items)
+        prompt_tokens, output_tokens = len(prompt) // 4, len(text) // 4
+        with server.lock:
+            server.matches += len(items)
+            server.tokens += prompt_tokens + output_tokens
+        self._send(200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+            "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": output_tokens,
+                              "totalTokenCount": prompt_tokens + output_tokens},
+        })
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_gemini_api(latency=0.0, per_match_latency=0.0, fail_every=0, port=0):
+    """Start the stub in a daemon thread; returns the server"""
+    server = FakeGeminiAPI(("127.0.0.1", port), latency=latency, per_match_latency=per_match_latency,
+                           fail_every=fail_every)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8082
+    server = FakeGeminiAPI(("127.0.0.1", port))
+    print(f"Serving a fake Gemini API on {server.base_url}")
+    server.serve_forever()
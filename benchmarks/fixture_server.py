@@ -0,0 +1,208 @@
+"""
+Local stub of hltv.org serving the saved HTML pages in benchmarks/fixtures/hltv
+
+Routes:
+    /matches              -> matches.html
+    /matches/<id>/<slug>  -> match.html
+    /team/<id>/<slug>     -> team.html
+    /results              -> results.html
+    /results?startDate=YYYY-MM-DD&endDate=YYYY-MM-DD&offset=N
+                          -> synthetic results for that range (see results_page)
+
+Can be run standalone (``python benchmarks/fixture_server.py 8765``) or started
+in a background thread with :func:`start_fixture_server`.
+"""
+import hashlib
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "hltv")
+
+ROUTES = (
+    ("/matches/", "match.html"),
+    ("/matches", "matches.html"),
+    ("/team/", "team.html"),
+    ("/results", "results.html"),
+)
+
+
+RESULTS_PAGE_SIZE = 100
+MAPS = ("mirage", "inferno", "nuke", "ancient", "anubis", "dust2", "train")
+
+RESULTS_HEAD = """<!DOCTYPE html>
+<html lang="en"><head><meta charset="utf-8"><title>CS2 Results | HLTV.org</title>
+<link rel="stylesheet" href="/css/main.css"></head>
+<body class="resultsPage"><div class="contentCol"><div class="results">
+<div class="pagination-component"><span class="pagination-data">{first} - {last} of {total}</span>{next_link}</div>
+<div class="results-holder allres"><div class="results-all">
+"""
+RESULT_ROW = """<div class="result-con" data-zonedgrouping-entry-unix="{unix}"><a href="/matches/{id}/{slug}" class="a-reset">
+<div class="result"><table><tr>
+<td class="team-cell"><div class="line-align team1"><div class="team{won1}">{team1}</div><img alt="{team1}" src="/img/static/team/logo/{id}" class="team-logo"></div></td>
+<td class="result-score"><span class="{class1}">{score1}</span> - <span class="{class2}">{score2}</span></td>
+<td class="team-cell"><div class="line-align team2"><img alt="{team2}" src="/img/static/team/logo/{id}" class="team-logo"><div class="team{won2}">{team2}</div></div></td>
+<td class="event"><img alt="{event}" src="/img/static/event/logo/1" class="event-logo"><span class="event-name">{event}</span></td>
+<td class="star-cell"><div class="map-and-stars"><div class="map map-text">{map_text}</div></div></td>
+</tr></table></div></a></div>
+"""
+RESULTS_TAIL = """</div></div></div></div></body></html>
+"""
+
+
+def synthetic_results(start, end, per_day=40):
+    """Deterministic finished matches, newest first, for the days start..end"""
+    results = []
+    day = end
+    while day >= start:
+        for k in range(per_day):
+            seed = hashlib.blake2b(f"{day.isoformat()}:{k}".encode(), digest_size=8).digest()
+            team1, team2 = seed[0] % 64, 64 + seed[1] % 64
+            best_of = (1, 3, 3, 5)[seed[2] % 4]
+            if best_of == 1:
+                score1, score2 = (13, seed[3] % 12) if seed[4] % 2 else (seed[3] % 12, 13)
+            else:
+                wins = best_of // 2 + 1
+                score1, score2 = (wins, seed[3] % wins) if seed[4] % 2 else (seed[3] % wins, wins)
+            results.append({
+                "id": 2000000 + day.toordinal() % 100000 * 100 + k,
+                "unix": int(datetime(day.year, day.month, day.day, 23 - k % 24).timestamp() * 1000),
+                "team1": f"Team {team1}",
+                "team2": f"Team {team2}",
+                "score1": score1,
+                "score2": score2,
+                "event": f"Event {day.isocalendar()[1]}",
+                "map_text": MAPS[seed[5] % len(MAPS)] if best_of == 1 else f"bo{best_of}",
+            })
+        day -= timedelta(days=1)
+    return results
+
+
+def results_page(start, end, offset=0, per_day=40, overlap=0):
+    """HTML of one results page for a date range.
+
+    ``overlap`` repeats the last rows of the previous page at the top of each
+    following page, the way HLTV pages shift while new results come in.
+    """
+    results = synthetic_results(start, end, per_day)
+    first = max(0, offset - overlap) if offset else 0
+    rows = results[first:offset + RESULTS_PAGE_SIZE]
+    next_offset = offset + RESULTS_PAGE_SIZE
+    next_link = ""
+    if next_offset < len(results):
+        next_link = (f'<a href="/results?offset={next_offset}&startDate={start}&endDate={end}" '
+                     f'class="pagination-next">Next</a>')
+    parts = [RESULTS_HEAD.format(first=offset + 1, last=min(len(results), next_offset),
+                                 total=len(results), next_link=next_link)]
+    for row in rows:
+        won1, won2 = row["score1"] > row["score2"], row["score2"] > row["score1"]
+        parts.append(RESULT_ROW.format(
+            id=row["id"], unix=row["unix"], slug=f"{row['team1']}-vs-{row['team2']}".lower().replace(" ", "-"),
+            team1=escape(row["team1"]), team2=escape(row["team2"]), event=escape(row["event"]),
+            score1=row["score1"], score2=row["score2"], map_text=row["map_text"],
+            won1=" team-won" if won1 else "", won2=" team-won" if won2 else "",
+            class1="score-won" if won1 else "score-lost", class2="score-won" if won2 else "score-lost",
+        ))
+    parts.append(RESULTS_TAIL)
+    return "".join(parts).encode("utf-8")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, fail_every=0, results_per_day=40, results_overlap=0):
+        super().__init__(address, FixtureHandler)
+        self.latency = latency
+        self.results_per_day = results_per_day
+        self.results_overlap = results_overlap
+        # Every n-th request answers 429 to exercise client retries (0 = never)
+        self.fail_every = fail_every
+        self.pages = {}
+        self.requests = 0
+        self.counter_lock = threading.Lock()
+
+    def page(self, name):
+        if name not in self.pages:
+            self.pages[name] = load_fixture(name)
+        return self.pages[name]
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.counter_lock:
+            server.requests += 1
+            n = server.requests
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.fail_every and n % server.fail_every == 0:
+            self._send(429, b"Too Many Requests", {"Retry-After": "0"})
+            return
+
+        url = urlsplit(self.path)
+        path = url.path
+        query = parse_qs(url.query)
+        if path == "/results" and "startDate" in query:
+            try:
+                start = date.fromisoformat(query["startDate"][0])
+                end = date.fromisoformat(query.get("endDate", query["startDate"])[0])
+                offset = int(query.get("offset", ["0"])[0])
+            except ValueError:
+                self._send(400, b"Bad Request")
+                return
+            body = results_page(start, end, offset, server.results_per_day, server.results_overlap)
+            self._send(200, body, {"Content-Type": "text/html; charset=utf-8"})
+            return
+        for prefix, name in ROUTES:
+            if path.startswith(prefix):
+                try:
+                    body = server.page(name)
+                except FileNotFoundError:
+                    break
+                self._send(200, body, {"Content-Type": "text/html; charset=utf-8"})
+                return
+        self._send(404, b"Not Found")
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server(latency=0.0, fail_every=0, port=0, results_per_day=40, results_overlap=0):
+    """Start the stub server in a daemon thread; returns the server"""
+    server = FixtureServer(("127.0.0.1", port), latency=latency, fail_every=fail_every,
+                           results_per_day=results_per_day, results_overlap=results_overlap)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server = FixtureServer(("127.0.0.1", port))
+    print(f"Serving HLTV fixtures on {server.base_url}")
+    server.serve_forever()
@@ -1,45 +1,54 @@
 """
 FastAPI main application for CS2 esports analytics bot
+
+One ASGI app serves every API route: the former Flask backend under
+/api/python/* and the former FastAPI backend under /api/*-fastapi, backed
+by one shared core (app.core). Run it with several uvicorn workers:
+
+    WEB_CONCURRENCY=4 python main.py
+    uvicorn main:app --workers 4 --port 5001
 """
 import os
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from datetime import datetime
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 # from fastapi.staticfiles import StaticFiles
-from typing import List, Optional
 import uvicorn
 
-from app.database import init_db, get_db_session
-# Remove unused imports to fix errors
-from app.services.hltv_scraper import HLTVScraper
-from app.services.gemini_analyzer import GeminiAnalyzer
-from app.services.telegram_bot import TelegramBot
+from app.core.state import get_core
+from app.database import init_db, close_db
 from app.routers import matches, teams, analytics, admin
+from app.routers.common import error_response
+from app.services.snapshot import SnapshotUnavailable
+from app.services.telegram_bot import TelegramBot
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize application on startup"""
     print("Starting CS2 Analytics FastAPI application...")
-    
+
     # Initialize database
     await init_db()
-    
-    # Initialize services
-    app.state.hltv_scraper = HLTVScraper()
-    app.state.gemini_analyzer = GeminiAnalyzer()
-    
-    # Start Telegram bot
+
+    # Shared core: match snapshot, store, archive, ratings, caches.
+    # REFRESH_SCHEDULER=0 serves the data without background refreshes
+    app.state.core = get_core()
+    await app.state.core.start(scheduler=os.getenv("REFRESH_SCHEDULER", "1") != "0")
+
+    # Telegram bot; one worker runs it (see TelegramBot), the others stand by
     if os.getenv("TELEGRAM_BOT_TOKEN"):
         app.state.telegram_bot = TelegramBot()
         await app.state.telegram_bot.start()
-        print("Telegram bot started")
-    
+
     yield
-    
+
     # Cleanup on shutdown
     if hasattr(app.state, 'telegram_bot'):
         await app.state.telegram_bot.stop()
+    await app.state.core.stop()
+    await close_db()
 
 
 # Create FastAPI app with lifespan
@@ -65,6 +74,15 @@ app.include_router(teams.router, prefix="/api", tags=["teams"])
 app.include_router(analytics.router, prefix="/api", tags=["analytics"])
 app.include_router(admin.router, prefix="/api", tags=["admin"])
 
+
+@app.exception_handler(SnapshotUnavailable)
+async def snapshot_unavailable(request: Request, exc: SnapshotUnavailable):
+    """A worker that follows the leader has no match snapshot until the leader publishes one"""
+    response = error_response("Match data is not available yet", 503)
+    response.headers["Retry-After"] = "1"
+    return response
+
+
 # Static files will be served by the existing Node.js server
 # app.mount("/", StaticFiles(directory="client/dist", html=True), name="static")
 
@@ -75,12 +93,42 @@ async def health_check():
     return {"status": "healthy", "version": "2.0.0"}
 
 
-if __name__ == "__main__":
-    # For development
+@app.get("/health")
+async def legacy_health_check():
+    """Health check in the shape of both former backends"""
+    core = get_core()
+    return {
+        "status": "healthy",
+        "service": "Python HLTV Backend",
+        "backend": "FastAPI Python",
+        "analysis_cache": core.analysis_cache.stats(),
+        "response_bodies": core.response_bodies.stats(),
+        "live_stream": core.broadcaster.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/")
+async def root():
+    return {"message": "CS2 Analytics FastAPI Backend", "version": "2.0.0"}
+
+
+def run(port: int):
+    """Serve the app with uvicorn.
+
+    WEB_CONCURRENCY sets the number of worker processes; DEV_RELOAD=1 runs a
+    single auto-reloading worker for development instead.
+    """
+    reload = os.getenv("DEV_RELOAD") == "1"
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
-        port=5001,
-        reload=True,
+        port=port,
+        workers=None if reload else int(os.getenv("WEB_CONCURRENCY", "1")),
+        reload=reload,
         log_level="info"
-    )
\ No newline at end of file
+    )
+
+
+if __name__ == "__main__":
+    run(5001)
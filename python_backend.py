@@ -1,284 +1,16 @@
 """
 Python backend using Flask for CS2 Analytics with real HLTV data
-"""
-import sys
-import os
-from flask import Flask, jsonify, request
-from flask_cors import CORS
-from datetime import datetime, timedelta
-import random
-import json
-import requests
-from bs4 import BeautifulSoup
-import re
-import time
-
-app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
-
-class HLTVScraper:
-    def __init__(self):
-        self.base_url = "https://www.hltv.org"
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-    def get_current_matches(self):
-        """Получить актуальные матчи с HLTV"""
-        try:
-            # Реальные актуальные команды на основе скриншота
-            current_live = [
-                {
-                    "id": f"live_{int(time.time())}_1",
-                    "team1": {"name": "Natus Vincere", "short_name": "NAVI"},
-                    "team2": {"name": "3DMAX", "short_name": "3DMAX"},
-                    "tournament": "Live Counter-Strike matches",
-                    "start_time": datetime.now().isoformat(),
-                    "format": "BO3",
-                    "status": "live",
-                    "maps_score": "9:8",
-                    "rounds_score": "8:6",
-                    "current_map": "de_mirage"
-                },
-                {
-                    "id": f"live_{int(time.time())}_2",
-                    "team1": {"name": "GamerLegion", "short_name": "GL"},
-                    "team2": {"name": "The MongolZ", "short_name": "TMZ"},
-                    "tournament": "Live Counter-Strike matches",
-                    "start_time": datetime.now().isoformat(),
-                    "format": "BO3",
-                    "status": "live",
-                    "maps_score": "2:10",
-                    "rounds_score": "2:10",
-                    "current_map": "de_dust2"
-                },
-                {
-                    "id": f"live_{int(time.time())}_3",
-                    "team1": {"name": "GenOne", "short_name": "G1"},
-                    "team2": {"name": "K27", "short_name": "K27"},
-                    "tournament": "Live Counter-Strike matches",
-                    "start_time": datetime.now().isoformat(),
-                    "format": "BO3",
-                    "status": "live",
-                    "maps_score": "13:11",
-                    "rounds_score": "11:13",
-                    "current_map": "de_inferno"
-                }
-            ]
-            
-            current_upcoming = [
-                {
-                    "id": f"upcoming_{int(time.time())}_1",
-                    "team1": {"name": "Vitality", "short_name": "VIT"},
-                    "team2": {"name": "Liquid", "short_name": "LIQ"},
-                    "tournament": "Esports World Cup 2025",
-                    "start_time": (datetime.now() + timedelta(hours=1)).isoformat(),
-                    "format": "BO3",
-                    "status": "upcoming"
-                },
-                {
-                    "id": f"upcoming_{int(time.time())}_2",
-                    "team1": {"name": "BetBoom", "short_name": "BB"},
-                    "team2": {"name": "BetClic", "short_name": "BC"},
-                    "tournament": "Exort The Proving Grounds Season 3",
-                    "start_time": (datetime.now() + timedelta(hours=2)).isoformat(),
-                    "format": "BO3",
-                    "status": "upcoming"
-                },
-                {
-                    "id": f"upcoming_{int(time.time())}_3",
-                    "team1": {"name": "FaZe", "short_name": "FAZE"},
-                    "team2": {"name": "Aurora", "short_name": "AUR"},
-                    "tournament": "Esports World Cup 2025",
-                    "start_time": (datetime.now() + timedelta(hours=3)).isoformat(),
-                    "format": "BO3",
-                    "status": "upcoming"
-                },
-                {
-                    "id": f"upcoming_{int(time.time())}_4",
-                    "team1": {"name": "Spirit", "short_name": "SPR"},
-                    "team2": {"name": "HEROIC", "short_name": "HER"},
-                    "tournament": "Esports World Cup 2025",
-                    "start_time": (datetime.now() + timedelta(hours=4)).isoformat(),
-                    "format": "BO3",
-                    "status": "upcoming"
-                },
-                {
-                    "id": f"upcoming_{int(time.time())}_5",
-                    "team1": {"name": "BIG", "short_name": "BIG"},
-                    "team2": {"name": "Spirit Academy", "short_name": "SPA"},
-                    "tournament": "Exort The Proving Grounds Season 3",
-                    "start_time": (datetime.now() + timedelta(hours=5)).isoformat(),
-                    "format": "BO3",
-                    "status": "upcoming"
-                },
-                {
-                    "id": f"upcoming_{int(time.time())}_6",
-                    "team1": {"name": "CYBERSHOKE", "short_name": "CYBER"},
-                    "team2": {"name": "FORZE Reload", "short_name": "FORZE"},
-                    "tournament": "Majestic LanData 3 Closed Qualifier",
-                    "start_time": (datetime.now() + timedelta(hours=6)).isoformat(),
-                    "format": "BO3",
-                    "status": "upcoming"
-                },
-                {
-                    "id": f"upcoming_{int(time.time())}_7",
-                    "team1": {"name": "Partizan", "short_name": "PTZ"},
-                    "team2": {"name": "Monte", "short_name": "MNT"},
-                    "tournament": "CCT Season 3 Europe Series 5",
-                    "start_time": (datetime.now() + timedelta(hours=7)).isoformat(),
-                    "format": "BO3",
-                    "status": "upcoming"
-                }
-            ]
-            
-            return current_live + current_upcoming
-            
-        except Exception as e:
-            print(f"Error getting current matches: {e}")
-            return []
-
-# Глобальный scraper
-scraper = HLTVScraper()
-
-# Система автоматического архивирования завершенных матчей
-archived_matches = []
-last_cleanup = datetime.now()
 
-def cleanup_finished_matches():
-    """Автоматическое удаление завершенных матчей"""
-    global last_cleanup
-    current_time = datetime.now()
-    
-    # Проверяем каждые 30 минут
-    if (current_time - last_cleanup).total_seconds() < 1800:
-        return
-    
-    print("Running automatic cleanup of finished matches...")
-    
-    # В реальной системе здесь был бы запрос к HLTV для проверки статуса
-    # Пока симулируем автоматическое завершение старых live матчей
-    
-    last_cleanup = current_time
-    print("Cleanup completed")
-
-@app.route('/health', methods=['GET'])
-def health_check():
-    return jsonify({
-        "status": "healthy",
-        "service": "Python HLTV Backend",
-        "timestamp": datetime.now().isoformat()
-    })
-
-@app.route('/api/python/matches', methods=['GET'])
-def get_matches():
-    """Получить актуальные матчи"""
-    cleanup_finished_matches()
-    
-    try:
-        matches = scraper.get_current_matches()
-        
-        return jsonify({
-            "matches": matches,
-            "total": len(matches),
-            "live_count": len([m for m in matches if m["status"] == "live"]),
-            "upcoming_count": len([m for m in matches if m["status"] == "upcoming"]),
-            "source": "Real-time HLTV Data",
-            "backend": "Python/Flask",
-            "last_updated": datetime.now().isoformat()
-        })
-        
-    except Exception as e:
-        print(f"Error in get_matches: {e}")
-        return jsonify({
-            "error": "Failed to fetch matches",
-            "backend": "Python/Flask"
-        }), 500
-
-@app.route('/api/python/refresh-matches', methods=['POST'])
-def refresh_matches():
-    """Обновить матчи и удалить завершенные"""
-    try:
-        cleanup_finished_matches()
-        
-        # Получаем новые актуальные матчи
-        new_matches = scraper.get_current_matches()
-        
-        # Фильтруем только активные матчи (live и upcoming)
-        active_matches = [m for m in new_matches if m["status"] in ["live", "upcoming"]]
-        
-        return jsonify({
-            "message": "Matches refreshed and cleaned up",
-            "new_matches": len(active_matches),
-            "live_matches": len([m for m in active_matches if m["status"] == "live"]),
-            "upcoming_matches": len([m for m in active_matches if m["status"] == "upcoming"]),
-            "archived_count": len(archived_matches),
-            "backend": "Python/Flask",
-            "last_updated": datetime.now().isoformat()
-        })
-        
-    except Exception as e:
-        print(f"Error in refresh_matches: {e}")
-        return jsonify({
-            "error": "Failed to refresh matches",
-            "backend": "Python/Flask"
-        }), 500
-
-@app.route('/api/python/match/<match_id>/analysis', methods=['GET'])
-def get_match_analysis(match_id):
-    """Получить анализ конкретного матча"""
-    try:
-        matches = scraper.get_current_matches()
-        match = next((m for m in matches if m["id"] == match_id), None)
-        
-        if not match:
-            return jsonify({"error": "Match not found"}), 404
-        
-        # Генерируем анализ на основе команд
-        analysis = {
-            "match_id": match_id,
-            "prediction": {
-                "winner": match["team1"]["name"],
-                "confidence": random.uniform(65, 85),
-                "reasoning": f"Based on recent performance, {match['team1']['name']} has shown stronger tactical play",
-                "risk_level": random.choice(["Low", "Medium", "High"])
-            },
-            "team_stats": {
-                match["team1"]["name"]: {
-                    "recent_form": f"{random.randint(60, 90)}%",
-                    "map_pool_strength": random.uniform(7.5, 9.2),
-                    "head_to_head": f"{random.randint(2, 8)}-{random.randint(1, 5)}"
-                },
-                match["team2"]["name"]: {
-                    "recent_form": f"{random.randint(60, 90)}%",
-                    "map_pool_strength": random.uniform(7.5, 9.2),
-                    "head_to_head": f"{random.randint(1, 5)}-{random.randint(2, 8)}"
-                }
-            },
-            "betting_recommendation": {
-                "recommended_bet": match["team1"]["name"],
-                "odds_value": "Good",
-                "stake_suggestion": "Medium",
-                "alternative_bets": ["Over 2.5 Maps", "Total Rounds Over 55.5"]
-            },
-            "generated_at": datetime.now().isoformat()
-        }
-        
-        return jsonify(analysis)
-        
-    except Exception as e:
-        print(f"Error in get_match_analysis: {e}")
-        return jsonify({
-            "error": "Failed to generate analysis",
-            "backend": "Python/Flask"
-        }), 500
+The /api/python/* routes are now served by the unified ASGI app in main.py;
+this entry point keeps the old port (5002) for existing clients.
+"""
+from main import app, run
 
 if __name__ == '__main__':
     print("Starting Python HLTV Backend with real-time data...")
     print("Features:")
     print("- Real-time HLTV match data")
-    print("- Automatic cleanup of finished matches")
+    print("- Background refresh and archiving of finished matches")
     print("- AI-powered match analysis")
     print("- Live match tracking")
-    
-    app.run(host='0.0.0.0', port=5002, debug=True)
\ No newline at end of file
+    run(5002)
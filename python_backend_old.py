@@ -20,9 +20,33 @@ except ImportError as e:
     HLTV_AVAILABLE = False
     print(f"HLTV scraper not available: {e}, using fallback data")
 
+from app.services.match_archive import MatchArchive
+from app.services.rating_engine import RatingEngine
+from app.services.rating_updater import RatingUpdater
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Elo ratings from the match archive (the state saved by the main backend, or rebuilt)
+rating_engine = RatingEngine()
+rating_updater = RatingUpdater(
+    rating_engine,
+    MatchArchive(os.getenv("ARCHIVE_DB_PATH", "match_archive.db")),
+    os.getenv("RATINGS_STATE_PATH", "ratings_state.npz"),
+)
+if not rating_updater.load():
+    rating_updater.rebuild()
+
+
+def third_map_odds(p_team1):
+    """Fair odds of a third map in a BO3, from team1's series win probability"""
+    # Per-map probability q with q^2 * (3 - 2q) = p_team1
+    lo, hi = 0.0, 1.0
+    for _ in range(40):
+        q = (lo + hi) / 2
+        lo, hi = (q, hi) if q * q * (3 - 2 * q) < p_team1 else (lo, q)
+    return round(1 / max(2 * q * (1 - q), 0.01), 2)
+
 # Real CS2 teams based on HLTV data
 teams_data = [
     {"id": "1", "name": "Natus Vincere", "short_name": "NAVI"},
@@ -210,11 +234,12 @@ def analyze_match(match_id):
     team1 = next((t for t in teams_data if t["id"] == match["team1_id"]), None)
     team2 = next((t for t in teams_data if t["id"] == match["team2_id"]), None)
     
-    # Simple Python-based analysis
-    winner_prob = random.uniform(0.55, 0.85)
-    confidence = random.uniform(0.70, 0.90)
-    
-    winner = team1["name"] if random.random() > 0.5 else team2["name"]
+    # Deterministic Elo-based analysis
+    p_team1 = float(rating_engine.predict([team1["name"]], [team2["name"]])[0])
+    winner = team1["name"] if p_team1 >= 0.5 else team2["name"]
+    winner_prob = max(p_team1, 1 - p_team1)
+    confidence = winner_prob
+    winner_odds = match["odds_team1"] if winner == team1["name"] else match["odds_team2"]
     
     analysis = {
         "match_id": match_id,
@@ -226,14 +251,14 @@ def analyze_match(match_id):
             {
                 "type": "Winner",
                 "description": f"Победа {winner}",
-                "odds": round(random.uniform(1.8, 2.5), 2),
+                "odds": float(winner_odds),
                 "recommendation": "recommended" if confidence > 0.8 else "risky",
                 "stake": "medium" if confidence > 0.8 else "low"
             },
             {
                 "type": "Total Maps",
                 "description": "Тотал больше 2.5 карт",
-                "odds": round(random.uniform(1.7, 2.1), 2),
+                "odds": third_map_odds(p_team1),
                 "recommendation": "interesting",
                 "stake": "low"
             }
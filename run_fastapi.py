@@ -1,13 +1,7 @@
 """
 FastAPI application runner
 """
-import uvicorn
+from main import run
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=5000,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    run(5000)
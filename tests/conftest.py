@@ -0,0 +1,9 @@
+"""
+Shared test setup: the repository root and the local stub servers in benchmarks/ on sys.path
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
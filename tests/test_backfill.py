@@ -0,0 +1,142 @@
+"""
+Historical results backfill against the local HLTV fixture server
+"""
+import json
+import os
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.backfill import Backfill, date_windows, read_matches
+from app.services.match_archive import MatchArchive
+from fixture_server import start_fixture_server, synthetic_results
+
+END = date(2025, 9, 30)
+START = END - timedelta(weeks=3) + timedelta(days=1)
+PER_DAY = 40
+CLIENT_OPTIONS = {"rate": 1000, "burst": 50, "per_host_limit": 1, "retries": 5, "backoff_base": 0.01}
+
+
+@pytest.fixture
+def server():
+    # Pages overlap the way HLTV's shift while results come in
+    server = start_fixture_server(results_per_day=PER_DAY, results_overlap=5)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def backfill_for(server, out_dir, **kwargs):
+    options = dict(window_days=7, workers=3, client_options=CLIENT_OPTIONS)
+    options.update(kwargs)
+    return Backfill(str(out_dir), base_url=server.base_url, **options)
+
+
+def test_date_windows_cover_the_range_newest_first():
+    windows = date_windows(date(2025, 1, 1), date(2025, 1, 20), 7)
+    assert windows == [
+        (date(2025, 1, 14), date(2025, 1, 20)),
+        (date(2025, 1, 7), date(2025, 1, 13)),
+        (date(2025, 1, 1), date(2025, 1, 6)),
+    ]
+
+
+def test_every_result_is_merged_exactly_once(server, tmp_path):
+    backfill = backfill_for(server, tmp_path)
+    report = backfill.run(START, END)
+
+    expected = {str(row["id"]) for row in synthetic_results(START, END, PER_DAY)}
+    ids = [match["id"] for match in read_matches(backfill.output_path)]
+    assert report.windows == 3 and report.failed == 0
+    assert report.unique_matches == len(ids) == len(set(ids)) == len(expected)
+    assert set(ids) == expected
+    # Overlapping pages repeat rows, but the crawl stops at the last page
+    assert report.pages == server.requests
+
+
+def test_merged_output_is_oldest_first(server, tmp_path):
+    backfill = backfill_for(server, tmp_path)
+    backfill.run(START, END)
+
+    start_times = [match["start_time"] for match in read_matches(backfill.output_path)]
+    assert start_times == sorted(start_times)
+
+
+def test_429_responses_are_retried(server, tmp_path):
+    server.fail_every = 4
+    report = backfill_for(server, tmp_path).run(START, END)
+
+    assert report.failed == 0
+    assert report.unique_matches == ((END - START).days + 1) * PER_DAY
+    assert server.requests > report.pages
+
+
+def test_failed_window_is_reported_and_not_checkpointed(server, tmp_path):
+    server.fail_every = 1
+    options = dict(CLIENT_OPTIONS, retries=1)
+    backfill = backfill_for(server, tmp_path, client_options=options)
+    report = backfill.run(END - timedelta(days=6), END)
+
+    assert report.failed == 1 and len(report.errors) == 1
+    assert report.unique_matches == 0
+    assert backfill.checkpoint["windows"] == {}
+
+
+def test_restart_crawls_only_the_lost_window(server, tmp_path):
+    backfill_for(server, tmp_path).run(START, END)
+    # A crash that lost the newest window
+    backfill = backfill_for(server, tmp_path)
+    lost = sorted(backfill.checkpoint["windows"])[-1]
+    os.remove(os.path.join(backfill.windows_dir, f"{lost}.jsonl.gz"))
+    window_pages = backfill.checkpoint["windows"][lost]["pages"]
+
+    server.requests = 0
+    report = backfill.run(START, END)
+    assert report.skipped == report.windows - 1
+    assert server.requests == report.pages == window_pages
+    assert report.unique_matches == ((END - START).days + 1) * PER_DAY
+    with open(backfill.checkpoint_path) as f:
+        assert lost in json.load(f)["windows"]
+
+
+def test_results_are_appended_to_the_archive_once(server, tmp_path):
+    archive_path = str(tmp_path / "archive.db")
+    backfill = backfill_for(server, tmp_path / "out")
+    report = backfill.run(START, END, archive_path=archive_path)
+    assert report.archived == report.unique_matches
+
+    # A second run finds every window done and every id already archived
+    report = backfill_for(server, tmp_path / "out").run(START, END, archive_path=archive_path)
+    assert report.skipped == report.windows
+    assert report.archived == 0
+    archive = MatchArchive(archive_path, max_age_days=None)
+    try:
+        assert sum(1 for _ in archive.iter_since(0)) == report.unique_matches
+    finally:
+        archive.close()
+
+
+def test_window_that_fails_to_parse_does_not_abort_the_run(server, tmp_path, monkeypatch):
+    from app.services import backfill as backfill_module
+
+    parse = backfill_module.parse_results_page
+    broken = f"startDate={END - timedelta(days=6)}"
+
+    def parse_or_fail(html):
+        # Every page of the newest window is mangled
+        if broken in html:
+            raise ValueError("unexpected results page layout")
+        return parse(html)
+
+    monkeypatch.setattr(backfill_module, "parse_results_page", parse_or_fail)
+    backfill = backfill_for(server, tmp_path)
+    report = backfill.run(START, END)
+    assert report.failed == 1 and "ValueError" in report.errors[0]
+    assert report.unique_matches == ((END - START).days + 1 - 7) * PER_DAY
+    assert len(backfill.checkpoint["windows"]) == 2
+
+    # The next run crawls only the failed window
+    monkeypatch.setattr(backfill_module, "parse_results_page", parse)
+    report = backfill_for(server, tmp_path).run(START, END)
+    assert report.failed == 0 and report.skipped == 2
+    assert report.unique_matches == ((END - START).days + 1) * PER_DAY
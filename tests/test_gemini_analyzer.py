@@ -0,0 +1,166 @@
+"""
+GeminiAnalyzer against the local Gemini stub endpoint
+"""
+import asyncio
+
+import pytest
+
+from app.services.gemini_analyzer import GeminiAnalyzer, TokenBudget
+from fake_gemini_api import start_fake_gemini_api
+
+MATCHES = 20
+USERS = 3
+
+
+@pytest.fixture
+def server():
+    server = start_fake_gemini_api()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_matches(n):
+    matches, analyses = {}, {}
+    for i in range(n):
+        team1, team2 = f"Team {2 * i}", f"Team {2 * i + 1}"
+        match_id = f"m{i}"
+        matches[match_id] = {
+            "id": match_id, "team1": {"name": team1}, "team2": {"name": team2},
+            "tournament": "Test Cup", "format": "bo3", "status": "upcoming",
+            "maps_score": None, "odds_team1": 1.6, "odds_team2": 2.3,
+        }
+        analyses[match_id] = {
+            "prediction": {"winner": team1, "confidence": 60.0 + i, "reasoning": f"{team1} is rated higher"},
+            "team_stats": {team1: {"recent_form": "70%"}, team2: {"recent_form": "40%"}},
+        }
+    return matches, analyses
+
+
+def analyzer_for(server, tmp_path, **kwargs):
+    options = dict(api_key="test", model="stub", base_url=server.base_url,
+                   cache_path=str(tmp_path / "gemini_cache.db"), batch_size=8,
+                   requests_per_minute=1000, tokens_per_minute=10_000_000)
+    options.update(kwargs)
+    return GeminiAnalyzer(**options)
+
+
+def everyone_asks(analyzer, matches, analyses, users=USERS):
+    async def run():
+        try:
+            return await asyncio.gather(*[
+                analyzer.analyze(match_id, matches[match_id], analyses[match_id])
+                for _ in range(users) for match_id in matches
+            ])
+        finally:
+            await analyzer.close()
+
+    return asyncio.run(run())
+
+
+def test_requests_are_batched_and_coalesced(server, tmp_path):
+    matches, analyses = make_matches(MATCHES)
+    analyzer = analyzer_for(server, tmp_path)
+    answers = everyone_asks(analyzer, matches, analyses)
+
+    assert server.matches == MATCHES
+    assert server.calls == analyzer.calls == -(-MATCHES // analyzer.batch_size)
+    assert analyzer.coalesced == MATCHES * (USERS - 1)
+    for i, answer in enumerate(answers):
+        match_id = f"m{i % MATCHES}"
+        assert answer["winner"] == analyses[match_id]["prediction"]["winner"]
+        assert answer["confidence"] == analyses[match_id]["prediction"]["confidence"]
+        assert answer["risk_level"] in ("Low", "Medium", "High")
+    assert analyzer.prompt_tokens > 0 and analyzer.output_tokens > 0
+
+
+def test_restart_answers_from_the_disk_cache(server, tmp_path):
+    matches, analyses = make_matches(MATCHES)
+    first = everyone_asks(analyzer_for(server, tmp_path), matches, analyses)
+    server.reset()
+
+    analyzer = analyzer_for(server, tmp_path)
+    assert everyone_asks(analyzer, matches, analyses) == first
+    assert server.calls == 0
+    assert analyzer.hits == MATCHES * USERS
+
+
+def test_only_changed_matches_are_sent_again(server, tmp_path):
+    matches, analyses = make_matches(MATCHES)
+    everyone_asks(analyzer_for(server, tmp_path), matches, analyses)
+    server.reset()
+    for match_id in ("m0", "m5", "m9"):
+        matches[match_id] = dict(matches[match_id], status="live", maps_score="1:0")
+
+    answers = everyone_asks(analyzer_for(server, tmp_path), matches, analyses)
+    assert server.matches == 3
+    assert all(answer is not None for answer in answers)
+
+
+def test_over_budget_batches_fall_back_to_none(server, tmp_path):
+    matches, analyses = make_matches(MATCHES)
+    analyzer = analyzer_for(server, tmp_path, requests_per_minute=2)
+    answers = everyone_asks(analyzer, matches, analyses, users=1)
+
+    assert server.calls == 2
+    assert sum(answer is not None for answer in answers) == server.matches == 2 * analyzer.batch_size
+    assert analyzer.fallbacks == MATCHES - server.matches
+    assert analyzer.budget.refused == 1
+
+
+def test_429_cools_the_budget_down(server, tmp_path):
+    server.fail_every = 1
+    matches, analyses = make_matches(MATCHES)
+    analyzer = analyzer_for(server, tmp_path)
+    assert everyone_asks(analyzer, matches, analyses, users=1) == [None] * MATCHES
+    # Failed answers are not cached
+    assert len(analyzer.cache) == 0
+
+    # Until Retry-After has passed, new batches are refused without a call
+    calls = server.calls
+    matches, analyses = make_matches(MATCHES + 5)
+    del matches["m0"]
+    assert everyone_asks(analyzer, matches, analyses, users=1) == [None] * (MATCHES + 4)
+    assert server.calls == calls
+    assert analyzer.budget.refused > 0
+
+
+def test_disabled_without_an_api_key(server, tmp_path, monkeypatch):
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    matches, analyses = make_matches(3)
+    analyzer = analyzer_for(server, tmp_path, api_key=None)
+
+    assert not analyzer.enabled
+    assert everyone_asks(analyzer, matches, analyses) == [None] * 3 * USERS
+    assert server.calls == 0
+
+
+def test_token_budget_settles_to_the_reported_usage():
+    budget = TokenBudget(requests_per_minute=10, tokens_per_minute=1000)
+    reservation = budget.reserve(800)
+    assert budget.reserve(300) is None
+    budget.settle(reservation, 500)
+    assert budget.reserve(300) is not None
+    assert budget.stats()["tokens_last_minute"] == 800
+
+
+def test_two_states_of_one_match_get_their_own_answers(server, tmp_path):
+    matches, analyses = make_matches(1)
+    match = matches["m0"]
+    live = dict(match, status="live", maps_score="0:1")
+    underdog = {"prediction": dict(analyses["m0"]["prediction"], winner="Team 1"),
+                "team_stats": analyses["m0"]["team_stats"]}
+    analyzer = analyzer_for(server, tmp_path)
+
+    async def run():
+        try:
+            return await asyncio.gather(analyzer.analyze("m0", match, analyses["m0"]),
+                                        analyzer.analyze("m0", live, underdog))
+        finally:
+            await analyzer.close()
+
+    before, after = asyncio.run(run())
+    assert (before["winner"], after["winner"]) == ("Team 0", "Team 1")
+    assert server.calls == 2
+    assert len(analyzer.cache) == 2
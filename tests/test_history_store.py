@@ -0,0 +1,37 @@
+"""
+HistoryStore segments on disk
+"""
+from datetime import datetime, timedelta
+
+from app.services.history_store import HistoryStore
+
+START = datetime(2025, 5, 1)
+
+
+def results(first, count):
+    return [
+        {
+            "id": f"m{n}",
+            "team1": {"name": "Vitality"},
+            "team2": {"name": "Liquid"},
+            "winner": "Vitality" if n % 3 else "Liquid",
+            "status": "finished",
+            "start_time": (START + timedelta(hours=n)).isoformat(),
+            "maps": [{"name": "de_mirage", "team1_score": 13 if n % 3 else 9, "team2_score": 9 if n % 3 else 13}],
+        }
+        for n in range(first, first + count)
+    ]
+
+
+def test_segment_left_by_a_crash_before_the_metadata_is_replaced(tmp_path):
+    path = str(tmp_path / "history")
+    store = HistoryStore(path)
+    store.append(results(0, 6), watermark=6)
+    # Crash after writing the next segment, before saving the metadata
+    store._write_segment(store._rows(results(6, 3)))
+
+    reopened = HistoryStore(path)
+    assert reopened.append(results(6, 3), watermark=9) == 3
+    assert len(reopened) == 9
+    assert reopened.head_to_head("Vitality", "Liquid") == (6, 0, 3)
+    assert reopened.map_stats("Vitality")["mirage"][0] == 9
@@ -0,0 +1,130 @@
+"""
+HLTVClient and HLTVScraper against the local HLTV fixture server
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.services.hltv_client import FetchError, HLTVClient, TokenBucket
+from app.services.hltv_scraper import HLTVScraper
+from fixture_server import load_fixture, start_fixture_server
+
+
+@pytest.fixture
+def server():
+    server = start_fixture_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def client_for(server, **kwargs):
+    options = dict(rate=1000, burst=100, backoff_base=0.01)
+    options.update(kwargs)
+    return HLTVClient(server.base_url, **options)
+
+
+def test_fetch_returns_the_saved_page(server):
+    async def run():
+        async with client_for(server) as client:
+            return await client.fetch_matches_page()
+
+    assert asyncio.run(run()) == load_fixture("matches.html").decode("utf-8")
+
+
+def test_fetch_pages_in_parallel_on_one_pooled_client(server):
+    match_paths = [f"/matches/{2382000 + i}/a-vs-b" for i in range(10)]
+    team_paths = [f"/team/{4000 + i}/team" for i in range(10)]
+
+    async def run():
+        async with client_for(server) as client:
+            pages = await client.fetch_pages(match_paths, team_paths)
+            return pages, client.client
+
+    pages, pooled = asyncio.run(run())
+    assert list(pages) == ["/matches", *match_paths, *team_paths]
+    assert all(isinstance(page, str) for page in pages.values())
+    assert pages[match_paths[0]] == load_fixture("match.html").decode("utf-8")
+    assert pages[team_paths[0]] == load_fixture("team.html").decode("utf-8")
+    assert server.requests == 21
+    assert pooled is not None
+
+
+def test_429_responses_are_retried(server):
+    server.fail_every = 3
+
+    async def run():
+        async with client_for(server, retries=3) as client:
+            return await client.fetch_many(f"/team/{i}/t" for i in range(12))
+
+    pages = asyncio.run(run())
+    assert all(isinstance(page, str) for page in pages.values())
+    # Every third request was answered with a 429 and sent again
+    assert server.requests > 12
+
+
+def test_exhausted_retries_raise_fetch_error(server):
+    server.fail_every = 1
+
+    async def run():
+        async with client_for(server, retries=2) as client:
+            return await client.fetch_many(["/matches"])
+
+    result = asyncio.run(run())["/matches"]
+    assert isinstance(result, FetchError)
+    assert result.reason == "HTTP 429"
+    assert server.requests == 3
+
+
+def test_missing_page_is_not_retried(server):
+    async def run():
+        async with client_for(server, retries=3) as client:
+            await client.fetch("/nowhere")
+
+    with pytest.raises(FetchError, match="HTTP 404"):
+        asyncio.run(run())
+    assert server.requests == 1
+
+
+def test_concurrency_is_limited_per_host(server):
+    server.latency = 0.05
+
+    async def run():
+        async with client_for(server, per_host_limit=2) as client:
+            started = time.perf_counter()
+            await client.fetch_many(f"/team/{i}/t" for i in range(6))
+            return time.perf_counter() - started
+
+    # Six requests with two in flight at a time: at least three rounds of latency
+    assert asyncio.run(run()) >= 0.15
+
+
+def test_token_bucket_limits_the_rate():
+    async def run():
+        bucket = TokenBucket(rate=50, capacity=1)
+        started = time.perf_counter()
+        for _ in range(6):
+            await bucket.acquire()
+        return time.perf_counter() - started
+
+    # One token up front, then one every 20 ms
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_scraper_loads_matches_from_the_stub(server, monkeypatch):
+    monkeypatch.setenv("HLTV_SCRAPING", "1")
+    scraper = HLTVScraper()
+    scraper.client = client_for(server)
+
+    async def run():
+        first = await scraper.load_matches()
+        second = await scraper.load_matches()
+        await scraper.client.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first and {m["status"] for m in first} <= {"live", "upcoming"}
+    assert all(m["url"].startswith("/matches/") for m in first)
+    # Start times stay the same from one load to the next
+    assert first == second
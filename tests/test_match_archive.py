@@ -0,0 +1,36 @@
+"""
+MatchArchive appends and its recent-match LRU
+"""
+import pytest
+
+from app.services.match_archive import MatchArchive
+
+
+def match(match_id, winner="Vitality"):
+    return {"id": match_id, "team1": {"name": "Vitality"}, "team2": {"name": "Liquid"},
+            "winner": winner, "status": "finished", "start_time": "2025-05-01T18:00:00"}
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = MatchArchive(str(tmp_path / "archive.db"), recent_size=4)
+    yield archive
+    archive.close()
+
+
+def test_already_archived_ids_are_ignored(archive):
+    assert archive.append([match("a"), match("b")]) == 2
+    assert archive.append([match("b"), match("c"), match("c")]) == 1
+    assert archive.count() == archive.refresh_count() == 3
+
+
+def test_ignored_rows_do_not_replace_the_archived_match(archive):
+    archive.append([match("a", winner="Vitality")])
+    archive.append([match("a", winner="Liquid")])
+    assert archive.get("a")["winner"] == "Vitality"
+
+
+def test_ignored_rows_do_not_evict_recent_matches(archive):
+    archive.append([match(f"m{i}") for i in range(4)])
+    archive.append([match("m0") for _ in range(10)])
+    assert list(archive._recent) == ["m0", "m1", "m2", "m3"]
@@ -0,0 +1,151 @@
+"""
+Incremental rating updates must give the same ratings as a full rebuild
+"""
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.match_archive import MatchArchive
+from app.services.rating_engine import RatingEngine
+from app.services.rating_updater import RatingUpdater
+
+START = datetime(2025, 3, 1)
+MAPS = ["mirage", "inferno", "nuke", "ancient"]
+
+
+def results(rng, first, count, start, step=timedelta(minutes=37)):
+    matches = []
+    for n in range(first, first + count):
+        a, b = rng.choice(12, 2, replace=False)
+        won = rng.random() < 0.5
+        matches.append({
+            "id": f"m{n}",
+            "team1": {"name": f"team{a}"},
+            "team2": {"name": f"team{b}"},
+            "winner": f"team{a}" if won else f"team{b}",
+            "status": "finished",
+            "start_time": (start + step * (n - first)).isoformat(),
+            "maps": [{"name": MAPS[n % len(MAPS)], "team1_score": 13 if won else 7,
+                      "team2_score": 7 if won else 13}],
+        })
+    return matches
+
+
+def assert_same_ratings(engine, other):
+    assert set(engine.team_index) == set(other.team_index)
+    assert set(engine.map_index) == set(other.map_index)
+    for name, i in engine.team_index.items():
+        j = other.team_index[name]
+        assert engine.ratings[i] == pytest.approx(other.ratings[j])
+        for map_name, m in engine.map_index.items():
+            assert engine.map_ratings[i, m] == pytest.approx(other.map_ratings[j, other.map_index[map_name]])
+
+
+def rebuilt(archive, tmp_path):
+    full = RatingUpdater(RatingEngine(), archive, str(tmp_path / "full.npz"))
+    full.rebuild()
+    return full.engine
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = MatchArchive(str(tmp_path / "archive.db"), max_age_days=None)
+    yield archive
+    archive.close()
+
+
+def test_incremental_updates_with_a_restart_match_a_rebuild(archive, tmp_path):
+    rng = np.random.default_rng(1)
+    state_path = str(tmp_path / "ratings.npz")
+    updater = RatingUpdater(RatingEngine(), archive, state_path)
+    for batch in range(8):
+        archive.append(results(rng, batch * 50, 50, START + timedelta(hours=31 * batch)))
+        if batch == 4:
+            # Resume from the saved state and watermark
+            updater = RatingUpdater(RatingEngine(), archive, state_path)
+            assert updater.load()
+        assert updater.update() == 50
+
+    assert updater.rebuilds == 0
+    assert updater.watermark == 400
+    assert_same_ratings(updater.engine, rebuilt(archive, tmp_path))
+
+
+def test_restart_without_new_results_applies_nothing(archive, tmp_path):
+    rng = np.random.default_rng(2)
+    state_path = str(tmp_path / "ratings.npz")
+    archive.append(results(rng, 0, 30, START))
+    RatingUpdater(RatingEngine(), archive, state_path).update()
+
+    resumed = RatingUpdater(RatingEngine(), archive, state_path)
+    assert resumed.load()
+    assert resumed.update() == 0
+    assert_same_ratings(resumed.engine, rebuilt(archive, tmp_path))
+
+
+def test_results_finishing_out_of_order_across_a_period_boundary_do_not_rebuild(archive, tmp_path):
+    rng = np.random.default_rng(3)
+    updater = RatingUpdater(RatingEngine(), archive, str(tmp_path / "ratings.npz"))
+    day = START + timedelta(days=2)
+    # Late evening matches of one day, then the next day's, then one that started
+    # before midnight but finished (and was archived) last
+    archive.append(results(rng, 0, 10, day - timedelta(hours=6)))
+    updater.update()
+    archive.append(results(rng, 10, 10, day + timedelta(hours=1)))
+    updater.update()
+    archive.append(results(rng, 20, 1, day - timedelta(minutes=20)))
+    assert updater.update() == 1
+
+    assert updater.rebuilds == 0
+    assert_same_ratings(updater.engine, rebuilt(archive, tmp_path))
+
+
+def test_result_older_than_the_open_periods_rebuilds(archive, tmp_path):
+    rng = np.random.default_rng(4)
+    updater = RatingUpdater(RatingEngine(), archive, str(tmp_path / "ratings.npz"))
+    archive.append(results(rng, 0, 40, START + timedelta(days=10)))
+    updater.update()
+    # A backfilled result from a week earlier
+    archive.append(results(rng, 40, 5, START + timedelta(days=3)))
+    updater.update()
+
+    assert updater.rebuilds == 1
+    assert_same_ratings(updater.engine, rebuilt(archive, tmp_path))
+
+
+def test_reads_during_updates_see_whole_ratings(archive, tmp_path):
+    rng = np.random.default_rng(5)
+    archive.append(results(rng, 0, 300, START))
+    engine = RatingEngine()
+    updater = RatingUpdater(engine, archive, str(tmp_path / "ratings.npz"))
+    updater.rebuild()
+    teams = [f"team{i}" for i in range(12)]
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                with engine.reading():
+                    state = engine.state()
+                    assert engine.predict(teams, teams[::-1], maps=MAPS * 3).shape == (12,)
+                    assert [engine.rating(team) for team in teams] == [
+                        state["ratings"][state["teams"].index(team)] for team in teams
+                    ]
+            except Exception as e:
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for _ in range(20):
+            updater.rebuild()
+    finally:
+        done.set()
+        for reader in readers:
+            reader.join()
+    assert errors == []
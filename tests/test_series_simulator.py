@@ -0,0 +1,43 @@
+"""
+SeriesSimulator distribution cache
+"""
+from app.services.live_win_probability import InPlayModel
+from app.services.predictor import MatchPredictor
+from app.services.rating_engine import RatingEngine
+from app.services.series_simulator import SeriesSimulator
+
+MATCH = {
+    "id": "m1", "team1": {"name": "Vitality"}, "team2": {"name": "Liquid"},
+    "format": "BO3", "status": "upcoming",
+}
+
+
+def simulator_and_prediction():
+    engine = RatingEngine()
+    simulator = SeriesSimulator(engine, InPlayModel(), simulations=2000, cache_size=2)
+    return simulator, MatchPredictor(engine).predict_matches([MATCH])["m1"]
+
+
+def test_same_snapshot_and_ratings_reuse_the_distribution():
+    simulator, prediction = simulator_and_prediction()
+    first = simulator.simulate(MATCH, prediction, version=1)
+    assert simulator.simulate(MATCH, prediction, version=1) is first
+    assert simulator.simulate(MATCH, prediction) is not first
+
+
+def test_new_snapshot_or_ratings_simulate_again():
+    simulator, prediction = simulator_and_prediction()
+    first = simulator.simulate(MATCH, prediction, version=1)
+    second = simulator.simulate(MATCH, prediction, version=2)
+    assert second is not first
+    assert second.to_dict() == first.to_dict()
+    simulator.engine.version += 1
+    assert simulator.simulate(MATCH, prediction, version=2) is not second
+
+
+def test_cache_keeps_the_newest_entries():
+    simulator, prediction = simulator_and_prediction()
+    first = simulator.simulate(MATCH, prediction, version=1)
+    simulator.simulate(MATCH, prediction, version=2)
+    simulator.simulate(MATCH, prediction, version=3)
+    assert simulator.simulate(MATCH, prediction, version=1) is not first
@@ -0,0 +1,43 @@
+"""
+Leader and follower workers sharing match snapshots
+"""
+import pytest
+
+from app.core.state import AppCore
+from app.services.snapshot import SnapshotUnavailable
+
+
+@pytest.fixture
+def workers(tmp_path):
+    def worker():
+        return AppCore(archive_path=str(tmp_path / "archive.db"), ratings_path=str(tmp_path / "ratings.npz"),
+                       shared_path=str(tmp_path / "shared.db"), history_path=str(tmp_path / "history"))
+
+    leader, follower = worker(), worker()
+    assert leader.shared.try_acquire_leadership()
+    leader._scheduler_enabled = False
+    yield leader, follower
+    leader.refresh_scheduler.close()
+    follower.refresh_scheduler.close()
+
+
+def test_follower_does_not_build_its_own_snapshot(workers):
+    leader, follower = workers
+    follower._follow()
+    with pytest.raises(SnapshotUnavailable):
+        follower.snapshots.current()
+    assert follower.snapshots.peek() is None
+
+    leader._lead()
+    follower._follow()
+    assert follower.snapshots.current().version == leader.snapshots.current().version
+    assert follower.snapshots.current().matches == leader.snapshots.current().matches
+
+
+def test_follower_refresh_that_times_out_is_an_error(workers, monkeypatch):
+    leader, follower = workers
+    leader._lead()
+    follower._follow()
+    monkeypatch.setattr(follower.shared, "wait_refreshed", lambda requested_at, timeout=60.0: False)
+    with pytest.raises(TimeoutError):
+        follower.refresh_now()
@@ -0,0 +1,159 @@
+"""
+BroadcastEngine against the local fake Telegram Bot API
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from telegram import Bot
+from telegram.request import HTTPXRequest
+
+from app.database import Base, BotUser, Broadcast, create_engine
+from app.services.telegram_broadcast import BroadcastEngine, DeliveryCheckpoint, create_broadcast
+from fake_bot_api import start_fake_bot_api
+
+TOKEN = "123456:TEST"
+USERS = list(range(10_000, 10_200))
+BLOCKED = set(USERS[::25])
+MISSING = {USERS[7], USERS[101]}
+
+
+@pytest.fixture
+def server():
+    server = start_fake_bot_api(global_rate=1000, chat_interval=1.0, retry_after=1)
+    server.blocked = set(BLOCKED)
+    server.missing = set(MISSING)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def broadcast_run(tmp_path, server, scenario):
+    """Run ``scenario(bot, session_factory)`` against a fresh database of USERS"""
+    async def run():
+        engine = create_engine(f"sqlite:///{tmp_path}/broadcast.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            await session.execute(insert(BotUser), [{"id": chat_id, "first_name": f"User {chat_id}"} for chat_id in USERS])
+            await session.commit()
+        bot = Bot(TOKEN, base_url=server.base_url, request=HTTPXRequest(connection_pool_size=24))
+        try:
+            async with bot:
+                return await scenario(bot, session_factory)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(run())
+
+
+async def new_broadcast(session_factory, text):
+    async with session_factory() as session:
+        row = await create_broadcast(session, text)
+        await session.commit()
+    return row.id
+
+
+async def load(session_factory, broadcast_id):
+    async with session_factory() as session:
+        row = await session.get(Broadcast, broadcast_id)
+        flagged = set(await session.scalars(select(BotUser.id).where(BotUser.blocked.is_(True))))
+    return row, flagged
+
+
+def engine_for(bot, session_factory, **kwargs):
+    options = dict(concurrency=16, rate=500, burst=1.0, checkpoint_interval=0.05, progress_interval=3600)
+    options.update(kwargs)
+    return BroadcastEngine(bot, session_factory, **options)
+
+
+def assert_delivered_once(server):
+    reachable = [chat_id for chat_id in USERS if chat_id not in BLOCKED | MISSING]
+    assert [server.delivered[chat_id] for chat_id in reachable] == [1] * len(reachable)
+    assert not any(server.delivered[chat_id] for chat_id in BLOCKED | MISSING)
+
+
+def test_delivery_checkpoint_cursor_follows_completed_prefix():
+    checkpoint = DeliveryCheckpoint()
+    for chat_id in (1, 2, 3, 4):
+        checkpoint.dispatch(chat_id)
+    checkpoint.complete(2)
+    checkpoint.complete(4)
+    assert checkpoint.state() == {"cursor": None, "done": [2, 4]}
+    checkpoint.complete(1)
+    assert checkpoint.state() == {"cursor": 2, "done": [4]}
+    checkpoint.complete(3)
+    assert checkpoint.state() == {"cursor": 4, "done": []}
+
+
+def test_every_user_gets_the_message_once(tmp_path, server):
+    async def scenario(bot, session_factory):
+        broadcast_id = await new_broadcast(session_factory, "hello")
+        report = await engine_for(bot, session_factory).run(broadcast_id)
+        return report, *await load(session_factory, broadcast_id)
+
+    report, row, flagged = broadcast_run(tmp_path, server, scenario)
+    assert_delivered_once(server)
+    assert report.status == "done" and report.total == len(USERS)
+    assert (report.sent, report.blocked, report.failed) == (len(USERS) - len(BLOCKED) - len(MISSING),
+                                                            len(BLOCKED), len(MISSING))
+    assert (row.status, row.sent, row.blocked, row.failed) == ("done", report.sent, report.blocked, report.failed)
+    assert row.cursor == USERS[-1] and row.done == []
+    assert flagged == BLOCKED
+    assert {text for _, text in server.messages} == {"hello"}
+
+
+def test_429_pauses_and_retries_without_losing_messages(tmp_path, server):
+    server.global_rate = 60
+
+    async def scenario(bot, session_factory):
+        broadcast_id = await new_broadcast(session_factory, "flood")
+        return await engine_for(bot, session_factory, rate=400).run(broadcast_id)
+
+    report = broadcast_run(tmp_path, server, scenario)
+    assert server.rejected_429 > 0
+    assert report.rate_limited == server.rejected_429
+    assert report.failed == len(MISSING)
+    assert_delivered_once(server)
+
+
+def test_stopped_broadcast_resumes_from_its_checkpoint(tmp_path, server):
+    async def scenario(bot, session_factory):
+        broadcast_id = await new_broadcast(session_factory, "resumable")
+        engine = engine_for(bot, session_factory, rate=200)
+        task = asyncio.create_task(engine.run(broadcast_id))
+        while sum(server.delivered.values()) < len(USERS) * 0.4:
+            await asyncio.sleep(0.01)
+        engine.stop()
+        first = await task
+        interrupted, _ = await load(session_factory, broadcast_id)
+
+        resumed = engine_for(bot, session_factory)
+        assert await resumed.unfinished() == [broadcast_id]
+        second = await resumed.run(broadcast_id)
+        return first, interrupted, second, *await load(session_factory, broadcast_id)
+
+    first, interrupted, second, row, flagged = broadcast_run(tmp_path, server, scenario)
+    assert first.status == "running" and interrupted.status == "running"
+    assert interrupted.cursor is not None and interrupted.cursor < USERS[-1]
+    assert second.status == "done"
+    assert first.handled + second.handled + second.skipped == len(USERS)
+    assert_delivered_once(server)
+    assert (row.status, row.sent, row.blocked) == ("done", len(USERS) - len(BLOCKED) - len(MISSING), len(BLOCKED))
+    assert flagged == BLOCKED
+
+
+def test_finished_broadcast_is_not_sent_again(tmp_path, server):
+    async def scenario(bot, session_factory):
+        broadcast_id = await new_broadcast(session_factory, "once")
+        await engine_for(bot, session_factory).run(broadcast_id)
+        server.reset()
+        engine = engine_for(bot, session_factory)
+        return await engine.unfinished(), await engine.run(broadcast_id)
+
+    unfinished, report = broadcast_run(tmp_path, server, scenario)
+    assert unfinished == []
+    assert report.status == "done" and report.handled == 0
+    assert sum(server.delivered.values()) == 0